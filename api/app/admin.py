@@ -0,0 +1,168 @@
+"""
+Operational commands for the Qdrant collections.
+
+Usage:
+    python -m app.admin index-coverage [--create]
+    python -m app.admin migrate-collection --profile scalar [--replace-original] [--drop-old]
+    python -m app.admin migrate-vectorless [--collection users] [--replace-original] [--drop-old]
+    python -m app.admin backfill-sparse [--batch-size 256]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.collection_profiles import PROFILES, get_profile, migrate_collection, migrate_to_vectorless
+from app.config import Config
+from app.database import DatabaseClient
+from app.sparse_vectors import backfill_sparse_vectors
+
+logger = logging.getLogger(__name__)
+
+
+async def index_coverage(config: Config, create: bool = False) -> Dict[str, Any]:
+    """Report payload index coverage, optionally creating missing indexes first.
+
+    Args:
+        config: Application config
+        create: Create missing declared indexes before reporting
+
+    Returns:
+        {"created": {...}, "collections": DatabaseClient.index_coverage()}
+    """
+    db = DatabaseClient(config)
+    try:
+        created = await db.ensure_payload_indexes() if create else {}
+        return {"created": created, "collections": await db.index_coverage()}
+    finally:
+        await db.close()
+
+
+async def migrate(config: Config, profile_name: str, **options: Any) -> Dict[str, Any]:
+    """Rebuild the messages collection under a storage profile (see migrate_collection)."""
+    db = DatabaseClient(config)
+    try:
+        return await migrate_collection(db, get_profile(profile_name), **options)
+    finally:
+        await db.close()
+
+
+async def migrate_records(config: Config, collections: Optional[List[str]] = None, **options: Any) -> Dict[str, Any]:
+    """Move record collections onto vectorless points (see migrate_to_vectorless).
+
+    Returns:
+        Per-collection migration summaries
+    """
+    db = DatabaseClient(config)
+    try:
+        return {
+            collection: await migrate_to_vectorless(db, collection, **options)
+            for collection in collections or db.record_collections()
+        }
+    finally:
+        await db.close()
+
+
+async def backfill_sparse(config: Config, batch_size: int = 256) -> Dict[str, Any]:
+    """Add BM25 sparse vectors to messages stored without one (see backfill_sparse_vectors)."""
+    db = DatabaseClient(config)
+    try:
+        return await backfill_sparse_vectors(db, batch_size=batch_size)
+    finally:
+        await db.close()
+
+
+def _missing_indexes(report: Dict[str, Any]) -> List[str]:
+    return [
+        f"{collection}.{field}"
+        for collection, info in report["collections"].items()
+        for field, status in info["fields"].items()
+        if status["status"] != "ok"
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Choir Qdrant admin tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    coverage = subparsers.add_parser("index-coverage", help="Report which declared payload indexes exist")
+    coverage.add_argument("--create", action="store_true", help="Create missing indexes before reporting")
+    migration = subparsers.add_parser("migrate-collection", help="Rebuild the messages collection under a storage profile")
+    migration.add_argument("--profile", required=True, choices=sorted(PROFILES))
+    migration.add_argument("--batch-size", type=int, default=256, help="Points per copy page")
+    migration.add_argument("--sample", type=int, default=100, help="Queries for the recall/latency report")
+    migration.add_argument("--top-k", type=int, default=10, help="Hits compared per report query")
+    migration.add_argument("--min-recall", type=float, default=0.95, help="Don't switch traffic below this recall@k")
+    migration.add_argument(
+        "--replace-original", action="store_true",
+        help="Delete a plain (non-alias) collection so its name can become an alias of the new one "
+             "(messages written in the sub-second switch are lost; later migrations lose nothing)"
+    )
+    migration.add_argument("--drop-old", action="store_true", help="Delete the previous collection after an alias switch")
+    records = subparsers.add_parser(
+        "migrate-vectorless", help="Rebuild users/threads/notifications without placeholder vectors"
+    )
+    records.add_argument(
+        "--collection", action="append", dest="collections",
+        help="Record collection to migrate (repeatable; defaults to all of them)"
+    )
+    records.add_argument("--batch-size", type=int, default=256, help="Points per copy page")
+    records.add_argument(
+        "--replace-original", action="store_true",
+        help="Delete a plain (non-alias) collection so its name can become an alias of the new one "
+             "(record updates in the sub-second switch are lost; later migrations lose nothing)"
+    )
+    records.add_argument("--drop-old", action="store_true", help="Delete the previous collection after an alias switch")
+    backfill = subparsers.add_parser(
+        "backfill-sparse", help="Add hybrid-search sparse vectors to messages stored without one"
+    )
+    backfill.add_argument("--batch-size", type=int, default=256, help="Points per scroll/update page")
+    args = parser.parse_args(argv)
+
+    config = Config()
+    if args.command == "backfill-sparse":
+        try:
+            summary = asyncio.run(backfill_sparse(config, batch_size=args.batch_size))
+        except ValueError as e:
+            logger.error(str(e))
+            return 1
+        print(json.dumps(summary, indent=2))
+        return 0
+    if args.command == "migrate-vectorless":
+        summaries = asyncio.run(migrate_records(
+            config,
+            args.collections,
+            batch_size=args.batch_size,
+            replace_original=args.replace_original,
+            drop_old=args.drop_old
+        ))
+        print(json.dumps(summaries, indent=2))
+        # Collections that were already vectorless have nothing to switch
+        return 0 if all(s["switched"] or s["target"] is None for s in summaries.values()) else 1
+    if args.command == "migrate-collection":
+        summary = asyncio.run(migrate(
+            config,
+            args.profile,
+            batch_size=args.batch_size,
+            sample_size=args.sample,
+            top_k=args.top_k,
+            min_recall=args.min_recall,
+            replace_original=args.replace_original,
+            drop_old=args.drop_old
+        ))
+        print(json.dumps(summary, indent=2))
+        return 0 if summary["switched"] else 1
+
+    report = asyncio.run(index_coverage(config, create=args.create))
+    print(json.dumps(report, indent=2))
+    missing = _missing_indexes(report)
+    if missing:
+        logger.warning(f"Payload indexes missing or mistyped: {', '.join(missing)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,451 @@
+"""
+Storage profiles for the messages collection, and migration between them.
+
+A profile decides how vectors are stored (float32 in RAM, or on disk behind
+an int8/binary quantized copy kept in RAM), where payloads live, how the HNSW
+graph is built and how searches rescore quantized candidates.
+
+Migration rebuilds the collection under a new profile into a fresh physical
+collection and then points an alias with the configured collection name at
+it, so readers never see a missing or half-filled collection. A recall and
+latency report compares the old and new collections before the switch.
+
+The same alias switch moves the record collections (users, threads,
+notifications) created with placeholder vectors onto vectorless points.
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+from qdrant_client import models
+
+from app.sparse_vectors import SPARSE_VECTOR_NAME, dense_vector, encode_document, sparse_vectors_config
+
+if TYPE_CHECKING:
+    from app.database import DatabaseClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """How a vector collection is stored, indexed and searched."""
+    name: str
+    quantization: Optional[str] = None  # None, "scalar" (int8) or "binary"
+    vectors_on_disk: bool = False
+    payload_on_disk: bool = False
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    search_ef: Optional[int] = None
+    oversampling: float = 1.0
+    rescore: bool = True
+
+    def vectors_config(self, size: int) -> models.VectorParams:
+        return models.VectorParams(size=size, distance=models.Distance.COSINE, on_disk=self.vectors_on_disk)
+
+    def hnsw_config(self) -> models.HnswConfigDiff:
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def quantization_config(self) -> Optional[models.QuantizationConfig]:
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        """Per-query parameters; None when Qdrant's defaults apply."""
+        if self.quantization is None and self.search_ef is None:
+            return None
+        quantization = None
+        if self.quantization is not None:
+            quantization = models.QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        return models.SearchParams(hnsw_ef=self.search_ef, quantization=quantization)
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    # Full float32 vectors and payloads in RAM (how the collection was first created)
+    "default": CollectionProfile(name="default"),
+    # int8 copy in RAM (~4x smaller); originals on disk, used to rescore the oversampled candidates
+    "scalar": CollectionProfile(
+        name="scalar",
+        quantization="scalar",
+        vectors_on_disk=True,
+        payload_on_disk=True,
+        search_ef=128,
+        oversampling=2.0,
+    ),
+    # 1 bit per dimension in RAM (~32x smaller); needs heavier oversampling to keep recall
+    "binary": CollectionProfile(
+        name="binary",
+        quantization="binary",
+        vectors_on_disk=True,
+        payload_on_disk=True,
+        hnsw_ef_construct=200,
+        search_ef=128,
+        oversampling=3.0,
+    ),
+}
+
+
+def get_profile(name: str) -> CollectionProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown collection profile '{name}'; expected one of {sorted(PROFILES)}")
+
+
+async def resolve_alias(db: "DatabaseClient", name: str) -> Optional[str]:
+    """Physical collection behind an alias, or None if ``name`` is not an alias."""
+    response = await db.admin_client.get_aliases()
+    for alias in response.aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return None
+
+
+async def _copy_points(
+    db: "DatabaseClient",
+    source: str,
+    target: str,
+    batch_size: int,
+    scroll_filter: Optional[models.Filter] = None,
+    with_vectors: bool = True,
+    with_sparse: bool = False,
+    fingerprints: Optional[Dict[str, int]] = None
+) -> int:
+    """Copy points from ``source`` to ``target``, returning how many were written.
+
+    With ``fingerprints``, points whose payload is unchanged since they were
+    last copied are skipped, and every copied payload is recorded there.
+    """
+    def _vector(point: models.Record) -> Any:
+        if not with_vectors:
+            return {}
+        if with_sparse:
+            # Recomputed from the content so points stored before hybrid search get one too
+            content = (point.payload or {}).get("content", "")
+            return {"": dense_vector(point.vector), SPARSE_VECTOR_NAME: encode_document(content)}
+        return point.vector
+
+    copied = 0
+    offset = None
+    while True:
+        points, offset = await db.admin_client.scroll(
+            collection_name=source,
+            scroll_filter=scroll_filter,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=with_vectors
+        )
+        if fingerprints is not None:
+            points = [p for p in points if fingerprints.get(str(p.id)) != _fingerprint(p.payload)]
+            fingerprints.update((str(p.id), _fingerprint(p.payload)) for p in points)
+        if points:
+            await db.admin_client.upsert(
+                collection_name=target,
+                points=[
+                    models.PointStruct(id=p.id, vector=_vector(p), payload=p.payload)
+                    for p in points
+                ],
+                wait=True
+            )
+            copied += len(points)
+        if offset is None:
+            return copied
+
+
+def _fingerprint(payload: Optional[Dict[str, Any]]) -> int:
+    return hash(json.dumps(payload, sort_keys=True, default=str))
+
+
+async def _create_indexes(db: "DatabaseClient", name: str, target: str) -> None:
+    for field, schema in db.payload_indexes().get(name, {}).items():
+        await db.admin_client.create_payload_index(collection_name=target, field_name=field, field_schema=schema)
+
+
+def _written_since(started: str) -> models.Filter:
+    return models.Filter(must=[models.FieldCondition(key="created_at", range=models.DatetimeRange(gte=started))])
+
+
+async def _switch_alias(
+    db: "DatabaseClient",
+    alias: str,
+    target: str,
+    current_target: Optional[str],
+    drop_old: bool,
+    catch_up: Callable[[], Awaitable[int]]
+) -> int:
+    """Point ``alias`` at ``target``, replacing a plain collection of that name if there is one.
+
+    ``catch_up`` copies what was written to the old collection since the last
+    copy. With an existing alias it runs after the switch (once no new writes
+    can reach the old collection) and before ``drop_old`` deletes it, so
+    nothing is lost. A plain collection must be deleted before its name can
+    become an alias, so there it runs just before the delete, and writes
+    landing between the two are lost.
+
+    Returns:
+        Points copied by ``catch_up``
+    """
+    if current_target is not None:
+        await db.admin_client.update_collection_aliases(change_aliases_operations=[
+            models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)),
+            models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=target, alias_name=alias)),
+        ])
+        caught_up = await catch_up()
+        if drop_old:
+            await db.admin_client.delete_collection(current_target)
+        return caught_up
+    caught_up = await catch_up()
+    await db.admin_client.delete_collection(alias)
+    await db.admin_client.update_collection_aliases(change_aliases_operations=[
+        models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=target, alias_name=alias)),
+    ])
+    return caught_up
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def compare_collections(
+    db: "DatabaseClient",
+    baseline: str,
+    candidate: str,
+    candidate_params: Optional[models.SearchParams],
+    sample_size: int = 100,
+    top_k: int = 10
+) -> Dict[str, Any]:
+    """Measure the candidate's recall@k against exact search, and both collections' latency.
+
+    Stored vectors sampled from the baseline are used as queries. Ground truth
+    is an exact (brute-force) search of the baseline.
+
+    Args:
+        db: Database client
+        baseline: Collection currently serving traffic
+        candidate: Rebuilt collection
+        candidate_params: Search params the candidate will be queried with
+        sample_size: Number of query vectors
+        top_k: Hits compared per query
+
+    Returns:
+        {"queries", "top_k", "recall_at_k", "baseline_ms": {...}, "candidate_ms": {...}}
+    """
+    samples, _ = await db.admin_client.scroll(
+        collection_name=baseline, limit=sample_size, with_payload=False, with_vectors=True
+    )
+    recalls: List[float] = []
+    baseline_ms: List[float] = []
+    candidate_ms: List[float] = []
+    for point in samples:
+        point.vector = dense_vector(point.vector)
+        exact = await db.admin_client.search(
+            collection_name=baseline, query_vector=point.vector, limit=top_k,
+            search_params=models.SearchParams(exact=True), with_payload=False
+        )
+
+        started = time.perf_counter()
+        await db.admin_client.search(collection_name=baseline, query_vector=point.vector, limit=top_k, with_payload=False)
+        baseline_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        hits = await db.admin_client.search(
+            collection_name=candidate, query_vector=point.vector, limit=top_k,
+            search_params=candidate_params, with_payload=False
+        )
+        candidate_ms.append((time.perf_counter() - started) * 1000)
+
+        expected = {str(hit.id) for hit in exact}
+        if expected:
+            recalls.append(len(expected & {str(hit.id) for hit in hits}) / len(expected))
+
+    def _latency(values: List[float]) -> Dict[str, float]:
+        if not values:
+            return {"p50": 0.0, "p95": 0.0}
+        return {"p50": round(_percentile(values, 0.5), 2), "p95": round(_percentile(values, 0.95), 2)}
+
+    return {
+        "queries": len(samples),
+        "top_k": top_k,
+        "recall_at_k": round(sum(recalls) / len(recalls), 4) if recalls else None,
+        "baseline_ms": _latency(baseline_ms),
+        "candidate_ms": _latency(candidate_ms),
+    }
+
+
+async def migrate_collection(
+    db: "DatabaseClient",
+    profile: CollectionProfile,
+    alias: Optional[str] = None,
+    batch_size: int = 256,
+    sample_size: int = 100,
+    top_k: int = 10,
+    min_recall: float = 0.95,
+    replace_original: bool = False,
+    drop_old: bool = False
+) -> Dict[str, Any]:
+    """Rebuild the messages collection under a profile and switch traffic to it.
+
+    Steps: create ``<alias>_<profile>_<timestamp>``, copy every point (adding
+    BM25 sparse vectors for hybrid search), create the declared payload
+    indexes, copy points written during the copy again, compare recall and
+    latency, then move the alias and copy anything written to the old
+    collection in the meantime.
+
+    When ``alias`` is already an alias the switch is a single atomic alias
+    update and no writes are lost. The first migration of a plain collection
+    has to delete that collection to reuse its name as an alias, which leaves
+    a sub-second gap: messages written between the last catch-up copy and the
+    delete are lost, and writes during the gap fail. It only happens with
+    ``replace_original``, so run it when traffic is quiet.
+
+    Args:
+        db: Database client
+        profile: Target profile
+        alias: Name the application uses (defaults to MESSAGES_COLLECTION)
+        batch_size: Points per scroll/upsert page
+        sample_size: Queries for the recall/latency report
+        top_k: Hits compared per query
+        min_recall: Keep serving the old collection if recall@k falls below this
+        replace_original: Allow deleting a plain (non-alias) source collection
+        drop_old: Delete the previous physical collection after an alias switch
+
+    Returns:
+        Summary with the new collection name, point counts, report and whether it switched
+    """
+    alias = alias or db.config.MESSAGES_COLLECTION
+    current_target = await resolve_alias(db, alias)
+    source = current_target or alias
+    target = f"{alias}_{profile.name}_{datetime.now(UTC).strftime('%Y%m%d%H%M%S')}"
+
+    info = await db.admin_client.get_collection(source)
+    size = info.config.params.vectors.size
+    await db.admin_client.create_collection(
+        collection_name=target,
+        vectors_config=profile.vectors_config(size),
+        sparse_vectors_config=sparse_vectors_config(),
+        hnsw_config=profile.hnsw_config(),
+        quantization_config=profile.quantization_config(),
+        on_disk_payload=profile.payload_on_disk
+    )
+    logger.info(f"Created {target} with profile '{profile.name}'")
+
+    written_since_copy = _written_since(datetime.now(UTC).isoformat())
+    copied = await _copy_points(db, source, target, batch_size, with_sparse=True)
+    await _create_indexes(db, db.config.MESSAGES_COLLECTION, target)
+    # Points written while the copy ran (upserts are idempotent, so overlap is harmless)
+    caught_up = await _copy_points(db, source, target, batch_size, scroll_filter=written_since_copy, with_sparse=True)
+    logger.info(f"Copied {copied} points (+{caught_up} written during the copy) from {source} to {target}")
+
+    report = await compare_collections(db, source, target, profile.search_params(), sample_size, top_k)
+    summary = {
+        "source": source,
+        "target": target,
+        "profile": profile.name,
+        "copied": copied,
+        "caught_up": caught_up,
+        "report": report,
+        "switched": False,
+    }
+
+    recall = report["recall_at_k"]
+    if recall is not None and recall < min_recall:
+        logger.warning(f"Recall@{top_k} of {target} is {recall} (< {min_recall}); not switching '{alias}'")
+        return summary
+    if current_target is None and not replace_original:
+        logger.warning(
+            f"'{alias}' is a plain collection; {target} is ready but traffic was not switched. "
+            "Re-run with replace_original to delete it and alias the name to the new collection."
+        )
+        return summary
+
+    # Messages are never updated in place, so re-copying everything written since the
+    # copy began can't overwrite newer data in the target
+    summary["caught_up"] += await _switch_alias(
+        db, alias, target, current_target, drop_old,
+        catch_up=lambda: _copy_points(db, source, target, batch_size, scroll_filter=written_since_copy, with_sparse=True)
+    )
+    summary["switched"] = True
+    logger.info(
+        f"'{alias}' now serves {target}; set MESSAGES_COLLECTION_PROFILE={profile.name} so searches use its "
+        "rescoring, and restart so writes and searches pick up its sparse vectors"
+    )
+    return summary
+
+
+async def migrate_to_vectorless(
+    db: "DatabaseClient",
+    collection: str,
+    batch_size: int = 256,
+    replace_original: bool = False,
+    drop_old: bool = False
+) -> Dict[str, Any]:
+    """Rebuild a record collection (users, threads, notifications) without placeholder vectors.
+
+    Copies every payload into ``<collection>_records_<timestamp>``, created with
+    no vectors, recreates its payload indexes and switches the alias like
+    migrate_collection. Records are updated in place (thread lists, read
+    flags) without touching ``created_at``, so the last copy before the
+    switch re-copies everything and remembers each payload. The catch-up
+    around the switch then copies only records added or changed since, so
+    it can't overwrite updates already made in the new collection. Running
+    clients notice the switch on their next failed write and drop the
+    placeholder.
+
+    Updates to a plain (non-alias) collection between the catch-up and its
+    deletion under ``replace_original`` are lost, as in migrate_collection.
+
+    Args:
+        db: Database client
+        collection: One of DatabaseClient.record_collections()
+        batch_size: Points per scroll/upsert page
+        replace_original: Allow deleting a plain (non-alias) source collection
+        drop_old: Delete the previous physical collection after an alias switch
+
+    Returns:
+        Summary with the new collection name, point counts and whether it switched
+    """
+    if collection not in db.record_collections():
+        raise ValueError(f"'{collection}' is not a record collection; expected one of {db.record_collections()}")
+    current_target = await resolve_alias(db, collection)
+    source = current_target or collection
+    summary = {"source": source, "target": None, "copied": 0, "caught_up": 0, "switched": False}
+
+    info = await db.admin_client.get_collection(source)
+    if not info.config.params.vectors:
+        logger.info(f"{source} already stores vectorless points")
+        return summary
+
+    target = f"{collection}_records_{datetime.now(UTC).strftime('%Y%m%d%H%M%S')}"
+    await db.admin_client.create_collection(collection_name=target, vectors_config={})
+    summary["target"] = target
+    summary["copied"] = await _copy_points(db, source, target, batch_size, with_vectors=False)
+    await _create_indexes(db, collection, target)
+    logger.info(f"Copied {summary['copied']} records from {source} to {target}")
+
+    if current_target is None and not replace_original:
+        logger.warning(
+            f"'{collection}' is a plain collection; {target} is ready but traffic was not switched. "
+            "Re-run with replace_original to delete it and alias the name to the new collection."
+        )
+        return summary
+
+    copied: Dict[str, int] = {}
+    summary["copied"] = await _copy_points(db, source, target, batch_size, with_vectors=False, fingerprints=copied)
+    summary["caught_up"] = await _switch_alias(
+        db, collection, target, current_target, drop_old,
+        catch_up=lambda: _copy_points(db, source, target, batch_size, with_vectors=False, fingerprints=copied)
+    )
+    summary["switched"] = True
+    logger.info(f"'{collection}' now serves vectorless {target}")
+    return summary
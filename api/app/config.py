@@ -1,19 +1,90 @@
 import os
 import secrets
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class Config:
     # Qdrant configuration
+    # "remote" talks to a Qdrant server; "local" embeds Qdrant in-process (single worker only)
+    QDRANT_MODE: str = os.getenv("QDRANT_MODE", "remote")
+    # Local mode storage directory; ":memory:" keeps everything in RAM
+    QDRANT_LOCAL_PATH: str = os.getenv("QDRANT_LOCAL_PATH", ":memory:")
     QDRANT_URL: str = os.getenv("QDRANT_URL", "http://localhost:6333")
     QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY", "")
+    # Qdrant transport: pooled keep-alive connections and timeouts (seconds)
+    QDRANT_TIMEOUT: int = int(os.getenv("QDRANT_TIMEOUT", "60"))
+    QDRANT_READ_TIMEOUT: int = int(os.getenv("QDRANT_READ_TIMEOUT", "10"))
+    QDRANT_POOL_MAX_CONNECTIONS: int = int(os.getenv("QDRANT_POOL_MAX_CONNECTIONS", "100"))
+    QDRANT_POOL_MAX_KEEPALIVE: int = int(os.getenv("QDRANT_POOL_MAX_KEEPALIVE", "20"))
+    QDRANT_KEEPALIVE_EXPIRY: float = float(os.getenv("QDRANT_KEEPALIVE_EXPIRY", "30"))
+    QDRANT_HTTP2: bool = os.getenv("QDRANT_HTTP2", "False").lower() in ('true', '1', 't')
+    # Create missing payload indexes for filtered fields at startup
+    QDRANT_ENSURE_INDEXES: bool = os.getenv("QDRANT_ENSURE_INDEXES", "True").lower() in ('true', '1', 't')
     MESSAGES_COLLECTION: str = "choir"
+    # Storage profile of the messages collection (see app.collection_profiles)
+    MESSAGES_COLLECTION_PROFILE: str = os.getenv("MESSAGES_COLLECTION_PROFILE", "default")
     CHAT_THREADS_COLLECTION: str = "chat_threads"
     USERS_COLLECTION: str = "users"
     NOTIFICATIONS_COLLECTION: str = "notifications"
     DEVICE_TOKENS_COLLECTION: str = "device_tokens"
     SEARCH_LIMIT: int = 80
+    SEARCH_BATCH_MAX_QUERIES: int = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "100"))
+    # Fuse dense and BM25 sparse retrieval when the messages collection has sparse vectors
+    HYBRID_SEARCH: bool = os.getenv("HYBRID_SEARCH", "True").lower() in ('true', '1', 't')
+    # MMR diversity re-ranking (see app.rerank): relevance/diversity trade-off used by the
+    # Experience phase, and candidates fetched per kept hit. Off unless set, since it pulls
+    # MMR_FETCH_FACTOR x limit full vectors per search
+    MMR_LAMBDA: Optional[float] = float(os.environ["MMR_LAMBDA"]) if os.getenv("MMR_LAMBDA") else None
+    MMR_FETCH_FACTOR: int = int(os.getenv("MMR_FETCH_FACTOR", "4"))
+    # Write-behind vector upserts (see app.write_buffer): points per upsert, wait before sending,
+    # retries before a batch is dropped, and how long flushed points stay visible to local searches
+    VECTOR_WRITE_BATCH_SIZE: int = int(os.getenv("VECTOR_WRITE_BATCH_SIZE", "64"))
+    VECTOR_WRITE_MAX_WAIT_MS: float = float(os.getenv("VECTOR_WRITE_MAX_WAIT_MS", "50"))
+    VECTOR_WRITE_MAX_RETRIES: int = int(os.getenv("VECTOR_WRITE_MAX_RETRIES", "3"))
+    VECTOR_WRITE_SETTLE_SECONDS: float = float(os.getenv("VECTOR_WRITE_SETTLE_SECONDS", "2"))
+
+    # Pooled LLM clients (see app.postchain.model_pool)
+    MODEL_POOL_MAX_SIZE: int = int(os.getenv("MODEL_POOL_MAX_SIZE", "64"))
+    MODEL_POOL_IDLE_TTL: float = float(os.getenv("MODEL_POOL_IDLE_TTL", "600"))
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+    LLM_HTTP_MAX_KEEPALIVE: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+    LLM_HTTP_TIMEOUT: float = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+
+    # Shared web search HTTP client (see app.tools.http_client): pooled keep-alive connections,
+    # connect timeout (seconds), rate-limit retries and the longest Retry-After honoured (seconds)
+    SEARCH_HTTP_MAX_CONNECTIONS: int = int(os.getenv("SEARCH_HTTP_MAX_CONNECTIONS", "20"))
+    SEARCH_HTTP_MAX_KEEPALIVE: int = int(os.getenv("SEARCH_HTTP_MAX_KEEPALIVE", "10"))
+    SEARCH_HTTP2: bool = os.getenv("SEARCH_HTTP2", "True").lower() in ('true', '1', 't')
+    SEARCH_CONNECT_TIMEOUT: float = float(os.getenv("SEARCH_CONNECT_TIMEOUT", "3"))
+    SEARCH_MAX_RETRIES: int = int(os.getenv("SEARCH_MAX_RETRIES", "3"))
+    SEARCH_MAX_RETRY_DELAY: float = float(os.getenv("SEARCH_MAX_RETRY_DELAY", "5"))
+
+    # Outbound dependency guards (see app.resilience): consecutive failures before a breaker
+    # opens, seconds before it lets a probe through, and how long a call waits for a bulkhead slot
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_TIMEOUT: float = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+    BULKHEAD_MAX_WAIT: float = float(os.getenv("BULKHEAD_MAX_WAIT", "1"))
+    # Per-dependency concurrent calls and per-call deadline (seconds)
+    QDRANT_MAX_CONCURRENCY: int = int(os.getenv("QDRANT_MAX_CONCURRENCY", "64"))
+    QDRANT_CALL_DEADLINE: float = float(os.getenv("QDRANT_CALL_DEADLINE", "15"))
+    EMBEDDINGS_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDINGS_MAX_CONCURRENCY", "16"))
+    EMBEDDINGS_CALL_DEADLINE: float = float(os.getenv("EMBEDDINGS_CALL_DEADLINE", "20"))
+    WEB_SEARCH_MAX_CONCURRENCY: int = int(os.getenv("WEB_SEARCH_MAX_CONCURRENCY", "8"))
+    WEB_SEARCH_CALL_DEADLINE: float = float(os.getenv("WEB_SEARCH_CALL_DEADLINE", "10"))
+    SUI_MAX_CONCURRENCY: int = int(os.getenv("SUI_MAX_CONCURRENCY", "4"))
+    SUI_CALL_DEADLINE: float = float(os.getenv("SUI_CALL_DEADLINE", "30"))
+    # Mints are signed by one address, so they run one at a time with no deadline;
+    # this is how long a reward waits for its turn before it's dropped
+    SUI_MINT_MAX_WAIT: float = float(os.getenv("SUI_MINT_MAX_WAIT", "60"))
+    APNS_MAX_CONCURRENCY: int = int(os.getenv("APNS_MAX_CONCURRENCY", "8"))
+    APNS_CALL_DEADLINE: float = float(os.getenv("APNS_CALL_DEADLINE", "10"))
+
+    # Thread state store (conversation history per thread)
+    THREAD_STATE_BACKEND: str = os.getenv("THREAD_STATE_BACKEND", "sqlite")  # sqlite | memory
+    THREAD_STATE_DB_PATH: str = os.getenv("THREAD_STATE_DB_PATH", "thread_state/threads.sqlite3")
+    THREAD_STATE_CACHE_SIZE: int = int(os.getenv("THREAD_STATE_CACHE_SIZE", "256"))
     VECTOR_SIZE: int = 1536
 
     # API configuration
@@ -56,6 +127,14 @@ class Config:
 
     # Model configuration
     EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    # Embedding cache: in-memory LRU entries plus an optional on-disk tier
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    EMBEDDING_CACHE_DIR: str = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+    EMBEDDING_CACHE_PERSIST: bool = os.getenv("EMBEDDING_CACHE_PERSIST", "True").lower() in ('true', '1', 't')
+    # Embedding micro-batching: texts per request, wait before sending, in-flight batches per API key
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+    EMBEDDING_BATCH_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_BATCH_MAX_CONCURRENCY", "4"))
 
     # OpenAI models
     # OPENAI_GPT_45_PREVIEW: str = "gpt-4.5-preview"
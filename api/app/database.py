@@ -1,120 +1,718 @@
-from qdrant_client import QdrantClient, models
+from qdrant_client import AsyncQdrantClient, models
 from qdrant_client.http.exceptions import ApiException, UnexpectedResponse
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 from datetime import datetime, UTC
+import asyncio
+import base64
+import json
 import uuid
 import logging
+import httpx
+import numpy as np
 from .config import Config
-from .models.api import VectorStoreRequest, UserCreate, ThreadCreate
+from .collection_profiles import get_profile
+from .rerank import mmr_select
+from .resilience import DependencyUnavailable, GuardedClient, get_dependency
+from .sparse_vectors import SPARSE_VECTOR_NAME, dense_vector, encode_document, encode_query, sparse_vectors_config
+from .write_buffer import WriteBehindBuffer
+from .models.api import VectorSearchRequest, VectorStoreRequest, UserCreate, ThreadCreate
 
 logger = logging.getLogger(__name__)
 
 __all__ = ['DatabaseClient', 'search_vectors']
 
+# Payload fields returned by search_similar when no projection is given
+SEARCH_RESULT_FIELDS = ("content", "thread_id", "created_at", "role", "token_value", "step")
+# Short copy of the content stored on each message so searches can skip the full text
+PREVIEW_FIELD = "content_preview"
+CONTENT_PREVIEW_LENGTH = 100
+_FIELD_DEFAULTS: Dict[str, Any] = {"token_value": 0, "metadata": {}}
+
+
+def content_preview(content: str) -> str:
+    return content[:CONTENT_PREVIEW_LENGTH] + "..." if len(content) > CONTENT_PREVIEW_LENGTH else content
+
+
+# Candidates each hybrid branch (dense, sparse) contributes to fusion, per requested hit
+HYBRID_PREFETCH_FACTOR = 2
+
+# Largest page a paginated read returns
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: str, ids: List[str], descending: bool) -> str:
+    """Opaque token for the position after the last returned item.
+
+    ``ids`` are the already-returned points that share ``created_at``, so ties
+    on the timestamp are neither repeated nor skipped.
+    """
+    raw = json.dumps({"t": created_at, "ids": ids, "d": descending}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Inverse of encode_cursor; raises ValueError on a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if not isinstance(data.get("t"), str) or not isinstance(data.get("ids"), list):
+            raise ValueError("missing fields")
+        return data
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid pagination cursor: {e}")
+
+
+def payload_filter(conditions: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+    """Build an AND filter from {field: value}; list values match any of their items."""
+    if not conditions:
+        return None
+    return models.Filter(must=[
+        models.FieldCondition(
+            key=key,
+            match=models.MatchAny(any=list(value)) if isinstance(value, (list, tuple)) else models.MatchValue(value=value)
+        )
+        for key, value in conditions.items()
+    ])
+
+
+def _payload_value(payload: Dict[str, Any], key: str) -> Any:
+    value: Any = payload
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def payload_matches(payload: Dict[str, Any], conditions: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate payload_filter conditions in process (array payloads match if any item does)."""
+    for key, expected in (conditions or {}).items():
+        value = _payload_value(payload, key)
+        values = value if isinstance(value, list) else [value]
+        accepted = list(expected) if isinstance(expected, (list, tuple)) else [expected]
+        if not any(v in accepted for v in values):
+            return False
+    return True
+
+
+def _search_hits(points: List[models.ScoredPoint], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    results = []
+    for point in points:
+        payload = point.payload or {}
+        hit = {field: payload.get(field, _FIELD_DEFAULTS.get(field, '')) for field in fields}
+        if PREVIEW_FIELD in hit and not hit[PREVIEW_FIELD] and payload.get("content"):
+            # Points stored before previews existed
+            hit[PREVIEW_FIELD] = content_preview(payload["content"])
+        hit["id"] = str(point.id)
+        hit["similarity"] = point.score
+        results.append(hit)
+    return results
+
+
+def create_qdrant_client(config: Config) -> AsyncQdrantClient:
+    """Build the Qdrant client for the configured mode (remote server or embedded)."""
+    if config.QDRANT_MODE == "local":
+        if config.QDRANT_LOCAL_PATH == ":memory:":
+            logger.info("Using embedded in-memory Qdrant")
+            return AsyncQdrantClient(location=":memory:")
+        logger.info(f"Using embedded Qdrant stored at {config.QDRANT_LOCAL_PATH}")
+        return AsyncQdrantClient(path=config.QDRANT_LOCAL_PATH)
+    if config.QDRANT_MODE != "remote":
+        raise ValueError(f"Unknown QDRANT_MODE '{config.QDRANT_MODE}'; expected 'remote' or 'local'")
+
+    # The async client shares one pooled keep-alive transport, so Qdrant calls
+    # never block the event loop.
+    return AsyncQdrantClient(
+        url=config.QDRANT_URL,
+        api_key=config.QDRANT_API_KEY,
+        timeout=config.QDRANT_TIMEOUT,
+        https=True,
+        http2=config.QDRANT_HTTP2,
+        limits=httpx.Limits(
+            max_connections=config.QDRANT_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=config.QDRANT_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=config.QDRANT_KEEPALIVE_EXPIRY
+        )
+    )
+
+
+# Schema and admin calls can legitimately run long, so they skip the per-call deadline
+UNGUARDED_CLIENT_CALLS = (
+    "close", "create_collection", "delete_collection", "update_collection",
+    "create_payload_index", "update_collection_aliases",
+)
+
+
+def is_qdrant_failure(error: BaseException) -> bool:
+    """Whether an error says Qdrant itself is unhealthy (rejected requests don't count)."""
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code is None or error.status_code >= 500
+    # Local mode reports bad requests (e.g. unknown collection) as ValueError
+    return not isinstance(error, ValueError)
+
+
 class DatabaseClient:
     def __init__(self, config: Config):
         self.config = config
-        # Initialize with cloud configuration
-        self.client = QdrantClient(
-            url=config.QDRANT_URL,
-            api_key=config.QDRANT_API_KEY,
-            timeout=60,
-            https=True
+        qdrant = create_qdrant_client(config)
+        # Every Qdrant call goes through the shared bulkhead/breaker (see app.resilience)
+        self.client = GuardedClient(
+            qdrant,
+            get_dependency("qdrant", config, is_failure=is_qdrant_failure),
+            unguarded=UNGUARDED_CLIENT_CALLS
+        )
+        # Migrations and backfills page through whole collections, so they get their
+        # own breaker with no per-call deadline and can't trip the one live traffic uses
+        self.admin_client = GuardedClient(
+            qdrant,
+            get_dependency("qdrant_admin", config, is_failure=is_qdrant_failure),
+            unguarded=UNGUARDED_CLIENT_CALLS
         )
-        # Verify collections exist
-        for collection in [
-            self.config.MESSAGES_COLLECTION,
+        self.local = config.QDRANT_MODE == "local"
+        # Record collection -> whether it stores vectorless points (learned in ensure_collections)
+        self._vectorless: Dict[str, bool] = {}
+        # Whether the messages collection stores sparse vectors (learned in ensure_collections)
+        self.messages_sparse = False
+        # Server-side timeout (seconds) applied to each read call (search/scroll/retrieve)
+        self.read_timeout = config.QDRANT_READ_TIMEOUT
+        self._collections_verified = False
+        self._collections_lock = asyncio.Lock()
+        # Rescoring/oversampling for the messages collection's storage profile
+        self.messages_search_params = get_profile(config.MESSAGES_COLLECTION_PROFILE).search_params()
+        # store_vector returns before Qdrant has the point; searches merge these in meanwhile
+        self.writes = WriteBehindBuffer(
+            self._upsert_nowait,
+            max_batch_size=config.VECTOR_WRITE_BATCH_SIZE,
+            max_wait=config.VECTOR_WRITE_MAX_WAIT_MS / 1000,
+            max_retries=config.VECTOR_WRITE_MAX_RETRIES,
+            settle_time=config.VECTOR_WRITE_SETTLE_SECONDS
+        )
+
+    async def ensure_collections(self) -> None:
+        """Verify the required collections exist (runs once per client).
+
+        A remote server must already have every collection except notifications.
+        Embedded (local) mode creates whatever is missing, so it starts empty.
+        """
+        if self._collections_verified:
+            return
+        async with self._collections_lock:
+            if self._collections_verified:
+                return
+            for collection in [self.config.MESSAGES_COLLECTION, *self.record_collections()]:
+                if not await self.client.collection_exists(collection):
+                    # Create the collection if it doesn't exist
+                    if self.local or collection == self.config.NOTIFICATIONS_COLLECTION:
+                        await self._create_collection(collection)
+                    else:
+                        raise RuntimeError(f"Required collection {collection} does not exist")
+            for collection in self.record_collections():
+                await self._refresh_vectorless(collection)
+            messages = await self.client.get_collection(self.config.MESSAGES_COLLECTION)
+            self.messages_sparse = SPARSE_VECTOR_NAME in (messages.config.params.sparse_vectors or {})
+            # Local mode ignores payload indexes
+            if self.config.QDRANT_ENSURE_INDEXES and not self.local:
+                await self.ensure_payload_indexes()
+            self._collections_verified = True
+
+    def record_collections(self) -> List[str]:
+        """Collections of plain records that are never searched by vector."""
+        return [
             self.config.USERS_COLLECTION,
             self.config.CHAT_THREADS_COLLECTION,
-            self.config.NOTIFICATIONS_COLLECTION
-        ]:
-            if not self.client.collection_exists(collection):
-                # Create the collection if it doesn't exist
-                if collection == self.config.NOTIFICATIONS_COLLECTION:
-                    logger.info(f"Creating notifications collection: {collection}")
-                    self.client.create_collection(
-                        collection_name=collection,
-                        vectors_config=models.VectorParams(
-                            size=self.config.VECTOR_SIZE,
-                            distance=models.Distance.COSINE
+            self.config.NOTIFICATIONS_COLLECTION,
+        ]
+
+    async def _refresh_vectorless(self, collection: str) -> bool:
+        info = await self.client.get_collection(collection)
+        self._vectorless[collection] = not info.config.params.vectors
+        return self._vectorless[collection]
+
+    def _record_vector(self, collection: str) -> Any:
+        # Collections created before vectorless storage still require a (placeholder) vector
+        if self._vectorless.get(collection, True):
+            return {}
+        return [0.0] * self.config.VECTOR_SIZE
+
+    async def _upsert_record(self, collection: str, point_id: str, payload: Dict[str, Any]) -> None:
+        """Write a record point, with no vector once the collection is vectorless."""
+        def _point() -> models.PointStruct:
+            return models.PointStruct(id=point_id, vector=self._record_vector(collection), payload=payload)
+        try:
+            await self.client.upsert(collection_name=collection, points=[_point()])
+        except UnexpectedResponse:
+            # The collection may have been migrated (see migrate-vectorless) since startup
+            was_vectorless = self._vectorless.get(collection)
+            if await self._refresh_vectorless(collection) == was_vectorless:
+                raise
+            await self.client.upsert(collection_name=collection, points=[_point()])
+
+    async def _create_collection(self, collection: str) -> None:
+        """Create a collection with its production schema."""
+        logger.info(f"Creating collection: {collection}")
+        if collection != self.config.MESSAGES_COLLECTION:
+            # Users, threads and notifications are plain records: payload only, no vectors
+            await self.client.create_collection(collection_name=collection, vectors_config={})
+            return
+        profile = get_profile(self.config.MESSAGES_COLLECTION_PROFILE)
+        await self.client.create_collection(
+            collection_name=collection,
+            vectors_config=profile.vectors_config(self.config.VECTOR_SIZE),
+            sparse_vectors_config=sparse_vectors_config(),
+            hnsw_config=profile.hnsw_config(),
+            quantization_config=profile.quantization_config(),
+            on_disk_payload=profile.payload_on_disk
+        )
+
+    @property
+    def hybrid(self) -> bool:
+        """Whether message searches given query text fuse dense and sparse retrieval."""
+        return self.config.HYBRID_SEARCH and self.messages_sparse
+
+    def _search_params(self, collection: str) -> Optional[models.SearchParams]:
+        return self.messages_search_params if collection == self.config.MESSAGES_COLLECTION else None
+
+    def payload_indexes(self) -> Dict[str, Dict[str, models.PayloadSchemaType]]:
+        """Payload indexes every filtered or ordered scroll relies on, per collection."""
+        keyword = models.PayloadSchemaType.KEYWORD
+        datetime_ = models.PayloadSchemaType.DATETIME
+        return {
+            # get_thread_messages: thread_id + created_at range; find_message_by_prompt_hash
+            self.config.MESSAGES_COLLECTION: {
+                "thread_id": keyword,
+                "created_at": datetime_,
+                "metadata.prompt_hash": keyword,
+            },
+            # search_users_by_public_key
+            self.config.USERS_COLLECTION: {"public_key": keyword},
+            # get_user_threads: thread ownership, ordered by created_at
+            self.config.CHAT_THREADS_COLLECTION: {"user_id": keyword, "created_at": datetime_},
+            # get_user_notifications (ordered by created_at) and device token lookups
+            self.config.NOTIFICATIONS_COLLECTION: {
+                "recipient_wallet_address": keyword,
+                "created_at": datetime_,
+                "type": keyword,
+                "wallet_address": keyword,
+                "token": keyword,
+            },
+        }
+
+    async def ensure_payload_indexes(self) -> Dict[str, List[str]]:
+        """Create any declared payload index that is missing; safe to run repeatedly.
+
+        Returns:
+            The fields whose index was created, per collection
+        """
+        created: Dict[str, List[str]] = {}
+        for collection, fields in self.payload_indexes().items():
+            info = await self.client.get_collection(collection)
+            existing = info.payload_schema or {}
+            for field, schema in fields.items():
+                if field in existing:
+                    if existing[field].data_type != schema:
+                        logger.warning(
+                            f"Payload index {collection}.{field} is {existing[field].data_type}, expected {schema}"
                         )
-                    )
+                    continue
+                # Don't block startup while Qdrant builds the index
+                await self.client.create_payload_index(
+                    collection_name=collection,
+                    field_name=field,
+                    field_schema=schema,
+                    wait=False
+                )
+                created.setdefault(collection, []).append(field)
+                logger.info(f"Creating {schema.value} payload index on {collection}.{field}")
+        return created
+
+    async def index_coverage(self) -> Dict[str, Dict[str, Any]]:
+        """Report, per collection, which declared payload indexes exist.
+
+        Returns:
+            {collection: {"points": int, "fields": {field: {...}}, "undeclared": [...]}} where each
+            field entry has "expected", "actual" (or None), "indexed_points" and a "status" of
+            "ok", "missing" or "type_mismatch"
+        """
+        report: Dict[str, Dict[str, Any]] = {}
+        for collection, fields in self.payload_indexes().items():
+            info = await self.client.get_collection(collection)
+            existing = info.payload_schema or {}
+            field_report = {}
+            for field, schema in fields.items():
+                index = existing.get(field)
+                if index is None:
+                    status = "missing"
+                elif index.data_type != schema:
+                    status = "type_mismatch"
                 else:
-                    raise RuntimeError(f"Required collection {collection} does not exist")
+                    status = "ok"
+                field_report[field] = {
+                    "expected": schema.value,
+                    "actual": index.data_type.value if index is not None else None,
+                    "indexed_points": index.points if index is not None else 0,
+                    "status": status,
+                }
+            report[collection] = {
+                "points": info.points_count,
+                "fields": field_report,
+                "undeclared": sorted(set(existing) - set(fields)),
+            }
+        return report
+
+    async def close(self) -> None:
+        """Send buffered writes, then close the underlying Qdrant transport."""
+        await self.flush()
+        await self.client.close()
+
+    async def flush(self) -> None:
+        """Wait until every write-behind upsert has been sent (or dropped after retries)."""
+        await self.writes.drain()
+
+    async def _upsert_nowait(self, collection: str, points: List[models.PointStruct]) -> None:
+        await self.ensure_collections()
+        await self.client.upsert(collection_name=collection, points=points, wait=False)
+
+    def _buffered_hits(
+        self,
+        collection: str,
+        query_vector: List[float],
+        score_threshold: Optional[float],
+        filter: Optional[Dict[str, Any]]
+    ) -> List[models.ScoredPoint]:
+        """Score this process's not-yet-searchable writes against a query (cosine, like the collection)."""
+        points = [p for p in self.writes.visible_points(collection) if payload_matches(p.payload or {}, filter)]
+        if not points:
+            return []
+        matrix = np.asarray([dense_vector(p.vector) for p in points], dtype=np.float32)
+        query = np.asarray(query_vector, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+        return [
+            models.ScoredPoint(id=point.id, version=0, score=float(score), payload=point.payload, vector=point.vector)
+            for point, score in zip(points, scores)
+            if score_threshold is None or score >= score_threshold
+        ]
+
+    @staticmethod
+    def _merge_hits(
+        found: List[models.ScoredPoint],
+        buffered: List[models.ScoredPoint],
+        limit: int
+    ) -> List[models.ScoredPoint]:
+        if not buffered:
+            return found
+        seen = {str(point.id) for point in found}
+        merged = found + [point for point in buffered if str(point.id) not in seen]
+        merged.sort(key=lambda point: point.score, reverse=True)
+        return merged[:limit]
+
+    async def search_similar(
+        self,
+        collection: str,
+        query_vector: List[float],
+        limit: int = 10,
+        score_threshold: Optional[float] = None,
+        fields: Optional[Sequence[str]] = None,
+        filter: Optional[Dict[str, Any]] = None,
+        query_text: Optional[str] = None,
+        mmr_lambda: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Search a collection for the points nearest to a query vector.
 
-    async def search_similar(self, collection: str, query_vector: List[float], limit: int = 10) -> List[Dict[str, Any]]:
+        Args:
+            collection: Collection to search
+            query_vector: Query embedding
+            limit: Maximum number of hits to return
+            score_threshold: Optional minimum similarity; weaker hits are dropped server-side
+            fields: Payload fields to fetch (defaults to SEARCH_RESULT_FIELDS). Pass
+                PREVIEW_FIELD instead of "content" to skip the full text.
+            filter: Optional {payload field: value} conditions (see payload_filter)
+            query_text: Text that was embedded; enables hybrid retrieval on the
+                messages collection (see _hybrid_search)
+            mmr_lambda: If given, fetch MMR_FETCH_FACTOR x limit candidates with
+                their vectors and keep ``limit`` of them by Maximal Marginal
+                Relevance (1.0 = relevance only, lower = more diverse)
+
+        Returns:
+            One dict per hit with "id", "similarity" and the requested fields
+        """
+        fields = tuple(fields) if fields is not None else SEARCH_RESULT_FIELDS
         try:
+            await self.ensure_collections()
             # Validate vector size
             if len(query_vector) != self.config.VECTOR_SIZE:
                 logger.error(f"Invalid vector size: got {len(query_vector)}, expected {self.config.VECTOR_SIZE}")
                 return []
 
             logger.info(f"Searching with query embedding of length {len(query_vector)}, limit={limit}, collection={collection}")
-            search_result = self.client.search(
-                collection_name=collection,
-                query_vector=query_vector,
-                limit=self.config.SEARCH_LIMIT,
-                with_payload=True,
-                with_vectors=False
-            )
+            limit = min(limit, self.config.SEARCH_LIMIT)
+            diversify = mmr_lambda is not None
+            # MMR needs a wider candidate pool, with vectors, to choose from
+            fetch = min(limit * self.config.MMR_FETCH_FACTOR, self.config.SEARCH_LIMIT) if diversify else limit
+            sparse = encode_query(query_text) if query_text and self.hybrid else None
+            if sparse is not None and collection == self.config.MESSAGES_COLLECTION:
+                search_result = await self._hybrid_search(
+                    collection, query_vector, sparse, fetch, score_threshold, fields, filter, with_vectors=diversify
+                )
+            else:
+                search_result = await self.client.search(
+                    collection_name=collection,
+                    query_vector=query_vector,
+                    query_filter=payload_filter(filter),
+                    search_params=self._search_params(collection),
+                    limit=fetch,
+                    score_threshold=score_threshold,
+                    with_payload=list(fields) if fields else False,
+                    with_vectors=diversify,
+                    timeout=self.read_timeout
+                )
             logger.info(f"Search returned {len(search_result)} results")
-
-            return [
-                {
-                    "id": str(result.id),
-                    "content": result.payload.get('content', ''),
-                    "thread_id": result.payload.get('thread_id', ''),
-                    "created_at": result.payload.get('created_at', ''),
-                    "role": result.payload.get('role', ''),
-                    "token_value": result.payload.get('token_value', 0),
-                    "step": result.payload.get('step', ''),
-                    "similarity": result.score
-                }
-                for result in search_result
-            ]
+            buffered = self._buffered_hits(collection, query_vector, score_threshold, filter)
+            hits = self._merge_hits(search_result, buffered, fetch)
+            if diversify:
+                hits = self._diversify(query_vector, hits, limit, mmr_lambda)
+            return _search_hits(hits, fields)
+        except DependencyUnavailable:
+            # Callers fall back to degraded output; an empty result would read as "nothing similar"
+            raise
         except Exception as e:
             logger.error(f"Error during search operation: {e}", exc_info=True)
             return []
 
+    @staticmethod
+    def _diversify(
+        query_vector: List[float],
+        hits: List[models.ScoredPoint],
+        k: int,
+        mmr_lambda: float
+    ) -> List[models.ScoredPoint]:
+        """Keep ``k`` hits by Maximal Marginal Relevance (hits without a vector are dropped)."""
+        hits = [hit for hit in hits if dense_vector(hit.vector) is not None]
+        if len(hits) <= 1:
+            return hits[:k]
+        chosen = mmr_select(query_vector, [dense_vector(hit.vector) for hit in hits], k, mmr_lambda)
+        return [hits[i] for i in chosen]
+
+    async def _hybrid_search(
+        self,
+        collection: str,
+        query_vector: List[float],
+        sparse: models.SparseVector,
+        limit: int,
+        score_threshold: Optional[float],
+        fields: Sequence[str],
+        filter: Optional[Dict[str, Any]],
+        with_vectors: bool = False
+    ) -> List[models.ScoredPoint]:
+        """Dense + BM25 retrieval fused with RRF, in one Qdrant request.
+
+        Reciprocal rank fusion picks the top ``limit`` points from both
+        candidate lists, so exact keyword matches (names, IDs) make the cut even
+        when their embedding is not among the nearest. The chosen points are then
+        scored by dense cosine similarity, which keeps ``score_threshold`` and
+        the similarity-based novelty reward meaningful.
+        """
+        query_filter = payload_filter(filter)
+        candidates = limit * HYBRID_PREFETCH_FACTOR
+        response = await self.client.query_points(
+            collection_name=collection,
+            prefetch=[models.Prefetch(
+                prefetch=[
+                    models.Prefetch(
+                        query=query_vector,
+                        filter=query_filter,
+                        params=self._search_params(collection),
+                        limit=candidates
+                    ),
+                    models.Prefetch(query=sparse, using=SPARSE_VECTOR_NAME, filter=query_filter, limit=candidates),
+                ],
+                query=models.FusionQuery(fusion=models.Fusion.RRF),
+                limit=limit
+            )],
+            query=query_vector,
+            limit=limit,
+            score_threshold=score_threshold,
+            with_payload=list(fields) if fields else False,
+            with_vectors=with_vectors,
+            timeout=self.read_timeout
+        )
+        return response.points
+
+    async def search_batch(self, collection: str, queries: Sequence[VectorSearchRequest]) -> List[List[Dict[str, Any]]]:
+        """Run many vector searches in one Qdrant round-trip.
+
+        Args:
+            collection: Collection to search
+            queries: One request per search, each with its own limit, threshold,
+                projection and filter (same semantics as search_similar)
+
+        Returns:
+            One result list per query, in input order. Queries with a wrong
+            vector size get an empty list.
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        valid = [i for i, q in enumerate(queries) if len(q.query_vector) == self.config.VECTOR_SIZE]
+        if len(valid) < len(queries):
+            logger.error(f"Skipping {len(queries) - len(valid)} batch queries with invalid vector size")
+        if not valid:
+            return results
+
+        fields = {
+            i: tuple(queries[i].fields) if queries[i].fields is not None else SEARCH_RESULT_FIELDS
+            for i in valid
+        }
+        limits = {i: min(queries[i].limit or self.config.SEARCH_LIMIT, self.config.SEARCH_LIMIT) for i in valid}
+        try:
+            await self.ensure_collections()
+            requests = [
+                models.SearchRequest(
+                    vector=queries[i].query_vector,
+                    filter=payload_filter(queries[i].filter),
+                    params=self._search_params(collection),
+                    limit=limits[i],
+                    score_threshold=queries[i].score_threshold,
+                    with_payload=list(fields[i]) if fields[i] else False,
+                    with_vector=False
+                )
+                for i in valid
+            ]
+            logger.info(f"Batch searching {len(requests)} queries in collection={collection}")
+            batch_result = await self.client.search_batch(
+                collection_name=collection,
+                requests=requests,
+                timeout=self.read_timeout
+            )
+            for i, points in zip(valid, batch_result):
+                query = queries[i]
+                buffered = self._buffered_hits(collection, query.query_vector, query.score_threshold, query.filter)
+                results[i] = _search_hits(self._merge_hits(points, buffered, limits[i]), fields[i])
+            return results
+        except DependencyUnavailable:
+            raise
+        except Exception as e:
+            logger.error(f"Error during batch search operation: {e}", exc_info=True)
+            return results
+
+    def message_vectors(self, vector: List[float], content: str) -> Any:
+        """Vectors stored for a message: the embedding, plus BM25 weights when the collection has them."""
+        if not self.messages_sparse:
+            return vector
+        return {"": vector, SPARSE_VECTOR_NAME: encode_document(content)}
+
+    def _message_point(self, data: Dict[str, Any]) -> models.PointStruct:
+        return models.PointStruct(
+            id=str(uuid.uuid4()),
+            vector=self.message_vectors(data["vector"], data["content"]),
+            payload={
+                "content": data["content"],
+                PREVIEW_FIELD: content_preview(data["content"]),
+                "metadata": data.get("metadata", {}),
+                "created_at": datetime.now(UTC).isoformat()
+            }
+        )
+
     async def save_message(self, data: Dict[str, Any]) -> Dict[str, str]:
         """Save a message with its vector."""
         try:
-            point_id = str(uuid.uuid4())
-            self.client.upsert(
+            await self.ensure_collections()
+            point = self._message_point(data)
+            await self.client.upsert(
                 collection_name=self.config.MESSAGES_COLLECTION,
-                points=[
-                    models.PointStruct(
-                        id=point_id,
-                        vector=data["vector"],
-                        payload={
-                            "content": data["content"],
-                            "metadata": data.get("metadata", {}),
-                            "created_at": datetime.now(UTC).isoformat()
-                        }
-                    )
-                ]
+                points=[point]
             )
-            return {"id": point_id}
+            return {"id": point.id}
         except Exception as e:
             logger.error(f"Error saving message: {e}")
             raise
 
-    async def search_vectors(self, query_vector: List[float], limit: int = 10) -> List[Dict[str, Any]]:
-        """REST endpoint specific vector search."""
+    async def search_vectors(
+        self,
+        query_vector: List[float],
+        limit: int = 10,
+        score_threshold: Optional[float] = None,
+        fields: Optional[Sequence[str]] = None,
+        filter: Optional[Dict[str, Any]] = None,
+        query_text: Optional[str] = None,
+        mmr_lambda: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """REST endpoint specific vector search.
+
+        Raises:
+            DependencyUnavailable: Qdrant's circuit breaker or bulkhead rejected the search
+        """
         return await self.search_similar(
             collection=self.config.MESSAGES_COLLECTION,
             query_vector=query_vector,
-            limit=limit
+            limit=limit,
+            score_threshold=score_threshold,
+            fields=fields,
+            filter=filter,
+            query_text=query_text,
+            mmr_lambda=mmr_lambda
+        )
+
+    async def find_message_by_prompt_hash(
+        self,
+        prompt_hash: str,
+        content_type: str = "user_prompt"
+    ) -> Optional[Dict[str, Any]]:
+        """Find a stored message embedding by the hash of its prompt (indexed keyword lookup).
+
+        Writes still in the write-behind buffer count, so client retries
+        arriving right after the original request match too.
+
+        Args:
+            prompt_hash: metadata.prompt_hash of the message (sha256 of the normalized prompt)
+            content_type: metadata.embedded_content_type the stored vector must have
+
+        Returns:
+            {"id", "content", "vector"} of a match, or None (including on errors)
+
+        Raises:
+            DependencyUnavailable: Qdrant's circuit breaker or bulkhead rejected the lookup
+        """
+        conditions = {"metadata.prompt_hash": prompt_hash, "metadata.embedded_content_type": content_type}
+        point = next(
+            (
+                p for p in self.writes.visible_points(self.config.MESSAGES_COLLECTION)
+                if payload_matches(p.payload or {}, conditions)
+            ),
+            None
         )
+        try:
+            if point is None:
+                await self.ensure_collections()
+                points, _ = await self.client.scroll(
+                    collection_name=self.config.MESSAGES_COLLECTION,
+                    scroll_filter=payload_filter(conditions),
+                    limit=1,
+                    with_payload=["content"],
+                    with_vectors=True,
+                    timeout=self.read_timeout
+                )
+                point = points[0] if points else None
+        except DependencyUnavailable:
+            raise
+        except Exception as e:
+            logger.error(f"Error looking up prompt hash: {e}")
+            return None
+        vector = dense_vector(point.vector) if point is not None else None
+        if not isinstance(vector, list) or len(vector) != self.config.VECTOR_SIZE:
+            return None
+        return {"id": str(point.id), "content": (point.payload or {}).get("content", ""), "vector": vector}
 
     async def store_vector(self, content: str, vector: List[float], metadata: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
-        """REST endpoint specific vector storage."""
-        message = {
-            "content": content,
-            "vector": vector,
-            "metadata": metadata or {}
-        }
-        return await self.save_message(message)
+        """Store a message vector write-behind: returns its ID without waiting for Qdrant.
+
+        The point is batched with other writes (see WriteBehindBuffer) and is
+        visible to this process's searches and lookups immediately. Use
+        save_message when the write must be durable before returning.
+        """
+        if len(vector) != self.config.VECTOR_SIZE:
+            raise ValueError(f"Invalid vector size: got {len(vector)}, expected {self.config.VECTOR_SIZE}")
+        point = self._message_point({"content": content, "vector": vector, "metadata": metadata or {}})
+        self.writes.add(self.config.MESSAGES_COLLECTION, point)
+        return {"id": point.id}
 
     async def delete_vector(self, vector_id: str, collection: Optional[str] = None) -> Dict[str, str]:
         """Delete a vector from the vector database.
@@ -127,12 +725,17 @@ class DatabaseClient:
             Status message with the ID of the deleted vector
         """
         try:
+            await self.ensure_collections()
             # Use default collection if not specified
             if collection is None:
                 collection = self.config.MESSAGES_COLLECTION
+            # A buffered upsert sent after the delete would resurrect the point
+            if self.writes.get(collection, vector_id) is not None:
+                await self.flush()
+                self.writes.discard(collection, vector_id)
 
             # Delete the vector
-            result = self.client.delete(
+            result = await self.client.delete(
                 collection_name=collection,
                 points_selector=models.PointIdsList(
                     points=[vector_id]
@@ -151,19 +754,21 @@ class DatabaseClient:
     async def get_vector(self, vector_id: str) -> Optional[Dict[str, Any]]:
         """Get a vector by ID."""
         try:
+            await self.ensure_collections()
             # Only perform exact match
-            result = self.client.retrieve(
+            result = await self.client.retrieve(
                 collection_name=self.config.MESSAGES_COLLECTION,
                 ids=[vector_id],
                 with_payload=True,
-                with_vectors=True
+                with_vectors=True,
+                timeout=self.read_timeout
             )
-            if result and len(result) > 0:
-                point = result[0]
+            point = result[0] if result else self.writes.get(self.config.MESSAGES_COLLECTION, vector_id)
+            if point is not None:
                 return {
                     "id": str(point.id),
                     "content": point.payload.get('content', ''),
-                    "vector": point.vector,
+                    "vector": dense_vector(point.vector),
                     "metadata": point.payload.get('metadata', {}),
                     "created_at": point.payload.get('created_at', '')
                 }
@@ -177,27 +782,19 @@ class DatabaseClient:
     async def create_user(self, user_data: UserCreate) -> Dict[str, Any]:
         """Create a new user."""
         try:
+            await self.ensure_collections()
             user_id = str(uuid.uuid4())
-            point = models.PointStruct(
-                id=user_id,
-                vector=[0.0] * self.config.VECTOR_SIZE,  # Placeholder vector
-                payload={
-                    "public_key": user_data.public_key,
-                    "created_at": datetime.now(UTC).isoformat(),
-                    "thread_ids": [],
-                }
-            )
+            payload = {
+                "public_key": user_data.public_key,
+                "created_at": datetime.now(UTC).isoformat(),
+            }
 
-            self.client.upsert(
-                collection_name=self.config.USERS_COLLECTION,
-                points=[point]
-            )
+            await self._upsert_record(self.config.USERS_COLLECTION, user_id, payload)
 
             return {
                 "id": user_id,
                 "public_key": user_data.public_key,
-                "created_at": point.payload["created_at"],
-                "thread_ids": []
+                "created_at": payload["created_at"]
             }
         except Exception as e:
             logger.error(f"Error creating user: {e}")
@@ -206,18 +803,19 @@ class DatabaseClient:
     async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user by ID."""
         try:
-            result = self.client.retrieve(
+            await self.ensure_collections()
+            result = await self.client.retrieve(
                 collection_name=self.config.USERS_COLLECTION,
                 ids=[user_id],
-                with_payload=True
+                with_payload=True,
+                timeout=self.read_timeout
             )
             if result and len(result) > 0:
                 point = result[0]
                 return {
                     "id": str(point.id),
                     "public_key": point.payload["public_key"],
-                    "created_at": point.payload["created_at"],
-                    "thread_ids": point.payload["thread_ids"]
+                    "created_at": point.payload["created_at"]
                 }
             return None
         except Exception as e:
@@ -227,7 +825,8 @@ class DatabaseClient:
     async def search_users_by_public_key(self, public_key: str) -> List[Dict[str, Any]]:
         """Search for users by public key (wallet address)."""
         try:
-            search_result = self.client.scroll(
+            await self.ensure_collections()
+            search_result = await self.client.scroll(
                 collection_name=self.config.USERS_COLLECTION,
                 scroll_filter=models.Filter(
                     must=[
@@ -239,7 +838,8 @@ class DatabaseClient:
                 ),
                 limit=10,
                 with_payload=True,
-                with_vectors=False
+                with_vectors=False,
+                timeout=self.read_timeout
             )
 
             points, _ = search_result
@@ -247,8 +847,7 @@ class DatabaseClient:
                 {
                     "id": str(point.id),
                     "public_key": point.payload["public_key"],
-                    "created_at": point.payload["created_at"],
-                    "thread_ids": point.payload["thread_ids"]
+                    "created_at": point.payload["created_at"]
                 }
                 for point in points
             ]
@@ -257,30 +856,34 @@ class DatabaseClient:
             raise
 
     async def create_thread(self, thread_data: ThreadCreate) -> Dict[str, Any]:
-        """Create a new thread."""
+        """Create a new thread.
+
+        Ownership lives on the thread point (``user_id``, indexed), so creating a
+        thread never rewrites the user record.
+        """
         try:
-            thread_id = str(uuid.uuid4())
-            point = models.PointStruct(
-                id=thread_id,
-                vector=[0.0] * self.config.VECTOR_SIZE,  # Placeholder vector
-                payload={
-                    "name": thread_data.name,
-                    "user_id": thread_data.user_id,
-                    "created_at": datetime.now(UTC).isoformat(),
-                    "co_authors": [thread_data.user_id],
-                    "message_count": 0,
-                    "last_activity": datetime.now(UTC).isoformat()
-                }
+            await self.ensure_collections()
+            owner = await self.client.retrieve(
+                collection_name=self.config.USERS_COLLECTION,
+                ids=[thread_data.user_id],
+                with_payload=False,
+                timeout=self.read_timeout
             )
+            if not owner:
+                raise ValueError(f"User {thread_data.user_id} not found")
 
-            # Create thread
-            self.client.upsert(
-                collection_name=self.config.CHAT_THREADS_COLLECTION,
-                points=[point]
-            )
+            thread_id = str(uuid.uuid4())
+            payload = {
+                "name": thread_data.name,
+                "user_id": thread_data.user_id,
+                "created_at": datetime.now(UTC).isoformat(),
+                "co_authors": [thread_data.user_id],
+                "message_count": 0,
+                "last_activity": datetime.now(UTC).isoformat()
+            }
 
-            # Update user's thread_ids
-            await self._add_thread_to_user(thread_data.user_id, thread_id)
+            # Create thread
+            await self._upsert_record(self.config.CHAT_THREADS_COLLECTION, thread_id, payload)
 
             # If initial message provided, create it
             if thread_data.initial_message:
@@ -294,7 +897,7 @@ class DatabaseClient:
 
             return {
                 "id": thread_id,
-                **point.payload
+                **payload
             }
         except Exception as e:
             logger.error(f"Error creating thread: {e}")
@@ -303,10 +906,12 @@ class DatabaseClient:
     async def get_thread(self, thread_id: str) -> Optional[Dict[str, Any]]:
         """Get thread by ID."""
         try:
-            result = self.client.retrieve(
+            await self.ensure_collections()
+            result = await self.client.retrieve(
                 collection_name=self.config.CHAT_THREADS_COLLECTION,
                 ids=[thread_id],
-                with_payload=True
+                with_payload=True,
+                timeout=self.read_timeout
             )
             if result and len(result) > 0:
                 point = result[0]
@@ -319,116 +924,197 @@ class DatabaseClient:
             logger.error(f"Error getting thread: {e}")
             raise
 
-    async def get_thread_messages(self, thread_id: str, limit: int = 50, before: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get messages for a thread."""
-        try:
-            # Build filter
-            must_conditions = [
-                models.FieldCondition(
-                    key="thread_id",
-                    match=models.MatchValue(value=thread_id)
-                )
-            ]
+    async def _scroll_by_created_at(
+        self,
+        collection: str,
+        conditions: List[models.Condition],
+        limit: int,
+        cursor: Optional[str] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        descending: bool = False,
+        any_of: Optional[List[models.Condition]] = None
+    ) -> Dict[str, Any]:
+        """One page of points ordered by created_at.
+
+        Points sharing a timestamp are each returned exactly once across pages;
+        their relative order is unspecified.
 
-            if before:
-                must_conditions.append(
-                    models.FieldCondition(
-                        key="created_at",
-                        range=models.Range(lt=before)
-                    )
-                )
+        Args:
+            collection: Collection to scroll
+            conditions: Filter conditions that must all match
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            cursor: Token from a previous page's "next_cursor"
+            before: Only points created strictly before this ISO timestamp
+            after: Only points created strictly after this ISO timestamp
+            descending: Newest first instead of oldest first
+            any_of: Conditions of which at least one must match
 
-            search_result = self.client.scroll(
-                collection_name=self.config.MESSAGES_COLLECTION,
-                scroll_filter=models.Filter(
-                    must=must_conditions
-                ),
-                limit=limit,
+        Returns:
+            {"items": [...], "next_cursor": str or None}
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        position: Optional[Dict[str, Any]] = None
+        seen: set = set()
+        range_args: Dict[str, str] = {}
+        if before:
+            range_args["lt"] = before
+        if after:
+            range_args["gt"] = after
+        if cursor:
+            position = decode_cursor(cursor)
+            if bool(position.get("d")) != descending:
+                raise ValueError("Pagination cursor was issued for the opposite order")
+            # Inclusive bound; points already returned at this timestamp are skipped below
+            range_args["lte" if descending else "gte"] = position["t"]
+            seen = set(position["ids"])
+
+        must = list(conditions)
+        if range_args:
+            must.append(models.FieldCondition(key="created_at", range=models.DatetimeRange(**range_args)))
+        scroll_filter = models.Filter(must=must, should=any_of or None)
+        direction = models.Direction.DESC if descending else models.Direction.ASC
+
+        fetch = limit + len(seen) + 1
+        try:
+            points, _ = await self.client.scroll(
+                collection_name=collection,
+                scroll_filter=scroll_filter,
+                limit=fetch,
+                order_by=models.OrderBy(key="created_at", direction=direction),
                 with_payload=True,
-                with_vectors=False
+                with_vectors=False,
+                timeout=self.read_timeout
             )
+        except UnexpectedResponse as e:
+            # Ordering needs the created_at index; sort the filtered set client-side without it
+            logger.warning(f"Ordered scroll of {collection} failed ({e}); sorting client-side")
+            points = []
+            offset = None
+            while True:
+                page, offset = await self.client.scroll(
+                    collection_name=collection,
+                    scroll_filter=scroll_filter,
+                    limit=MAX_PAGE_SIZE,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False,
+                    timeout=self.read_timeout
+                )
+                points.extend(page)
+                if offset is None:
+                    break
+
+        # Qdrant orders by created_at only; the id keeps each page deterministic
+        points = sorted(
+            points,
+            key=lambda p: (p.payload.get("created_at", ""), str(p.id)),
+            reverse=descending
+        )
+        items = [
+            {"id": str(point.id), **point.payload}
+            for point in points
+            if str(point.id) not in seen
+        ]
+        has_more = len(items) > limit
+        items = items[:limit]
+
+        next_cursor = None
+        if has_more and items:
+            last_created_at = items[-1].get("created_at", "")
+            tied = [item["id"] for item in items if item.get("created_at", "") == last_created_at]
+            if position is not None and position["t"] == last_created_at:
+                # The whole page sat on the previous cursor's timestamp
+                tied = sorted(seen) + tied
+            next_cursor = encode_cursor(last_created_at, tied, descending)
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def get_thread_messages_page(
+        self,
+        thread_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        descending: bool = False
+    ) -> Dict[str, Any]:
+        """Get one page of a thread's messages ordered by created_at.
 
-            points, _ = search_result
-            return [
-                {
-                    "id": str(point.id),
-                    **point.payload
-                }
-                for point in points
-            ]
+        Returns:
+            {"messages": [...], "next_cursor": str or None}
+        """
+        try:
+            await self.ensure_collections()
+            page = await self._scroll_by_created_at(
+                self.config.MESSAGES_COLLECTION,
+                [models.FieldCondition(key="thread_id", match=models.MatchValue(value=thread_id))],
+                limit,
+                cursor=cursor,
+                before=before,
+                after=after,
+                descending=descending
+            )
+            return {"messages": page["items"], "next_cursor": page["next_cursor"]}
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Error getting thread messages: {e}")
             raise
 
-    async def get_user_threads(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get all threads for a user."""
-        try:
-            user = await self.get_user(user_id)
-            if not user:
-                return []
-
-            thread_ids = user["thread_ids"]
-            if not thread_ids:
-                return []
+    async def get_thread_messages(self, thread_id: str, limit: int = 50, before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get messages for a thread (oldest first; first page only)."""
+        page = await self.get_thread_messages_page(thread_id, limit, before=before)
+        return page["messages"]
+
+    async def get_user_threads_page(
+        self,
+        user_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        descending: bool = False
+    ) -> Dict[str, Any]:
+        """Get one page of the threads a user owns, ordered by created_at.
 
-            results = self.client.retrieve(
-                collection_name=self.config.CHAT_THREADS_COLLECTION,
-                ids=thread_ids,
-                with_payload=True
+        Returns:
+            {"threads": [...], "next_cursor": str or None}
+        """
+        try:
+            await self.ensure_collections()
+            page = await self._scroll_by_created_at(
+                self.config.CHAT_THREADS_COLLECTION,
+                [models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id))],
+                limit,
+                cursor=cursor,
+                before=before,
+                after=after,
+                descending=descending
             )
-
-            return [
-                {
-                    "id": str(point.id),
-                    **point.payload
-                }
-                for point in results
-            ]
+            return {"threads": page["items"], "next_cursor": page["next_cursor"]}
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Error getting user threads: {e}")
             raise
 
-    async def _add_thread_to_user(self, user_id: str, thread_id: str):
-        """Helper method to add thread ID to user's thread list."""
-        try:
-            user = await self.get_user(user_id)
-            if not user:
-                raise ValueError(f"User {user_id} not found")
-
-            thread_ids = user["thread_ids"]
-            if thread_id not in thread_ids:
-                thread_ids.append(thread_id)
-
-                # Use upsert instead of update_payload
-                self.client.upsert(
-                    collection_name=self.config.USERS_COLLECTION,
-                    points=[
-                        models.PointStruct(
-                            id=user_id,
-                            vector=[0.0] * self.config.VECTOR_SIZE,  # Keep existing vector
-                            payload={
-                                "public_key": user["public_key"],
-                                "created_at": user["created_at"],
-                                "thread_ids": thread_ids
-                            }
-                        )
-                    ],
-                    wait=True
-                )
-        except Exception as e:
-            logger.error(f"Error adding thread to user: {e}")
-            raise
+    async def get_user_threads(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get a user's threads (oldest first; first page only)."""
+        page = await self.get_user_threads_page(user_id, limit)
+        return page["threads"]
 
     async def get_vector_by_id(self, vector_id: str) -> Optional[Dict[str, Any]]:
         """Get a vector by ID."""
         try:
-            result = self.client.retrieve(
+            await self.ensure_collections()
+            result = await self.client.retrieve(
                 collection_name=self.config.MESSAGES_COLLECTION,
                 ids=[vector_id],
-                with_payload=True
+                with_payload=True,
+                timeout=self.read_timeout
             )
-            if result and len(result) > 0:
-                point = result[0]
+            point = result[0] if result else self.writes.get(self.config.MESSAGES_COLLECTION, vector_id)
+            if point is not None:
                 return {
                     "id": str(point.id),
                     "content": point.payload.get("content", ""),
@@ -453,18 +1139,7 @@ class DatabaseClient:
         print(f"DATABASE: Saving notification to collection {self.config.NOTIFICATIONS_COLLECTION}")
 
         try:
-            # Verify collection exists
-            if not self.client.collection_exists(self.config.NOTIFICATIONS_COLLECTION):
-                logger.warning(f"Notifications collection {self.config.NOTIFICATIONS_COLLECTION} does not exist, creating it")
-                self.client.create_collection(
-                    collection_name=self.config.NOTIFICATIONS_COLLECTION,
-                    vectors_config=models.VectorParams(
-                        size=self.config.VECTOR_SIZE,
-                        distance=models.Distance.COSINE
-                    )
-                )
-                logger.info(f"Created notifications collection: {self.config.NOTIFICATIONS_COLLECTION}")
-
+            await self.ensure_collections()
             notification_id = str(uuid.uuid4())
             logger.info(f"Generated notification ID: {notification_id}")
 
@@ -473,20 +1148,9 @@ class DatabaseClient:
                 notification["created_at"] = datetime.now(UTC).isoformat()
                 logger.info(f"Added timestamp: {notification['created_at']}")
 
-            # Create point
-            point = models.PointStruct(
-                id=notification_id,
-                vector=[0.0] * self.config.VECTOR_SIZE,  # Placeholder vector
-                payload=notification
-            )
-            logger.info(f"Created point with ID: {notification_id}")
-
             # Save notification
             logger.info(f"Upserting notification to collection: {self.config.NOTIFICATIONS_COLLECTION}")
-            self.client.upsert(
-                collection_name=self.config.NOTIFICATIONS_COLLECTION,
-                points=[point]
-            )
+            await self._upsert_record(self.config.NOTIFICATIONS_COLLECTION, notification_id, notification)
             logger.info(f"Successfully upserted notification with ID: {notification_id}")
 
             return {"success": True, "id": notification_id}
@@ -495,99 +1159,72 @@ class DatabaseClient:
             print(f"Error saving notification: {e}")
             return {"success": False, "error": str(e)}
 
-    async def get_user_notifications(self, wallet_addresses: List[str], limit: int = 50) -> List[Dict[str, Any]]:
+    async def get_user_notifications_page(
+        self,
+        wallet_addresses: List[str],
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Get notifications for a user across all their wallets.
+        Get one page of a user's notifications across all their wallets, newest first.
 
         Args:
             wallet_addresses: List of wallet addresses to fetch notifications for
             limit: Maximum number of notifications to return
+            cursor: Token from a previous page's "next_cursor"
+            before: Only notifications created before this ISO timestamp
+            after: Only notifications created after this ISO timestamp
 
         Returns:
-            List of notifications
+            {"notifications": [...], "next_cursor": str or None}
         """
         logger.info(f"DATABASE: Getting notifications for wallet addresses: {wallet_addresses}")
         print(f"DATABASE: Getting notifications for {len(wallet_addresses)} wallet addresses")
 
-        try:
-            if not wallet_addresses:
-                logger.warning("No wallet addresses provided, cannot get notifications")
-                return []
-
-            # Verify collection exists
-            if not self.client.collection_exists(self.config.NOTIFICATIONS_COLLECTION):
-                logger.warning(f"Notifications collection {self.config.NOTIFICATIONS_COLLECTION} does not exist, creating it")
-                self.client.create_collection(
-                    collection_name=self.config.NOTIFICATIONS_COLLECTION,
-                    vectors_config=models.VectorParams(
-                        size=self.config.VECTOR_SIZE,
-                        distance=models.Distance.COSINE
-                    )
-                )
-                logger.info(f"Created notifications collection: {self.config.NOTIFICATIONS_COLLECTION}")
-                # Return empty list since we just created the collection
-                return []
-
-            # Build filter to match any of the wallet addresses
-            should_conditions = [
-                models.FieldCondition(
-                    key="recipient_wallet_address",
-                    match=models.MatchValue(value=address)
-                )
-                for address in wallet_addresses
-            ]
-
-            logger.info(f"Built filter with {len(should_conditions)} conditions")
+        if not wallet_addresses:
+            logger.warning("No wallet addresses provided, cannot get notifications")
+            return {"notifications": [], "next_cursor": None}
 
-            # Log the query we're about to execute
-            logger.info(f"Querying collection {self.config.NOTIFICATIONS_COLLECTION} with filter: should={[cond.key for cond in should_conditions]}")
-
-            # Check if SortParams is available in the models module
-            try:
-                # Try to use SortParams if available
-                search_result = self.client.scroll(
-                    collection_name=self.config.NOTIFICATIONS_COLLECTION,
-                    scroll_filter=models.Filter(
-                        should=should_conditions
-                    ),
-                    limit=limit,
-                    with_payload=True,
-                    with_vectors=False,
-                    # Sort by created_at in descending order (newest first)
-                    sort=models.SortParams(
-                        field_name="created_at",
-                        direction=models.Direction.DESC
-                    )
-                )
-            except AttributeError:
-                # Fall back to using without sort if SortParams is not available
-                logger.info("SortParams not available in this version of qdrant_client, using scroll without sorting")
-                search_result = self.client.scroll(
-                    collection_name=self.config.NOTIFICATIONS_COLLECTION,
-                    scroll_filter=models.Filter(
-                        should=should_conditions
-                    ),
-                    limit=limit,
-                    with_payload=True,
-                    with_vectors=False
-                )
+        # ensure_collections creates the notifications collection if it is missing
+        await self.ensure_collections()
 
+        # Match any of the wallet addresses
+        should_conditions = [
+            models.FieldCondition(
+                key="recipient_wallet_address",
+                match=models.MatchValue(value=address)
+            )
+            for address in wallet_addresses
+        ]
+        page = await self._scroll_by_created_at(
+            self.config.NOTIFICATIONS_COLLECTION,
+            [],
+            limit,
+            cursor=cursor,
+            before=before,
+            after=after,
+            descending=True,
+            any_of=should_conditions
+        )
+        logger.info(f"Found {len(page['items'])} notifications")
+        return {"notifications": page["items"], "next_cursor": page["next_cursor"]}
 
-            points, _ = search_result
-            logger.info(f"Found {len(points)} notifications")
+    async def get_user_notifications(self, wallet_addresses: List[str], limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get the newest notifications for a user across all their wallets.
 
-            # Log the first few notifications (if any)
-            if points:
-                for i, point in enumerate(points[:3]):  # Log first 3 notifications
-                    logger.info(f"Notification {i+1}: ID={point.id}, Type={point.payload.get('type')}, Created={point.payload.get('created_at')}")
+        Args:
+            wallet_addresses: List of wallet addresses to fetch notifications for
+            limit: Maximum number of notifications to return
 
-            return [
-                {
-                    "id": str(point.id),
-                    **point.payload
-                }
-                for point in points
-            ]
+        Returns:
+            List of notifications
+        """
+        try:
+            page = await self.get_user_notifications_page(wallet_addresses, limit)
+            return page["notifications"]
         except Exception as e:
             logger.error(f"Error getting user notifications: {e}", exc_info=True)
             print(f"Error getting user notifications: {e}")
@@ -596,31 +1233,23 @@ class DatabaseClient:
     async def mark_notification_as_read(self, notification_id: str) -> Dict[str, Any]:
         """Mark a notification as read."""
         try:
+            await self.ensure_collections()
             # Get the notification
-            result = self.client.retrieve(
+            result = await self.client.retrieve(
                 collection_name=self.config.NOTIFICATIONS_COLLECTION,
                 ids=[notification_id],
-                with_payload=True
+                with_payload=False,
+                timeout=self.read_timeout
             )
 
             if not result or len(result) == 0:
                 return {"success": False, "reason": "notification_not_found"}
 
-            # Update the notification
-            point = result[0]
-            payload = point.payload
-            payload["read"] = True
-
-            # Save the updated notification
-            self.client.upsert(
+            # Payload-only update; the point keeps whatever vector it has
+            await self.client.set_payload(
                 collection_name=self.config.NOTIFICATIONS_COLLECTION,
-                points=[
-                    models.PointStruct(
-                        id=notification_id,
-                        vector=[0.0] * self.config.VECTOR_SIZE,  # Keep existing vector
-                        payload=payload
-                    )
-                ]
+                payload={"read": True},
+                points=[notification_id]
             )
 
             return {"success": True, "id": notification_id}
@@ -631,8 +1260,9 @@ class DatabaseClient:
     async def save_device_token(self, device_token: str, wallet_address: str) -> Dict[str, Any]:
         """Save a device token for push notifications."""
         try:
+            await self.ensure_collections()
             # Check if this device token already exists for this wallet
-            search_result = self.client.scroll(
+            search_result = await self.client.scroll(
                 collection_name=self.config.NOTIFICATIONS_COLLECTION,
                 scroll_filter=models.Filter(
                     must=[
@@ -651,7 +1281,8 @@ class DatabaseClient:
                     ]
                 ),
                 limit=1,
-                with_payload=True
+                with_payload=True,
+                timeout=self.read_timeout
             )
 
             points, _ = search_result
@@ -673,16 +1304,7 @@ class DatabaseClient:
             }
 
             # Save to database
-            self.client.upsert(
-                collection_name=self.config.NOTIFICATIONS_COLLECTION,
-                points=[
-                    models.PointStruct(
-                        id=token_id,
-                        vector=[0.0] * self.config.VECTOR_SIZE,  # Placeholder vector
-                        payload=payload
-                    )
-                ]
-            )
+            await self._upsert_record(self.config.NOTIFICATIONS_COLLECTION, token_id, payload)
 
             return {"success": True, "id": token_id}
         except Exception as e:
@@ -692,4 +1314,7 @@ class DatabaseClient:
 async def search_vectors(query_vector: List[float], limit: int = 10) -> List[Dict[str, Any]]:
     """Standalone vector search function for direct use."""
     db = DatabaseClient(Config.from_env())
-    return await db.search_vectors(query_vector, limit)
+    try:
+        return await db.search_vectors(query_vector, limit)
+    finally:
+        await db.close()
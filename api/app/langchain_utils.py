@@ -4,9 +4,11 @@ This module provides a unified interface for basic chat completions and structur
 across multiple model providers.
 """
 
+import json
 import logging
 import random
 import copy
+import threading
 from typing import Dict, Any, List, Optional, Tuple, AsyncGenerator, AsyncIterator, Type, Union
 from pydantic import BaseModel, Field, create_model
 from dataclasses import dataclass
@@ -14,6 +16,7 @@ from app.config import Config  # Explicitly import Config
 import re
 
 from langchain_core.language_models import BaseChatModel
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, AIMessageChunk, BaseMessage, ToolMessage
 
 # LangChain model imports
@@ -173,12 +176,14 @@ def get_model_provider(model_name: str) -> Tuple[str, str]:
     # Default to "default" if no prefix is provided
     return "default", model_name
 
-def get_base_model(model_config: ModelConfig) -> BaseChatModel:
+def get_base_model(model_config: ModelConfig, http_async_client: Optional[Any] = None) -> BaseChatModel:
     """
     Initialize the appropriate LangChain model based on the provided ModelConfig.
 
     Args:
         model_config: Configuration object containing provider, model name, temp, tokens, and API keys.
+        http_async_client: Optional shared httpx.AsyncClient for providers that accept one
+            (OpenAI, OpenRouter, Groq); others build their own client.
 
     Returns:
         Initialized LangChain model
@@ -202,7 +207,8 @@ def get_base_model(model_config: ModelConfig) -> BaseChatModel:
         return ChatOpenAI(
             api_key=model_config.openai_api_key,
             model=model_name,
-            temperature=temp
+            temperature=temp,
+            http_async_client=http_async_client
         )
     elif provider == "anthropic":
         return ChatAnthropic(
@@ -238,13 +244,15 @@ def get_base_model(model_config: ModelConfig) -> BaseChatModel:
             api_key=model_config.openrouter_api_key,
             base_url="https://openrouter.ai/api/v1",
             model=model_name,
-            temperature=temp
+            temperature=temp,
+            http_async_client=http_async_client
         )
     elif provider == "groq":
         return ChatGroq(
             api_key=model_config.groq_api_key,
             model=model_name,
-            temperature=temp
+            temperature=temp,
+            http_async_client=http_async_client
         )
     raise ValueError(f"Unsupported provider: {provider}")
 
@@ -348,101 +356,132 @@ def convert_to_langchain_messages(messages: List[Dict[str, str]], provider: Opti
 
     return lc_messages
 
+def _json_type_to_python(json_type: Optional[str]) -> type:
+    return {
+        "string": str,
+        "integer": int,
+        "number": float,
+        "boolean": bool,
+        "array": list,
+        "object": dict,
+    }.get(json_type, str)  # Default to string
+
+
+def _build_tool_model(tool: Any) -> Type[BaseModel]:
+    """Build the Pydantic model describing a tool's arguments."""
+    # Check if the tool is a dictionary with a function key
+    if isinstance(tool, dict) and "function" in tool:
+        function_data = tool["function"]
+        tool_name = function_data["name"]
+        tool_description = function_data["description"]
+
+        if "parameters" in function_data:
+            # Create field definitions from the JSON schema properties
+            properties = function_data["parameters"].get("properties", {})
+            field_defs = {
+                prop_name: (_json_type_to_python(prop_data.get("type")), Field(..., description=prop_data.get("description", "")))
+                for prop_name, prop_data in properties.items()
+            }
+            return create_model(tool_name, __doc__=tool_description, **field_defs)
+
+        # No parameters, create a simple model
+        return create_model(
+            tool_name,
+            __doc__=tool_description,
+            input=(str, Field(..., description="Input to the tool"))
+        )
+
+    # For WebSearchTool and similar tools, we want to use a different schema
+    if hasattr(tool, "name") and "search" in tool.name.lower():
+        # Create a special model for search tools that accepts a query parameter
+        return create_model(
+            tool.name,  # Use the tool name as the class name
+            __doc__=tool.description if hasattr(tool, "description") else f"Search using {tool.name}",
+            query=(str, Field(..., description="The search query to look up"))
+        )
+
+    # Default model for other tools
+    tool_name = tool.name if hasattr(tool, "name") else "Tool"
+    tool_description = tool.description if hasattr(tool, "description") else "A tool to perform a task"
+    return create_model(
+        tool_name,  # Use the tool name as the class name
+        __doc__=tool_description,
+        input=(str, Field(..., description="Input to the tool")),  # Add an input field
+    )
+
+
+@dataclass(frozen=True)
+class ToolSchema:
+    """Schemas for one tool, built once and shared across requests and providers.
+
+    Attributes:
+        model: Pydantic model of the tool's arguments
+        openai_tool: OpenAI-format tool definition ({"type": "function", ...}),
+            which every provider's bind_tools accepts without re-conversion
+    """
+    model: Type[BaseModel]
+    openai_tool: Dict[str, Any]
+
+
+_tool_schema_cache: Dict[Tuple, ToolSchema] = {}
+_tool_schema_lock = threading.Lock()
+
+
+def _tool_cache_key(tool: Any) -> Tuple:
+    if isinstance(tool, dict) and "function" in tool:
+        # Only the declaration matters; dict tools may also carry a coroutine
+        return ("function", json.dumps(tool["function"], sort_keys=True, default=str))
+    return (
+        "tool",
+        f"{type(tool).__module__}.{type(tool).__qualname__}",
+        getattr(tool, "name", None),
+        getattr(tool, "description", None),
+    )
+
+
+def get_tool_schema(tool: Any) -> ToolSchema:
+    """Return the memoized schemas for a BaseTool instance or dict tool.
+
+    Args:
+        tool: A BaseTool instance or a {"function": {...}} dict tool
+
+    Returns:
+        The tool's ToolSchema
+    """
+    key = _tool_cache_key(tool)
+    schema = _tool_schema_cache.get(key)
+    if schema is not None:
+        return schema
+
+    with _tool_schema_lock:
+        schema = _tool_schema_cache.get(key)
+        if schema is None:
+            tool_model = _build_tool_model(tool)
+            if isinstance(tool, dict) and "function" in tool:
+                # Keep the caller's declaration verbatim (e.g. enums, defaults)
+                openai_tool = {"type": "function", "function": tool["function"]}
+            else:
+                openai_tool = convert_to_openai_tool(tool_model)
+            schema = ToolSchema(model=tool_model, openai_tool=openai_tool)
+            _tool_schema_cache[key] = schema
+            logger.info(f"Built tool schema for {openai_tool['function']['name']}")
+    return schema
+
+
 def convert_tools_to_pydantic(tools: List[Any]) -> List[Type[BaseModel]]:
     """
     Convert BaseTool instances to Pydantic models for use with bind_tools.
 
+    Models are memoized per tool (see get_tool_schema), so repeated calls
+    return the same classes instead of re-running create_model.
+
     Args:
         tools: List of BaseTool instances
 
     Returns:
         List of Pydantic model classes that can be used with bind_tools
     """
-    pydantic_tools = []
-
-    for tool in tools:
-        logger.info(f"Converting tool to pydantic: {tool}")
-
-        # Check if the tool is a dictionary with a function key
-        if isinstance(tool, dict) and "function" in tool:
-            logger.info(f"Tool is a dictionary with function key")
-
-            # Extract function details
-            function_data = tool["function"]
-            tool_name = function_data["name"]
-            tool_description = function_data["description"]
-
-            if "parameters" in function_data:
-                logger.info(f"Tool has parameters schema: {function_data['parameters']}")
-
-                # Get properties from parameters
-                properties = function_data["parameters"].get("properties", {})
-
-                # Create field definitions for the model
-                field_defs = {}
-                for prop_name, prop_data in properties.items():
-                    # Get the Python type based on the JSON schema type
-                    if prop_data.get("type") == "string":
-                        field_type = str
-                    elif prop_data.get("type") == "integer":
-                        field_type = int
-                    elif prop_data.get("type") == "number":
-                        field_type = float
-                    elif prop_data.get("type") == "boolean":
-                        field_type = bool
-                    elif prop_data.get("type") == "array":
-                        field_type = list
-                    elif prop_data.get("type") == "object":
-                        field_type = dict
-                    else:
-                        field_type = str  # Default to string
-
-                    # Create the field
-                    field_defs[prop_name] = (field_type, Field(..., description=prop_data.get("description", "")))
-
-                # Create the model
-                logger.info(f"Creating model with fields: {field_defs}")
-                tool_model = create_model(
-                    tool_name,
-                    __doc__=tool_description,
-                    **field_defs
-                )
-                logger.info(f"Created model from schema: {tool_model}")
-            else:
-                # No parameters, create a simple model
-                logger.info(f"Tool has no parameters schema, creating simple model")
-                tool_model = create_model(
-                    tool_name,
-                    __doc__=tool_description,
-                    input=(str, Field(..., description="Input to the tool"))
-                )
-                logger.info(f"Created simple model: {tool_model}")
-        # For WebSearchTool and similar tools, we want to use a different schema
-        elif hasattr(tool, "name") and "search" in tool.name.lower():
-            # Create a special model for search tools that accepts a query parameter
-            tool_model = create_model(
-                tool.name,  # Use the tool name as the class name
-                __doc__=tool.description if hasattr(tool, "description") else f"Search using {tool.name}",
-                query=(str, Field(..., description="The search query to look up"))
-            )
-            logger.info(f"Created search tool model: {tool_model}")
-        else:
-            # Default model for other tools
-            tool_name = tool.name if hasattr(tool, "name") else "Tool"
-            tool_description = tool.description if hasattr(tool, "description") else "A tool to perform a task"
-
-            tool_model = create_model(
-                tool_name,  # Use the tool name as the class name
-                __doc__=tool_description,
-                input=(str, Field(..., description="Input to the tool")),  # Add an input field
-            )
-            logger.info(f"Created default tool model: {tool_model}")
-
-        pydantic_tools.append(tool_model)
-        logger.info(f"Added tool model to pydantic_tools: {tool_model}")
-
-    logger.info(f"Returning {len(pydantic_tools)} pydantic tools")
-    return pydantic_tools
+    return [get_tool_schema(tool).model for tool in tools]
 
 
 def is_temperature_compatible(model_name: str) -> bool:
@@ -0,0 +1,46 @@
+"""
+Lightweight in-process counters.
+
+Counters live for the lifetime of the process and are exposed on the health
+endpoints for quick operational checks. Labels are folded into the counter
+name, e.g. ``postchain_runs_cancelled{phase=intention}``. Gauges (current
+values such as queue depths) share the same namespace.
+"""
+
+import threading
+from collections import Counter
+from typing import Dict
+
+_counters: Counter = Counter()
+_lock = threading.Lock()
+
+
+def _key(name: str, labels: Dict[str, str]) -> str:
+    if not labels:
+        return name
+    label_str = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+    return f"{name}{{{label_str}}}"
+
+
+def increment(name: str, value: int = 1, **labels: str) -> None:
+    """Add value to the counter identified by name and labels."""
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def set_gauge(name: str, value: int, **labels: str) -> None:
+    """Record the current value of a gauge identified by name and labels."""
+    with _lock:
+        _counters[_key(name, labels)] = value
+
+
+def snapshot() -> Dict[str, int]:
+    """Return a copy of all counters."""
+    with _lock:
+        return dict(_counters)
+
+
+def reset() -> None:
+    """Clear all counters (used by tests)."""
+    with _lock:
+        _counters.clear()
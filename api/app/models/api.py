@@ -13,6 +13,18 @@ class APIResponse(BaseModel):
 class VectorSearchRequest(BaseModel):
     query_vector: List[float]
     limit: Optional[int] = 10
+    score_threshold: Optional[float] = None
+    # Payload fields to return; None returns the default result fields
+    fields: Optional[List[str]] = None
+    # Payload conditions ANDed together: {field: value} or {field: [any of values]}
+    filter: Optional[Dict[str, Any]] = None
+    # Text behind query_vector; enables hybrid dense + keyword retrieval (single searches only)
+    query_text: Optional[str] = None
+    # MMR re-ranking for diverse results: 1.0 = relevance only, lower = more diverse (single searches only)
+    mmr_lambda: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+
+class VectorBatchSearchRequest(BaseModel):
+    queries: List[VectorSearchRequest]
 
 class VectorStoreRequest(BaseModel):
     content: str
@@ -46,7 +58,6 @@ class UserResponse(BaseModel):
     id: str
     public_key: str
     created_at: datetime
-    thread_ids: List[str]
 
 # Move MessageContext definition before it's used
 class MessageContext(BaseModel):
@@ -19,16 +19,17 @@ import asyncio
 import hashlib
 import json
 import logging
-from typing import List, Dict, Any, AsyncIterator, Optional
+from contextlib import aclosing
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Tuple
 
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage, ToolMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda
-from langchain_openai import OpenAIEmbeddings
 
 # Local imports
+from app.database import PREVIEW_FIELD
 from app.config import Config # Although config object isn't passed directly, defaults might still be used
-from app.postchain.postchain_llm import post_llm
+from app.postchain.postchain_llm import post_llm, collect_streaming_response
 from app.langchain_utils import ModelConfig
 # Import updated schemas
 from app.postchain.schemas.state import (
@@ -40,8 +41,10 @@ from app.postchain.schemas.state import (
     VectorSearchResult
 )
 from app.postchain.schemas.rewards import NoveltyRewardInfo, CitationRewardInfo
-from app.services.rewards_service import RewardsService
-from app.postchain.utils import format_stream_event
+from app.postchain.utils import format_stream_event, POSTCHAIN_PHASES
+from app.postchain.scheduler import PhaseGraph, PhaseSpec, PhaseOutcome, format_timings
+from app import metrics
+from app.resilience import DependencyUnavailable
 # Import updated prompts
 from app.postchain.prompts.prompts import (
     action_instruction,
@@ -57,7 +60,7 @@ from app.postchain.prompts.prompts import (
 from app.tools.brave_search import BraveSearchTool # Specific tool for web search phase
 from app.tools.qdrant import qdrant_search # Specific tool for vector search phase
 
-from app.database import DatabaseClient # Add import for DB client
+from app.services.container import get_services # Process-wide DB client and rewards service
 
 # Configure logging
 logger = logging.getLogger("postchain_langchain")
@@ -67,6 +70,8 @@ MAX_RETRIEVED_CONTENT_LENGTH = 2000  # Maximum length for retrieved content from
 MAX_INPUT_LENGTH_FOR_EMBEDDING = 25000  # Maximum length for direct embedding (avoid excessive tokens)
 PROMPT_TRUNCATION_LENGTH = 500  # How much of a long prompt to include when storing with Action response
 SIMILARITY_EPSILON = 1e-6  # Small tolerance for floating point comparison
+VECTOR_SEARCH_FIELDS = ("content", PREVIEW_FIELD, "metadata")  # Payload fields fetched per vector hit
+HYBRID_SEARCH_LIMIT = 10  # Hybrid (dense + keyword) top-k is precise enough to retrieve fewer chunks
 # Limit vector search results to reduce payload size
 MAX_VECTOR_RESULTS = 10  # Maximum number of vector results to return to client
 
@@ -75,9 +80,6 @@ You are representing Choir's PostChain, in which many different AI models collab
 You will see <phase_instructions> embedded in user messages, which contain the instructions for the current phase. Follow these instructions carefully.
 """
 
-# --- In-memory state store (replace with persistent store later) ---
-conversation_history_store: Dict[str, List[BaseMessage]] = {}
-
 
 # --- Helper Functions ---
 
@@ -178,9 +180,10 @@ def sanitize_messages_for_openai(messages: List[BaseMessage]) -> List[BaseMessag
 
 async def run_action_phase(
     messages: List[BaseMessage],
-    model_config: ModelConfig
+    model_config: ModelConfig,
+    on_delta: Optional[Callable[[str], None]] = None
 ) -> Dict[str, Any]:
-    """Runs the Action phase using LCEL."""
+    """Runs the Action phase using LCEL. Token deltas are forwarded to on_delta when given."""
     logger.info(f"Running Action phase with model: {model_config.provider}/{model_config.model_name}")
 
     # Prepare prompt
@@ -208,10 +211,13 @@ async def run_action_phase(
             prepared_messages = sanitize_messages_for_openai(action_messages)
             logger.info("Using sanitized messages for OpenAI model")
 
-        response = await post_llm(
-            model_config=model_config,
-            messages=prepared_messages
-        )
+        if on_delta:
+            response = await collect_streaming_response(prepared_messages, model_config, on_delta)
+        else:
+            response = await post_llm(
+                model_config=model_config,
+                messages=prepared_messages
+            )
 
         if isinstance(response, AIMessage):
             logger.info(f"Action phase completed. Response: {response.content[:100]}...")
@@ -235,7 +241,8 @@ async def run_experience_vectors_phase(
     model_config: ModelConfig,
     thread_id: str,
     user_id: Optional[str] = None,
-    wallet_address: Optional[str] = None
+    wallet_address: Optional[str] = None,
+    on_delta: Optional[Callable[[str], None]] = None
 ) -> ExperienceVectorsPhaseOutput:
     """Runs the Experience Vectors phase: Embeds query, searches Qdrant, calls LLM with results.
 
@@ -252,14 +259,17 @@ async def run_experience_vectors_phase(
     2. Duplicate Prevention:
        - Calculates similarity between the current embedding and existing vectors
        - Skips saving if an exact match (similarity ≈ 1.0) is found
-       - Uses prompt hash in metadata for potential future optimizations
+       - A prompt whose hash is already stored reuses that vector: no embedding
+         call, no save, and novelty is scored as an exact duplicate
+
+    When on_delta is given, the synthesis call streams and forwards each token delta.
     """
     logger.info(f"Running Experience Vectors phase (manual search) with model: {model_config.provider}/{model_config.model_name}")
     logger.info(f"WWWALLET ADDRESS: {wallet_address}")
 
     # Get necessary components
     app_config = Config() # Get app config for embedding model name etc.
-    db_client = DatabaseClient(app_config) # Instantiate DB client
+    db_client = get_services().db # Shared DB client (built once per process)
 
     # Find last user message for query content
     last_user_msg = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
@@ -285,35 +295,52 @@ async def run_experience_vectors_phase(
         normalized_prompt = query_text.strip()  # Basic normalization
         prompt_hash = hashlib.sha256(normalized_prompt.encode('utf-8')).hexdigest()
 
-        embeddings = OpenAIEmbeddings(model=app_config.EMBEDDING_MODEL, api_key=app_config.OPENAI_API_KEY)
-
-        if len(query_text) <= MAX_INPUT_LENGTH_FOR_EMBEDDING:
-            logger.info(f"Prompt is short ({len(query_text)} chars). Embedding user prompt.")
-            query_vector = await embeddings.aembed_query(query_text)
-            # content_to_store remains query_text
-            # embedded_content_type remains "user_prompt"
-        else:
-            logger.info(f"Prompt is long ({len(query_text)} chars). Embedding Action response instead.")
-            # Extract Action response content (assuming it's the last AI message in history)
-            action_response_content = "Error: Action response not found."  # Default error message
-            last_ai_msg = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
-            if last_ai_msg and hasattr(last_ai_msg, 'content'):
-                action_response_content = last_ai_msg.content
-                logger.info("Found Action response content to embed.")
+        embeddings = get_services().embeddings # Cached, shared embeddings client
+        exact_match = None
+        search_text = query_text  # Text behind query_vector
+
+        # Set when embeddings or Qdrant are shedding load; the phase then answers without retrieval
+        unavailable: Optional[DependencyUnavailable] = None
+        try:
+            if len(query_text) <= MAX_INPUT_LENGTH_FOR_EMBEDDING:
+                # Fast path: an identical prompt (e.g. a client retry) already has a stored vector
+                exact_match = await db_client.find_message_by_prompt_hash(prompt_hash)
+                if exact_match:
+                    logger.info(f"Prompt hash matches stored vector {exact_match['id']}; skipping embedding.")
+                    metrics.increment("experience_prompt_hash_hits")
+                    query_vector = exact_match["vector"]
+                else:
+                    logger.info(f"Prompt is short ({len(query_text)} chars). Embedding user prompt.")
+                    query_vector = await embeddings.embed_query(query_text)
+                # content_to_store remains query_text
+                # embedded_content_type remains "user_prompt"
             else:
-                logger.error("Could not find Action response in message history to embed for long prompt.")
-                # Decide handling: Proceed with error content? Skip embedding/saving? Let's proceed for now.
-
-            # Embed the Action response
-            query_vector = await embeddings.aembed_query(action_response_content)
-            embedded_content_type = "action_response"
-
-            # Prepare content to store: truncated prompt + action response
-            truncated_prompt = query_text[:PROMPT_TRUNCATION_LENGTH] + "..."
-            content_to_store = f"--- User Prompt (Truncated) ---\n{truncated_prompt}\n\n--- Action Response ---\n{action_response_content}"
+                logger.info(f"Prompt is long ({len(query_text)} chars). Embedding Action response instead.")
+                # Extract Action response content (assuming it's the last AI message in history)
+                action_response_content = "Error: Action response not found."  # Default error message
+                last_ai_msg = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
+                if last_ai_msg and hasattr(last_ai_msg, 'content'):
+                    action_response_content = last_ai_msg.content
+                    logger.info("Found Action response content to embed.")
+                else:
+                    logger.error("Could not find Action response in message history to embed for long prompt.")
+                    # Decide handling: Proceed with error content? Skip embedding/saving? Let's proceed for now.
+
+                # Embed the Action response
+                query_vector = await embeddings.embed_query(action_response_content)
+                search_text = action_response_content
+                embedded_content_type = "action_response"
+
+                # Prepare content to store: truncated prompt + action response
+                truncated_prompt = query_text[:PROMPT_TRUNCATION_LENGTH] + "..."
+                content_to_store = f"--- User Prompt (Truncated) ---\n{truncated_prompt}\n\n--- Action Response ---\n{action_response_content}"
+        except DependencyUnavailable as e:
+            logger.warning(f"Experience Vectors continuing without retrieval: {e}")
+            unavailable = e
+            query_vector = None
 
         # Ensure query_vector is not None before proceeding
-        if query_vector is None:
+        if query_vector is None and unavailable is None:
             logger.error("Failed to generate query vector. Skipping search and save.")
             return ExperienceVectorsPhaseOutput(
                 experience_vectors_response=AIMessage(content="Error: Could not process query embedding."),
@@ -323,13 +350,26 @@ async def run_experience_vectors_phase(
         # --- 2. Search Qdrant --- #
         logger.info(f"Searching Qdrant collection '{app_config.MESSAGES_COLLECTION}' with embedded query.")
         # Use a smaller limit for search to reduce processing overhead
-        search_limit = min(20, app_config.SEARCH_LIMIT)  # Reduce the search limit from default (80)
-        qdrant_raw_results = await db_client.search_vectors(query_vector, limit=search_limit)
-        logger.info(f"Qdrant returned {len(qdrant_raw_results)} results from limit {search_limit}.")
+        search_limit = min(HYBRID_SEARCH_LIMIT if db_client.hybrid else 20, app_config.SEARCH_LIMIT)
+        qdrant_raw_results = []
+        if unavailable is None:
+            try:
+                qdrant_raw_results = await db_client.search_vectors(
+                    query_vector,
+                    limit=search_limit,
+                    fields=VECTOR_SEARCH_FIELDS, # Only the fields rendered below
+                    query_text=search_text, # Keyword side of hybrid retrieval
+                    mmr_lambda=app_config.MMR_LAMBDA # Opt-in: drop near-duplicates before they reach the prompt
+                )
+                logger.info(f"Qdrant returned {len(qdrant_raw_results)} results from limit {search_limit}.")
+            except DependencyUnavailable as e:
+                logger.warning(f"Experience Vectors continuing without retrieval: {e}")
+                unavailable = e
 
         # --- 3. Check for Exact Duplicates --- #
-        max_similarity = 0.0
-        if qdrant_raw_results:
+        # Without search results novelty is unknown, so nothing is saved or rewarded
+        max_similarity = None if unavailable else (1.0 if exact_match else 0.0)
+        if qdrant_raw_results and not exact_match:
             # Ensure similarity scores are treated as floats
             scores = [float(res.get("similarity", 0.0)) for res in qdrant_raw_results]
             if scores:
@@ -337,9 +377,11 @@ async def run_experience_vectors_phase(
                 logger.info(f"Maximum similarity score: {max_similarity:.6f}")
 
         # Skip saving if we find an exact duplicate
-        should_save_query = (max_similarity < (1.0 - SIMILARITY_EPSILON))
+        should_save_query = max_similarity is not None and max_similarity < (1.0 - SIMILARITY_EPSILON)
 
-        if not should_save_query:
+        if max_similarity is None:
+            logger.info("Vector search unavailable. Skipping save for this vector.")
+        elif not should_save_query:
             logger.info(f"Max similarity ({max_similarity:.6f}) is effectively 1.0. Skipping save for this vector.")
         else:
             # --- Save Query Vector --- #
@@ -353,12 +395,13 @@ async def run_experience_vectors_phase(
                 "wallet_address": wallet_address,
             }
 
+            # Write-behind: returns immediately, the upsert is batched in the background
             save_result = await db_client.store_vector(
                 content=content_to_store,
                 vector=query_vector,
                 metadata=metadata
             )
-            logger.info(f"Saved vector (type: {embedded_content_type}) with ID: {save_result.get('id')} and wallet_address: {metadata.get('wallet_address')}")
+            logger.info(f"Queued vector (type: {embedded_content_type}) with ID: {save_result.get('id')} and wallet_address: {metadata.get('wallet_address')}")
 
         # --- 4. Format Qdrant Results --- #
         seen_content = set()
@@ -366,10 +409,8 @@ async def run_experience_vectors_phase(
             content = res_dict.get("content")
             if content is not None and content not in seen_content:
                  try:
-                     # Create a preview version for shorter payload
-                     content_preview = content
-                     if len(content) > 100:
-                         content_preview = content[:100] + "..."
+                     # Preview is stored alongside the content at write time
+                     content_preview = res_dict.get(PREVIEW_FIELD) or content
 
                      # For very long content, also create a shorter version for the main content field
                      stored_content = content
@@ -396,8 +437,8 @@ async def run_experience_vectors_phase(
         novelty_reward = None
         if wallet_address and max_similarity is not None:
             try:
-                # Initialize rewards service
-                rewards_service = RewardsService()
+                # Use the shared rewards service
+                rewards_service = get_services().rewards_service
 
                 # Issue novelty reward
                 reward_result = await rewards_service.issue_novelty_reward(wallet_address, max_similarity)
@@ -457,6 +498,8 @@ async def run_experience_vectors_phase(
 ```
 
 """
+        elif unavailable:
+            search_context += "Internal document search is temporarily unavailable; answer from the conversation alone.\n"
         else:
             search_context += "No relevant information found in internal documents.\n"
 
@@ -503,11 +546,14 @@ Your task: Synthesize the information above and the conversation history to resp
             prepared_messages = sanitize_messages_for_openai(phase_messages)
             logger.info("Using sanitized messages for OpenAI model in Experience Vectors phase")
 
-        llm_response = await post_llm(
-            model_config=model_config,
-            messages=prepared_messages,
-            tools=None # Explicitly disable tools for this call
-        )
+        if on_delta:
+            llm_response = await collect_streaming_response(prepared_messages, model_config, on_delta)
+        else:
+            llm_response = await post_llm(
+                model_config=model_config,
+                messages=prepared_messages,
+                tools=None # Explicitly disable tools for this call
+            )
 
         if not isinstance(llm_response, AIMessage):
             raise ValueError(f"Unexpected response type from synthesis LLM: {type(llm_response)}. Content: {llm_response}")
@@ -740,9 +786,10 @@ using the inline link + blockquote format as instructed, and then synthesize the
 
 async def run_intention_phase(
     messages: List[BaseMessage],
-    model_config: ModelConfig
+    model_config: ModelConfig,
+    on_delta: Optional[Callable[[str], None]] = None
 ) -> Dict[str, Any]:
-    """Runs the Intention phase using LCEL."""
+    """Runs the Intention phase using LCEL. Token deltas are forwarded to on_delta when given."""
     logger.info(f"Running Intention phase with model: {model_config.provider}/{model_config.model_name}")
     intention_query = f"<intention_instruction>{intention_instruction(model_config)}</intention_instruction>"
     intention_messages = [SystemMessage(content=COMMON_SYSTEM_PROMPT)] + messages + [HumanMessage(content=intention_query)]
@@ -761,6 +808,8 @@ async def run_intention_phase(
         elif model_config.provider.lower() == "openai" or model_config.provider.lower() == "openrouter":
             prepared_msgs = sanitize_messages_for_openai(msgs)
             logger.info("Using sanitized messages for OpenAI model in Intention phase")
+        if on_delta:
+            return await collect_streaming_response(prepared_msgs, model_config, on_delta)
         return await post_llm(model_config=model_config, messages=prepared_msgs)
     intention_chain = RunnableLambda(_get_intention_response)
 
@@ -779,9 +828,10 @@ async def run_intention_phase(
 
 async def run_observation_phase(
     messages: List[BaseMessage],
-    model_config: ModelConfig
+    model_config: ModelConfig,
+    on_delta: Optional[Callable[[str], None]] = None
 ) -> Dict[str, Any]:
-    """Runs the Observation phase using LCEL."""
+    """Runs the Observation phase using LCEL. Token deltas are forwarded to on_delta when given."""
     logger.info(f"Running Observation phase with model: {model_config.provider}/{model_config.model_name}")
     observation_query = f"<observation_instruction>{observation_instruction(model_config)}</observation_instruction>"
     observation_messages = [SystemMessage(content=COMMON_SYSTEM_PROMPT)] + messages + [HumanMessage(content=observation_query)]
@@ -800,6 +850,8 @@ async def run_observation_phase(
         elif model_config.provider.lower() == "openai" or model_config.provider.lower() == "openrouter":
             prepared_msgs = sanitize_messages_for_openai(msgs)
             logger.info("Using sanitized messages for OpenAI model in Observation phase")
+        if on_delta:
+            return await collect_streaming_response(prepared_msgs, model_config, on_delta)
         return await post_llm(model_config=model_config, messages=prepared_msgs)
     observation_chain = RunnableLambda(observation_wrapper)
 
@@ -818,9 +870,10 @@ async def run_observation_phase(
 
 async def run_understanding_phase(
     messages: List[BaseMessage],
-    model_config: ModelConfig
+    model_config: ModelConfig,
+    on_delta: Optional[Callable[[str], None]] = None
 ) -> Dict[str, Any]:
-    """Runs the Understanding phase using LCEL."""
+    """Runs the Understanding phase using LCEL. Token deltas are forwarded to on_delta when given."""
     logger.info(f"Running Understanding phase with model: {model_config.provider}/{model_config.model_name}")
     understanding_query = f"<understanding_instruction>{understanding_instruction(model_config)}</understanding_instruction>"
     understanding_messages = [SystemMessage(content=COMMON_SYSTEM_PROMPT)] + messages + [HumanMessage(content=understanding_query)]
@@ -839,6 +892,8 @@ async def run_understanding_phase(
         elif model_config.provider.lower() == "openai" or model_config.provider.lower() == "openrouter":
             prepared_msgs = sanitize_messages_for_openai(msgs)
             logger.info("Using sanitized messages for OpenAI model in Understanding phase")
+        if on_delta:
+            return await collect_streaming_response(prepared_msgs, model_config, on_delta)
         return await post_llm(model_config=model_config, messages=prepared_msgs)
     understanding_chain = RunnableLambda(understanding_wrapper)
 
@@ -867,9 +922,6 @@ async def run_yield_phase(
     # Import YieldPhaseResponse here to avoid circular imports
     from app.postchain.schemas.state import YieldPhaseResponse
 
-    # Import the rewards service directly
-    from app.services.rewards_service import RewardsService
-
     # Log the model being used for the yield phase
     logger.info(f"Using model {model_config.provider}/{model_config.model_name} for yield phase")
 
@@ -937,7 +989,7 @@ async def run_yield_phase(
 
             # If no citations found with <vid> tags, try the old #number format
             if not citations:
-                rewards_service = RewardsService()
+                rewards_service = get_services().rewards_service
                 citations = rewards_service.extract_citations(response.content)
                 logger.info(f"Extracted {len(citations)} citations using extract_citations: {citations}")
 
@@ -984,8 +1036,8 @@ async def run_yield_phase(
 
             if wallet_address and wallet_address.lower() != "unknown":
                 try:
-                    # Create the rewards service
-                    rewards_service = RewardsService()
+                    # Use the shared rewards service
+                    rewards_service = get_services().rewards_service
 
                     # Call the service directly
                     logger.info(f"Calling issue_citation_rewards with wallet_address={wallet_address}, citation_ids={citations}")
@@ -1063,6 +1115,186 @@ async def run_yield_phase(
         )
 
 
+# --- Phase Dependency Graph ---
+
+# Canonical phase order. Stream events are always emitted in this order.
+PHASE_ORDER = POSTCHAIN_PHASES
+
+# Phases whose output each phase needs. Experience Vectors and Experience Web
+# only depend on the Action output, so the scheduler runs them concurrently.
+PHASE_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "action": (),
+    "experience_vectors": ("action",),
+    "experience_web": ("action",),
+    "intention": ("experience_vectors", "experience_web"),
+    "observation": ("intention",),
+    "understanding": ("observation",),
+    "yield": ("understanding",),
+}
+
+
+# Phases whose final LLM call is a plain completion and can stream token deltas.
+# Experience Web (tool calls) and Yield (structured output) always arrive whole.
+STREAMABLE_PHASES = {"action", "experience_vectors", "intention", "observation", "understanding"}
+
+
+async def _drain_deltas(queue: "asyncio.Queue[str]", task: "asyncio.Task") -> AsyncIterator[str]:
+    """Yield token deltas from queue until the phase task finishes and the queue is empty."""
+    while not task.done():
+        next_delta = asyncio.ensure_future(queue.get())
+        done, _ = await asyncio.wait({next_delta, task}, return_when=asyncio.FIRST_COMPLETED)
+        if next_delta in done:
+            yield next_delta.result()
+        else:
+            next_delta.cancel()
+    while not queue.empty():
+        yield queue.get_nowait()
+
+
+def _phase_response(phase: str, result: Any) -> Optional[AIMessage]:
+    """Return the AIMessage a phase contributes to the conversation."""
+    if isinstance(result, dict):
+        return result.get(f"{phase}_response")
+    return getattr(result, f"{phase}_response", None)
+
+
+def _phase_error_message(result: Any) -> Optional[str]:
+    """Return the error reported by a phase result, if any."""
+    if isinstance(result, dict):
+        return result.get("error")
+    return getattr(result, "error", None)
+
+
+def _phase_failed(result: Any) -> bool:
+    return bool(_phase_error_message(result))
+
+
+async def _load_restorable_phases(thread_id: str, turn: int, query: str, resume: bool) -> Dict[str, Dict[str, Any]]:
+    """Return checkpointed phases of this turn that can be replayed instead of rerun.
+
+    A fresh (non-resume) run supersedes any abandoned checkpoint of the thread.
+    """
+    store = get_services().thread_store
+    try:
+        checkpoint = await store.load_checkpoint(thread_id) if resume else None
+        if checkpoint and checkpoint.turn == turn and checkpoint.query == query:
+            logger.info(f"Resuming thread {thread_id} turn {turn} with checkpointed phases: {list(checkpoint.phases)}")
+            return checkpoint.phases
+        if checkpoint:
+            logger.info(f"Ignoring stale checkpoint for thread {thread_id} (turn {checkpoint.turn}, current turn {turn})")
+        await store.clear_checkpoint(thread_id)
+    except Exception as e:
+        logger.error(f"Failed to load checkpoint for thread {thread_id}: {e}", exc_info=True)
+    return {}
+
+
+async def _checkpoint_phase(thread_id: str, turn: int, query: str, phase: str, event: Dict[str, Any], response: AIMessage) -> None:
+    """Checkpoint a completed phase so a resumed run can replay it."""
+    try:
+        await get_services().thread_store.save_phase_checkpoint(
+            thread_id, turn, query, phase, {"event": event, "content": response.content}
+        )
+    except Exception as e:
+        logger.error(f"Failed to checkpoint {phase} phase for thread {thread_id}: {e}", exc_info=True)
+
+
+async def _complete_turn(thread_id: str, query: str, yield_response: AIMessage) -> None:
+    """Append the user's query and the final Yield response to the thread's history."""
+    store = get_services().thread_store
+    try:
+        await store.append_messages(thread_id, [
+            HumanMessage(content=query),
+            AIMessage(content=yield_response.content, additional_kwargs={"phase": "yield"})
+        ])
+        await store.clear_checkpoint(thread_id)
+    except Exception as e:
+        logger.error(f"Failed to persist turn for thread {thread_id}: {e}", exc_info=True)
+
+
+def _model_name(model_config: ModelConfig) -> str:
+    # Ensure model_name is not empty
+    return model_config.model_name if model_config.model_name else "unknown"
+
+
+def _phase_event(phase: str, status: str, model_config: ModelConfig, content: Optional[str] = None, **extra: Any) -> Dict[str, Any]:
+    """Build a stream event with the common phase/status/model fields."""
+    event: Dict[str, Any] = {"phase": phase, "status": status}
+    if content is not None:
+        event["content"] = content
+    event["provider"] = model_config.provider
+    event["model_name"] = _model_name(model_config)
+    event.update(extra)
+    return event
+
+
+def _compact_vector_results(vector_results: List[VectorSearchResult]) -> List[Dict[str, Any]]:
+    """Compact vector results for the client payload."""
+    compact_results = []
+    for res in vector_results:
+        compact_results.append({
+            "score": round(res.score, 3),
+            "id": getattr(res, "id", None),
+            # Include first 3 paragraphs or up to 500 chars of content
+            "content": "\n\n".join(res.content.split("\n\n")[:3])[:500] if res.content else res.content,
+            # Always include preview
+            "content_preview": res.content_preview if hasattr(res, "content_preview") and res.content_preview else (res.content[:100] + "..." if len(res.content) > 100 else res.content)
+        })
+    return compact_results
+
+
+def _phase_error_event(phase: str, outcome: PhaseOutcome, model_config: ModelConfig) -> Dict[str, Any]:
+    """Build the error event for a failed phase, including any partial results."""
+    result = outcome.result
+    extra: Dict[str, Any] = {"duration_ms": round(outcome.duration_s * 1000)}
+    if phase == "experience_vectors" and result is not None:
+        extra["vector_results"] = _compact_vector_results(result.vector_results) # Include compact partial results on error
+    elif phase == "experience_web" and result is not None:
+        extra["web_results"] = [res.dict() for res in result.web_results] # Include partial results on error
+    content = _phase_error_message(result) if result is not None else None
+    return _phase_event(phase, "error", model_config, content=content or outcome.error, **extra)
+
+
+def _phase_complete_event(phase: str, outcome: PhaseOutcome, model_config: ModelConfig) -> Dict[str, Any]:
+    """Build the complete event for a successful phase."""
+    result = outcome.result
+    response = _phase_response(phase, result)
+    event = _phase_event(phase, "complete", model_config, content=response.content)
+
+    if phase == "experience_vectors":
+        logger.info(f"Experience Vectors phase has {len(result.vector_results) if result.vector_results else 0} vector results available")
+        if not result.vector_results:
+            # Add a test vector if none exist to help debug client-side handling
+            logger.warning("No vector results found. Adding a test vector to debug client-side handling.")
+            vector_result_data = [{
+                "score": 0.95,
+                "id": "test-vector-1",  # ID is critical for fetching full content later
+                "content": "This is a test vector content to verify client rendering.",  # Short content for testing
+                "content_preview": "This is a test vector content preview."
+            }]
+        else:
+            # Include ALL vector results that were available to the LLM
+            vector_result_data = _compact_vector_results(result.vector_results)
+        logger.info(f"Sending {len(vector_result_data)} vector results to client for experience_vectors phase")
+        event["vector_results"] = vector_result_data  # Include vector results for client
+        event["max_similarity"] = result.max_similarity  # Include similarity score
+        if result.novelty_reward:
+            event["novelty_reward"] = result.novelty_reward.dict()
+
+    elif phase == "experience_web":
+        event["web_results"] = [res.dict() for res in result.web_results] # Key for results
+
+    elif phase == "yield":
+        if result.citation_reward:
+            event["citation_reward"] = result.citation_reward.dict()
+        if result.citations:
+            event["citations"] = result.citations
+        if hasattr(result, 'citation_explanations') and result.citation_explanations:
+            event["citation_explanations"] = result.citation_explanations
+
+    event["duration_ms"] = round(outcome.duration_s * 1000)
+    return event
+
+
 # --- Main Workflow (Updated) ---
 
 async def run_langchain_postchain_workflow(
@@ -1079,13 +1311,24 @@ async def run_langchain_postchain_workflow(
     intention_mc_override: Optional[ModelConfig] = None,
     observation_mc_override: Optional[ModelConfig] = None,
     understanding_mc_override: Optional[ModelConfig] = None,
-    yield_mc_override: Optional[ModelConfig] = None
+    yield_mc_override: Optional[ModelConfig] = None,
+    # Emit token-level "delta" events before each streamable phase completes
+    stream_tokens: bool = False,
+    # Replay phases checkpointed by an interrupted run of the same turn
+    resume: bool = False
 ) -> AsyncIterator[Dict[str, Any]]:
     """
     Runs the full PostChain workflow using Langchain LCEL with split Experience phases.
     Allows overriding model selection per phase for testing.
     The provided override ModelConfig objects can optionally contain API keys,
     otherwise defaults from the environment will be used.
+
+    With stream_tokens=True, streamable phases also emit {"status": "delta"} events
+    carrying token text; the "complete" event still carries the assembled content.
+
+    Every completed phase is checkpointed under (thread_id, turn). With resume=True
+    and the same query, checkpointed phases are replayed (their stored complete
+    event with "replayed": true) and the run continues from the first incomplete phase.
     """
     logger.info(f"Starting Langchain PostChain workflow for thread {thread_id}")
 
@@ -1109,482 +1352,122 @@ async def run_langchain_postchain_workflow(
         return
 
     # --- State Management ---
-    global conversation_history_store
-    stored_history = conversation_history_store.get(thread_id, [])
-    merged_history = stored_history + message_history
-    current_messages = merged_history + [HumanMessage(content=query)]
-
-    # --- Workflow Sequence ---
-
-    # 1. Action Phase
-    # Ensure model_name is not empty for running status
-    action_model_name = action_model_config.model_name if action_model_config.model_name else "unknown"
-
-    # Create the response object for running status
-    running_obj = {
-        "phase": "action",
-        "status": "running",
-        "provider": action_model_config.provider,
-        "model_name": action_model_name
+    # message_history is the thread's stored history (see app.postchain.thread_store)
+    base_messages = message_history + [HumanMessage(content=query)]
+    # Turns are keyed by how many messages the thread had when they started
+    turn = len(message_history)
+    checkpointed = await _load_restorable_phases(thread_id, turn, query, resume)
+    restored_results = {
+        phase: {f"{phase}_response": AIMessage(content=payload["content"])}
+        for phase, payload in checkpointed.items()
     }
 
-    # Log the running status
-    logger.info(f"🐍 ACTION PHASE: Sending running status with model_name: {action_model_name}")
-
-    yield running_obj
-    action_result = await run_action_phase(current_messages, action_model_config)
-    if "error" in action_result:
-        # Ensure model_name is not empty
-        action_model_name = action_model_config.model_name if action_model_config.model_name else "unknown"
-
-        # Create the response object
-        response_obj = {
-            "phase": "action",
-            "status": "error",
-            "content": action_result["error"],
-            "provider": action_model_config.provider,
-            "model_name": action_model_name
-        }
-
-        # Log the exact JSON that will be sent
-        logger.info(f"🐍 ACTION PHASE ERROR: Sending JSON response: {json.dumps(response_obj)}")
-
-        yield response_obj
-        return
-    action_response: AIMessage = action_result["action_response"]
-    current_messages.append(action_response)
-    conversation_history_store[thread_id] = current_messages
-    # Ensure model_name is not empty
-    action_model_name = action_model_config.model_name if action_model_config.model_name else "unknown"
-
-    # Create the response object
-    response_obj = {
-        "phase": "action",
-        "status": "complete",
-        "content": action_response.content,
-        "provider": action_model_config.provider,
-        "model_name": action_model_name
+    def _messages_for(completed: Dict[str, Any]) -> List[BaseMessage]:
+        """History, the query, and the response of every completed ancestor phase."""
+        return base_messages + [_phase_response(name, completed[name]) for name in PHASE_ORDER if name in completed]
+
+    model_configs = {
+        "action": action_model_config,
+        "experience_vectors": experience_vectors_model_config,
+        "experience_web": experience_web_model_config,
+        "intention": intention_model_config,
+        "observation": observation_model_config,
+        "understanding": understanding_model_config,
+        "yield": yield_model_config,
     }
-
-    # Log the exact JSON that will be sent
-    logger.info(f"🐍 ACTION PHASE: Sending JSON response: {json.dumps(response_obj)}")
-
-    yield response_obj
-
-    # 2. Experience Vectors Phase
-    # Ensure model_name is not empty for running status
-    exp_vectors_model_name = experience_vectors_model_config.model_name if experience_vectors_model_config.model_name else "unknown"
-
-    # Create the response object for running status
-    running_obj = {
-        "phase": "experience_vectors",
-        "status": "running",
-        "provider": experience_vectors_model_config.provider,
-        "model_name": exp_vectors_model_name
+    # One delta queue per streamable phase; None disables streaming for that phase
+    delta_queues: Dict[str, "asyncio.Queue[str]"] = {
+        phase: asyncio.Queue() for phase in STREAMABLE_PHASES
+    } if stream_tokens else {}
+
+    def _on_delta(phase: str) -> Optional[Callable[[str], None]]:
+        queue = delta_queues.get(phase)
+        return queue.put_nowait if queue else None
+
+    phase_runners = {
+        "action": lambda done: run_action_phase(_messages_for(done), action_model_config, on_delta=_on_delta("action")),
+        "experience_vectors": lambda done: run_experience_vectors_phase(
+            messages=_messages_for(done),
+            model_config=experience_vectors_model_config,
+            thread_id=thread_id,
+            user_id=user_id,
+            wallet_address=wallet_address,
+            on_delta=_on_delta("experience_vectors")
+        ),
+        "experience_web": lambda done: run_experience_web_phase(_messages_for(done), experience_web_model_config),
+        "intention": lambda done: run_intention_phase(_messages_for(done), intention_model_config, on_delta=_on_delta("intention")),
+        "observation": lambda done: run_observation_phase(_messages_for(done), observation_model_config, on_delta=_on_delta("observation")),
+        "understanding": lambda done: run_understanding_phase(_messages_for(done), understanding_model_config, on_delta=_on_delta("understanding")),
+        "yield": lambda done: run_yield_phase(
+            messages=_messages_for(done),
+            model_config=yield_model_config,
+            user_id=user_id,
+            wallet_address=wallet_address
+        ),
     }
-
-    # Log the running status
-    logger.info(f"🐍 EXPERIENCE VECTORS PHASE: Sending running status with model_name: {exp_vectors_model_name}")
-
-    yield running_obj
-    exp_vectors_output: ExperienceVectorsPhaseOutput = await run_experience_vectors_phase(
-        messages=current_messages,
-        model_config=experience_vectors_model_config,
-        thread_id=thread_id,
-        user_id=user_id,
-        wallet_address=wallet_address
-    )
-    if exp_vectors_output.error:
-        # Use same format for error case, but include full content
-        vector_result_data = []
-        for res in exp_vectors_output.vector_results:
-            compact_result = {
-                "score": round(res.score, 3),
-                "id": getattr(res, "id", None),
-                # Include first 3 paragraphs or up to 500 chars of content
-                "content": "\n\n".join(res.content.split("\n\n")[:3])[:500] if res.content else res.content,
-                # Always include preview
-                "content_preview": res.content_preview if hasattr(res, "content_preview") and res.content_preview else (res.content[:100] + "..." if len(res.content) > 100 else res.content)
-            }
-            vector_result_data.append(compact_result)
-
-        # Ensure model_name is not empty
-        exp_vectors_model_name = experience_vectors_model_config.model_name if experience_vectors_model_config.model_name else "unknown"
-
-        # Create the response object
-        response_obj = {
-            "phase": "experience_vectors",
-            "status": "error",
-            "content": exp_vectors_output.error,
-            "provider": experience_vectors_model_config.provider,
-            "model_name": exp_vectors_model_name,
-            "vector_results": vector_result_data # Include compact partial results on error
-        }
-
-        # Log the exact JSON that will be sent
-        logger.info(f"🐍 EXPERIENCE VECTORS PHASE ERROR: Sending JSON response with model_name: {exp_vectors_model_name}")
-
-        yield response_obj
-        return
-    current_messages.append(exp_vectors_output.experience_vectors_response)
-    conversation_history_store[thread_id] = current_messages
-    # Generate a compact payload with ALL vector results that were used by the LLM
-    vector_result_data = []
-
-    # Log detailed information about the vector results available
-    logger.info(f"Experience Vectors phase has {len(exp_vectors_output.vector_results) if exp_vectors_output.vector_results else 0} vector results available")
-
-    # Add a test vector if none exist to help debug client-side handling
-    if not exp_vectors_output.vector_results or len(exp_vectors_output.vector_results) == 0:
-        logger.warning("No vector results found. Adding a test vector to debug client-side handling.")
-        test_vector = {
-            "score": 0.95,
-            "id": "test-vector-1",  # ID is critical for fetching full content later
-            "content": "This is a test vector content to verify client rendering.",  # Short content for testing
-            "content_preview": "This is a test vector content preview."
-        }
-        vector_result_data.append(test_vector)
-    else:
-        # Include ALL vector results that were available to the LLM
-        logger.info(f"Including all {len(exp_vectors_output.vector_results)} vector results used by LLM")
-
-        # Create compact results for all vectors
-        for res in exp_vectors_output.vector_results:
-            compact_result = {
-                "score": round(res.score, 3),
-                "id": getattr(res, "id", None),
-                # Include first 3 paragraphs or up to 500 chars of content
-                "content": "\n\n".join(res.content.split("\n\n")[:3])[:500] if res.content else res.content,
-                # Always include preview
-                "content_preview": res.content_preview if hasattr(res, "content_preview") and res.content_preview else (res.content[:100] + "..." if len(res.content) > 100 else res.content)
-            }
-            vector_result_data.append(compact_result)
-
-    # Log what we're sending to the client
-    logger.info(f"Sending {len(vector_result_data)} vector results to client for experience_vectors phase")
-    for i, v in enumerate(vector_result_data):
-        logger.info(f"Vector {i+1}: id={v.get('id', 'None')}, content length={len(v.get('content', ''))}")
-
-    # Create the event payload
-    # Ensure model_name is not empty
-    exp_vectors_model_name = experience_vectors_model_config.model_name if experience_vectors_model_config.model_name else "unknown"
-
-    # Create the response object
-    response_obj = {
-        "phase": "experience_vectors",
-        "status": "complete",
-        "content": exp_vectors_output.experience_vectors_response.content,
-        "provider": experience_vectors_model_config.provider,
-        "model_name": exp_vectors_model_name,
-        "vector_results": vector_result_data,  # Include vector results for client
-        "max_similarity": exp_vectors_output.max_similarity  # Include similarity score
-    }
-
-    # Add novelty reward information if available
-    if exp_vectors_output.novelty_reward:
-        response_obj["novelty_reward"] = exp_vectors_output.novelty_reward.dict()
-
-    # Log the exact JSON that will be sent
-    logger.info(f"🐍 EXPERIENCE VECTORS PHASE: Sending JSON response with model_name: {exp_vectors_model_name}")
-
-    yield response_obj
-    # 3. Experience Web Phase
-    # Ensure model_name is not empty for running status
-    exp_web_model_name = experience_web_model_config.model_name if experience_web_model_config.model_name else "unknown"
-
-    # Create the response object for running status
-    running_obj = {
-        "phase": "experience_web",
-        "status": "running",
-        "provider": experience_web_model_config.provider,
-        "model_name": exp_web_model_name
-    }
-
-    # Log the running status
-    logger.info(f"🐍 EXPERIENCE WEB PHASE: Sending running status with model_name: {exp_web_model_name}")
-
-    yield running_obj
-    exp_web_output: ExperienceWebPhaseOutput = await run_experience_web_phase(current_messages, experience_web_model_config)
-    if exp_web_output.error:
-        # Ensure model_name is not empty
-        exp_web_model_name = experience_web_model_config.model_name if experience_web_model_config.model_name else "unknown"
-
-        # Create the response object
-        response_obj = {
-            "phase": "experience_web",
-            "status": "error",
-            "content": exp_web_output.error,
-            "provider": experience_web_model_config.provider,
-            "model_name": exp_web_model_name,
-            "web_results": [res.dict() for res in exp_web_output.web_results] # Include partial results on error
-        }
-
-        # Log the exact JSON that will be sent
-        logger.info(f"🐍 EXPERIENCE WEB PHASE ERROR: Sending JSON response with model_name: {exp_web_model_name}")
-
-        yield response_obj
-        return
-    current_messages.append(exp_web_output.experience_web_response)
-    conversation_history_store[thread_id] = current_messages
-    # Ensure model_name is not empty
-    exp_web_model_name = experience_web_model_config.model_name if experience_web_model_config.model_name else "unknown"
-
-    # Create the response object
-    response_obj = {
-        "phase": "experience_web",
-        "status": "complete",
-        "content": exp_web_output.experience_web_response.content,
-        "provider": experience_web_model_config.provider,
-        "model_name": exp_web_model_name,
-        "web_results": [res.dict() for res in exp_web_output.web_results] # Key for results
-    }
-
-    # Log the exact JSON that will be sent
-    logger.info(f"🐍 EXPERIENCE WEB PHASE: Sending JSON response with model_name: {exp_web_model_name}")
-
-    yield response_obj
-
-    # 4. Intention Phase
-    # Ensure model_name is not empty for running status
-    intention_model_name = intention_model_config.model_name if intention_model_config.model_name else "unknown"
-
-    # Create the response object for running status
-    running_obj = {
-        "phase": "intention",
-        "status": "running",
-        "provider": intention_model_config.provider,
-        "model_name": intention_model_name
-    }
-
-    # Log the running status
-    logger.info(f"🐍 INTENTION PHASE: Sending running status with model_name: {intention_model_name}")
-
-    yield running_obj
-    intention_result = await run_intention_phase(current_messages, intention_model_config)
-    if "error" in intention_result:
-        # Ensure model_name is not empty
-        intention_model_name = intention_model_config.model_name if intention_model_config.model_name else "unknown"
-
-        # Create the response object
-        response_obj = {
-            "phase": "intention",
-            "status": "error",
-            "content": intention_result["error"],
-            "provider": intention_model_config.provider,
-            "model_name": intention_model_name
-        }
-
-        # Log the exact JSON that will be sent
-        logger.info(f"🐍 INTENTION PHASE ERROR: Sending JSON response with model_name: {intention_model_name}")
-
-        yield response_obj
-        return
-    intention_response: AIMessage = intention_result["intention_response"]
-    current_messages.append(intention_response)
-    conversation_history_store[thread_id] = current_messages
-    # Ensure model_name is not empty
-    intention_model_name = intention_model_config.model_name if intention_model_config.model_name else "unknown"
-
-    # Create the response object
-    response_obj = {
-        "phase": "intention",
-        "status": "complete",
-        "content": intention_response.content,
-        "provider": intention_model_config.provider,
-        "model_name": intention_model_name
-    }
-
-    # Log the exact JSON that will be sent
-    logger.info(f"🐍 INTENTION PHASE: Sending JSON response with model_name: {intention_model_name}")
-
-    yield response_obj
-
-    # 5. Observation Phase
-    # Ensure model_name is not empty for running status
-    observation_model_name = observation_model_config.model_name if observation_model_config.model_name else "unknown"
-
-    # Create the response object for running status
-    running_obj = {
-        "phase": "observation",
-        "status": "running",
-        "provider": observation_model_config.provider,
-        "model_name": observation_model_name
-    }
-
-    # Log the running status
-    logger.info(f"🐍 OBSERVATION PHASE: Sending running status with model_name: {observation_model_name}")
-
-    yield running_obj
-    observation_result = await run_observation_phase(current_messages, observation_model_config)
-    if "error" in observation_result:
-        # Ensure model_name is not empty
-        observation_model_name = observation_model_config.model_name if observation_model_config.model_name else "unknown"
-
-        # Create the response object
-        response_obj = {
-            "phase": "observation",
-            "status": "error",
-            "content": observation_result["error"],
-            "provider": observation_model_config.provider,
-            "model_name": observation_model_name
-        }
-
-        # Log the exact JSON that will be sent
-        logger.info(f"🐍 OBSERVATION PHASE ERROR: Sending JSON response with model_name: {observation_model_name}")
-
-        yield response_obj
-        return
-    observation_response: AIMessage = observation_result["observation_response"]
-    current_messages.append(observation_response)
-    conversation_history_store[thread_id] = current_messages
-    # Ensure model_name is not empty
-    observation_model_name = observation_model_config.model_name if observation_model_config.model_name else "unknown"
-
-    # Create the response object
-    response_obj = {
-        "phase": "observation",
-        "status": "complete",
-        "content": observation_response.content,
-        "provider": observation_model_config.provider,
-        "model_name": observation_model_name
-    }
-
-    # Log the exact JSON that will be sent
-    logger.info(f"🐍 OBSERVATION PHASE: Sending JSON response with model_name: {observation_model_name}")
-
-    yield response_obj
-
-    # 6. Understanding Phase
-    # Ensure model_name is not empty for running status
-    understanding_model_name = understanding_model_config.model_name if understanding_model_config.model_name else "unknown"
-
-    # Create the response object for running status
-    running_obj = {
-        "phase": "understanding",
-        "status": "running",
-        "provider": understanding_model_config.provider,
-        "model_name": understanding_model_name
-    }
-
-    # Log the running status
-    logger.info(f"🐍 UNDERSTANDING PHASE: Sending running status with model_name: {understanding_model_name}")
-
-    yield running_obj
-    understanding_result = await run_understanding_phase(current_messages, understanding_model_config)
-    if "error" in understanding_result:
-        # Ensure model_name is not empty
-        understanding_model_name = understanding_model_config.model_name if understanding_model_config.model_name else "unknown"
-
-        # Create the response object
-        response_obj = {
-            "phase": "understanding",
-            "status": "error",
-            "content": understanding_result["error"],
-            "provider": understanding_model_config.provider,
-            "model_name": understanding_model_name
-        }
-
-        # Log the exact JSON that will be sent
-        logger.info(f"🐍 UNDERSTANDING PHASE ERROR: Sending JSON response with model_name: {understanding_model_name}")
-
-        yield response_obj
-        return
-    understanding_response: AIMessage = understanding_result["understanding_response"]
-    current_messages.append(understanding_response)
-    conversation_history_store[thread_id] = current_messages
-    # Ensure model_name is not empty
-    understanding_model_name = understanding_model_config.model_name if understanding_model_config.model_name else "unknown"
-
-    # Create the response object
-    response_obj = {
-        "phase": "understanding",
-        "status": "complete",
-        "content": understanding_response.content,
-        "provider": understanding_model_config.provider,
-        "model_name": understanding_model_name,
-    }
-
-    # Log the exact JSON that will be sent
-    logger.info(f"🐍 UNDERSTANDING PHASE: Sending JSON response with model_name: {understanding_model_name}")
-
-    yield response_obj
-
-    # 7. Yield Phase
-    # Ensure model_name is not empty for running status
-    yield_model_name = yield_model_config.model_name if yield_model_config.model_name else "unknown"
-
-    # Create the response object for running status
-    running_obj = {
-        "phase": "yield",
-        "status": "running",
-        "provider": yield_model_config.provider,
-        "model_name": yield_model_name
-    }
-
-    # Log the running status
-    logger.info(f"🐍 YIELD PHASE: Sending running status with model_name: {yield_model_name}")
-
-    yield running_obj
-    yield_result = await run_yield_phase(
-        messages=current_messages,
-        model_config=yield_model_config,
-        user_id=user_id,
-        wallet_address=wallet_address
-    )
-    logger.info(f"🐍 WORKFLOW: Received yield_result: {yield_result}") # DEBUG LOG
-    if yield_result.error:
-        # Ensure model_name is not empty
-        yield_model_name = yield_model_config.model_name if yield_model_config.model_name else "unknown"
-
-        # Create the response object
-        response_obj = {
-            "phase": "yield",
-            "status": "error",
-            "content": yield_result.error,
-            "provider": yield_model_config.provider,
-            "model_name": yield_model_name
-        }
-
-        # Log the exact JSON that will be sent
-        logger.info(f"🐍 YIELD PHASE ERROR: Sending JSON response with model_name: {yield_model_name}")
-
-        yield response_obj
-        return
-    yield_response: AIMessage = yield_result.yield_response
-    # Don't add Yield to history for now
-
-    # Add debug logging for model information
-    logger.info(f"🐍 YIELD PHASE: Sending model info - provider: '{yield_model_config.provider}', model_name: '{yield_model_config.model_name}'")
-
-    # Ensure model_name is not empty
-    model_name = yield_model_config.model_name if yield_model_config.model_name else "unknown"
-
-    # Create the response object
-    response_obj = {
-        "phase": "yield",
-        "status": "complete",
-        "content": yield_response.content,
-        "provider": yield_model_config.provider,
-        "model_name": model_name,
-    }
-
-    # Add citation reward information if available
-    if yield_result.citation_reward:
-        response_obj["citation_reward"] = yield_result.citation_reward.dict()
-
-    # Add citations if available
-    if yield_result.citations:
-        response_obj["citations"] = yield_result.citations
-
-    # Add citation explanations if available
-    if hasattr(yield_result, 'citation_explanations') and yield_result.citation_explanations:
-        response_obj["citation_explanations"] = yield_result.citation_explanations
-
-    # Log the exact JSON that will be sent
-    logger.info(f"🐍 YIELD PHASE: Sending JSON response with model_name: {model_name}")
-
-    yield response_obj
-
-    logger.info(f"Langchain PostChain workflow completed for thread {thread_id}")
+    graph = PhaseGraph([
+        PhaseSpec(name=phase, run=phase_runners[phase], depends_on=PHASE_DEPENDENCIES[phase], failed=_phase_failed)
+        for phase in PHASE_ORDER
+    ])
+
+    # Complete events are built (and checkpointed) the moment a phase finishes,
+    # even if it finishes before the phases ahead of it have been reported.
+    completed_events: Dict[str, Dict[str, Any]] = {}
+
+    async def _on_phase_complete(outcome: PhaseOutcome) -> None:
+        event = _phase_complete_event(outcome.name, outcome, model_configs[outcome.name])
+        completed_events[outcome.name] = event
+        if outcome.name != "yield":
+            await _checkpoint_phase(thread_id, turn, query, outcome.name, event, _phase_response(outcome.name, outcome.result))
+
+    # --- Workflow Execution ---
+    # Phases start as soon as their inputs exist; events are emitted in PHASE_ORDER.
+    outcomes: List[PhaseOutcome] = []
+    phase = None
+    try:
+        async with aclosing(graph.run(restored=restored_results, on_complete=_on_phase_complete)) as scheduled_phases:
+            async for spec, task in scheduled_phases:
+                phase = spec.name
+                model_config = model_configs[phase]
+
+                if phase in checkpointed:
+                    # Completed by an earlier run of this turn: replay instead of rerunning
+                    outcomes.append(await task)
+                    logger.info(f"🐍 {phase.upper()} PHASE: Replaying checkpointed result")
+                    yield {**checkpointed[phase]["event"], "replayed": True}
+                    continue
+
+                logger.info(f"🐍 {phase.upper()} PHASE: Sending running status with model_name: {_model_name(model_config)}")
+                yield _phase_event(phase, "running", model_config)
+
+                if phase in delta_queues:
+                    async for delta in _drain_deltas(delta_queues[phase], task):
+                        yield _phase_event(phase, "delta", model_config, content=delta)
+
+                outcome = await task
+                outcomes.append(outcome)
+
+                if not outcome.ok:
+                    response_obj = _phase_error_event(phase, outcome, model_config)
+                    logger.info(f"🐍 {phase.upper()} PHASE ERROR: Sending JSON response with model_name: {response_obj['model_name']}")
+                    yield response_obj
+                    return
+
+                response_obj = completed_events.get(phase) or _phase_complete_event(phase, outcome, model_config)
+                if phase == "yield":
+                    response_obj["phase_timings"] = format_timings(outcomes)
+                    # Persist the completed turn before the final event reaches the client
+                    await _complete_turn(thread_id, query, _phase_response(phase, outcome.result))
+
+                logger.info(f"🐍 {phase.upper()} PHASE: Sending JSON response with model_name: {response_obj['model_name']}")
+                yield response_obj
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client went away: the scheduler has cancelled every unfinished phase
+        # and the completed ones are already checkpointed for /resume.
+        metrics.increment("postchain_runs_cancelled", phase=phase or "startup")
+        logger.info(f"PostChain workflow for thread {thread_id} cancelled during {phase or 'startup'} phase")
+        raise
+
+    logger.info(f"Langchain PostChain workflow completed for thread {thread_id}. Phase timings (ms): {format_timings(outcomes)}")
 
 # This file is imported by routers/postchain.py and used to run the workflow
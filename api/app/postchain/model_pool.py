@@ -0,0 +1,160 @@
+"""
+Pool of initialized LangChain chat models.
+
+Building a chat model creates a new SDK client (and, on first use, a new TLS
+connection). The pool keeps one model instance per distinct configuration so
+repeated phases and requests reuse warm connections. OpenAI-compatible and
+Groq clients additionally share one keep-alive httpx transport per provider.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+
+from app.langchain_utils import ModelConfig, get_base_model
+
+logger = logging.getLogger("postchain_model_pool")
+
+# Providers whose LangChain class accepts an injected httpx.AsyncClient
+SHARED_TRANSPORT_PROVIDERS = {"openai", "openrouter", "groq"}
+
+CREDENTIAL_FIELDS = (
+    "openai_api_key",
+    "anthropic_api_key",
+    "google_api_key",
+    "mistral_api_key",
+    "aws_access_key_id",
+    "aws_secret_access_key",
+    "aws_region",
+    "openrouter_api_key",
+    "groq_api_key",
+)
+
+
+def credential_fingerprint(model_config: ModelConfig) -> str:
+    """Short hash of every credential in the config; keys are never kept in plain text."""
+    digest = hashlib.sha256()
+    for field_name in CREDENTIAL_FIELDS:
+        digest.update(f"{field_name}={getattr(model_config, field_name, None) or ''}\0".encode())
+    return digest.hexdigest()[:16]
+
+
+def pool_key(model_config: ModelConfig) -> Tuple:
+    """Identity of a model instance: same key, same constructed client."""
+    return (
+        model_config.provider,
+        model_config.model_name,
+        model_config.temperature,
+        model_config.max_tokens,
+        credential_fingerprint(model_config),
+    )
+
+
+@dataclass
+class _PooledModel:
+    model: BaseChatModel
+    last_used: float
+
+
+class ModelPool:
+    """Bounded, thread-safe LRU of chat model instances with idle eviction."""
+
+    def __init__(
+        self,
+        max_size: int = 64,
+        idle_ttl: float = 600.0,
+        limits: Optional[httpx.Limits] = None,
+        timeout: float = 120.0
+    ):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._limits = limits or httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        self._timeout = timeout
+        self._models: "OrderedDict[Tuple, _PooledModel]" = OrderedDict()
+        self._transports: Dict[str, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _transport(self, provider: str) -> Optional[httpx.AsyncClient]:
+        if provider not in SHARED_TRANSPORT_PROVIDERS:
+            return None
+        with self._lock:
+            client = self._transports.get(provider)
+            if client is None:
+                client = httpx.AsyncClient(limits=self._limits, timeout=self._timeout)
+                self._transports[provider] = client
+            return client
+
+    def _evict_idle(self, now: float) -> None:
+        # Called with the lock held; the oldest entries sit at the front
+        while self._models:
+            key, entry = next(iter(self._models.items()))
+            if now - entry.last_used <= self.idle_ttl:
+                break
+            del self._models[key]
+            self.evictions += 1
+
+    def get(self, model_config: ModelConfig) -> BaseChatModel:
+        """Return a pooled model for the config, building it on first use.
+
+        Args:
+            model_config: Effective config (API keys already resolved)
+
+        Returns:
+            A chat model instance shared by every caller with the same config
+        """
+        key = pool_key(model_config)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._models.get(key)
+            if entry is not None:
+                entry.last_used = now
+                self._models.move_to_end(key)
+                self.hits += 1
+                return entry.model
+
+        # Build outside the lock; model construction can be slow
+        model = get_base_model(model_config, http_async_client=self._transport(model_config.provider))
+
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                # Another caller built the same model first; keep theirs
+                entry.last_used = now
+                self.hits += 1
+                return entry.model
+            self._models[key] = _PooledModel(model=model, last_used=now)
+            self.misses += 1
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+                self.evictions += 1
+        logger.info(f"Pooled new model instance for {model_config.provider}/{model_config.model_name}")
+        return model
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._models),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    async def aclose(self) -> None:
+        """Drop pooled models and close the shared transports."""
+        with self._lock:
+            self._models.clear()
+            transports = list(self._transports.values())
+            self._transports.clear()
+        for client in transports:
+            await client.aclose()
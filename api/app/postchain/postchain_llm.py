@@ -4,14 +4,15 @@ This module provides a cleaner, more maintainable interface for LLM interactions
 """
 
 import logging
-from typing import Any, Type, List, Optional, Union, AsyncIterator
+from typing import Any, Callable, Type, List, Optional, Union, AsyncIterator
 from pydantic import BaseModel
 
 from langchain_core.messages import BaseMessage, AIMessage, AIMessageChunk
 from langchain_core.language_models import BaseChatModel
 
-from app.langchain_utils import ModelConfig, get_base_model, convert_tools_to_pydantic
+from app.langchain_utils import ModelConfig, get_tool_schema
 from app.config import Config # Import global config
+from app.services.container import get_services
 
 logger = logging.getLogger("postchain_llm")
 
@@ -23,10 +24,12 @@ async def initialize_model(model_config: ModelConfig) -> BaseChatModel:
     Initialize the appropriate LangChain model based on configuration.
     If an API key is missing in model_config, it attempts to use the
     corresponding key from the global_config (loaded from .env).
+    Instances come from the process-wide model pool, so identical configs
+    share one client and its warm connections.
     """
     try:
-        # Create a copy to potentially modify with default keys
-        effective_model_config = model_config.copy(deep=True) # Use deep copy
+        # Replaced by a shallow copy only if a default key has to be filled in
+        effective_model_config = model_config
 
         # --- Key Fallback Logic ---
         provider = effective_model_config.provider
@@ -53,7 +56,7 @@ async def initialize_model(model_config: ModelConfig) -> BaseChatModel:
                 # If default key exists in global config, use it
                 if default_key_value:
                     logger.info(f"API key for provider '{provider}' not found in request ModelConfig, using default from environment.")
-                    setattr(effective_model_config, key_attr_name, default_key_value)
+                    effective_model_config = model_config.copy(update={key_attr_name: default_key_value})
                 else:
                     # Key missing in request AND default config.
                     # Langchain's get_base_model will likely raise an error if the key is required.
@@ -62,8 +65,8 @@ async def initialize_model(model_config: ModelConfig) -> BaseChatModel:
             logger.debug(f"Provider '{provider}' not in key fallback map or key not managed here.")
 
         # --- Initialize with effective config ---
-        # Pass the potentially updated config to the Langchain model initializer
-        return get_base_model(effective_model_config)
+        # Pass the potentially updated config to the pooled Langchain model initializer
+        return get_services().model_pool.get(effective_model_config)
 
     except Exception as e:
         # Log the original model_config for easier debugging without exposing keys from effective_model_config
@@ -73,42 +76,28 @@ async def initialize_model(model_config: ModelConfig) -> BaseChatModel:
 
 
 async def handle_tools(model: BaseChatModel, tools: Optional[List[Any]]) -> BaseChatModel:
-    """Configure model with tools if provided."""
+    """Configure model with tools if provided.
+
+    Tool schemas come from the memoized registry in langchain_utils, so
+    binding does no per-call model creation or schema conversion.
+    """
     if not tools:
         logger.info("No tools provided to handle_tools")
         return model
 
     try:
-        logger.info(f"Processing tools for model binding: {tools}")
+        tool_defs = [get_tool_schema(tool).openai_tool for tool in tools]
+        tool_names = [tool_def["function"]["name"] for tool_def in tool_defs]
 
-        # For Groq models, we need to create a special tool definition
+        # For Groq models, bind the plain function definitions (dict tools may carry a coroutine)
         if hasattr(model, "model_name") and "groq" in str(model).lower():
-            logger.info("Creating special tool definition for Groq model")
-
-            # Create a list of tool definitions without the coroutine
-            groq_tools = []
-            for tool in tools:
-                if isinstance(tool, dict) and "function" in tool:
-                    # Create a clean version without the coroutine
-                    clean_tool = {
-                        "type": "function",
-                        "function": tool["function"]
-                    }
-                    groq_tools.append(clean_tool)
-
-            logger.info(f"Created clean tool definitions for Groq: {groq_tools}")
-
-            # Bind the tools to the model
-            bound_model = model.bind(tools=groq_tools)
-            logger.info(f"Successfully bound tools to Groq model: {bound_model}")
+            bound_model = model.bind(tools=tool_defs)
+            logger.info(f"Bound tools to Groq model: {tool_names}")
             return bound_model
 
         # For other models, use the standard approach
-        logger.info(f"Converting tools to pydantic: {tools}")
-        pydantic_tools = convert_tools_to_pydantic(tools)
-        logger.info(f"Binding tools to model: {pydantic_tools}")
-        bound_model = model.bind_tools(pydantic_tools)
-        logger.info(f"Successfully bound tools to model: {bound_model}")
+        bound_model = model.bind_tools(tool_defs)
+        logger.info(f"Bound tools to model: {tool_names}")
         return bound_model
     except Exception as e:
         logger.error(f"Failed to bind tools to model: {e}", exc_info=True)
@@ -125,6 +114,32 @@ async def process_streaming_response(model: BaseChatModel, messages: List[BaseMe
         yield AIMessageChunk(content=f"Error during streaming: {e}") # Example error chunk
         # Or simply raise: raise ValueError(f"Streaming failed: {e}") from e
 
+async def collect_streaming_response(
+    messages: List[BaseMessage],
+    model_config: ModelConfig,
+    on_delta: Callable[[str], None]
+) -> AIMessage:
+    """Stream a plain completion, forwarding each token delta as it arrives.
+
+    Args:
+        messages: Conversation messages in LangChain format
+        model_config: Configuration for the model (API keys fall back to env)
+        on_delta: Called with the text of every non-empty chunk
+
+    Returns:
+        The assembled AIMessage, equivalent to a non-streaming post_llm call
+    """
+    stream = await post_llm(messages=messages, model_config=model_config, stream=True)
+    parts: List[str] = []
+    async for chunk in stream:
+        text = chunk.content if isinstance(chunk.content, str) else "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part) for part in chunk.content
+        )
+        if text:
+            parts.append(text)
+            on_delta(text)
+    return AIMessage(content="".join(parts))
+
 async def process_non_streaming_response(
     model: BaseChatModel,
     messages: List[BaseMessage],
@@ -274,7 +289,6 @@ async def post_llm(
 
         # Handle tools if provided
         if tools:
-            logger.info(f"Tools provided to post_llm: {tools}")
             model = await handle_tools(model, tools)
         else:
             logger.info("No tools provided to post_llm")
@@ -0,0 +1,151 @@
+"""
+Phase dependency scheduler for the PostChain workflow.
+
+Phases are declared with the phases they depend on. Every phase starts as soon
+as all of its dependencies have completed successfully, so independent phases
+(e.g. Experience Vectors and Experience Web) overlap. Outcomes are reported in
+declaration order, which keeps the SSE event sequence deterministic regardless
+of which phase actually finishes first.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("postchain_scheduler")
+
+
+@dataclass
+class PhaseSpec:
+    """Declaration of a single phase in the graph.
+
+    Attributes:
+        name: Phase name (also used as the key in the results dict)
+        run: Coroutine function receiving the results of every completed ancestor phase
+        depends_on: Names of the phases whose output this phase needs
+        failed: Predicate deciding whether a result counts as a failure
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    failed: Callable[[Any], bool] = lambda result: False
+
+
+@dataclass
+class PhaseOutcome:
+    """Result of running, skipping or restoring a phase."""
+    name: str
+    result: Any = None
+    error: Optional[str] = None
+    duration_s: float = 0.0
+    skipped: bool = False
+    restored: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.skipped
+
+
+class PhaseGraph:
+    """A validated, topologically ordered set of phases."""
+
+    def __init__(self, phases: List[PhaseSpec]):
+        self.phases = phases
+        self._by_name: Dict[str, PhaseSpec] = {}
+        for spec in phases:
+            if spec.name in self._by_name:
+                raise ValueError(f"Duplicate phase name: {spec.name}")
+            for dep in spec.depends_on:
+                if dep not in self._by_name:
+                    # Declaration order must already be a topological order
+                    raise ValueError(f"Phase '{spec.name}' depends on '{dep}', which is not declared before it")
+            self._by_name[spec.name] = spec
+
+        # Transitive ancestors, in declaration order, for each phase
+        self.ancestors: Dict[str, List[str]] = {}
+        for spec in phases:
+            found = set()
+            for dep in spec.depends_on:
+                found.add(dep)
+                found.update(self.ancestors[dep])
+            self.ancestors[spec.name] = [p.name for p in phases if p.name in found]
+
+    async def run(
+        self,
+        restored: Optional[Dict[str, Any]] = None,
+        on_complete: Optional[Callable[[PhaseOutcome], Awaitable[None]]] = None
+    ) -> AsyncIterator[Tuple[PhaseSpec, "asyncio.Task[PhaseOutcome]"]]:
+        """Start every phase and yield ``(spec, task)`` pairs in declaration order.
+
+        Callers await each task to get its PhaseOutcome. Closing the iterator early
+        (for example after emitting an error event) cancels every unfinished phase.
+
+        Args:
+            restored: Results of phases completed in an earlier run (e.g. from a
+                checkpoint). These phases are not run again; their outcomes are
+                marked ``restored`` and fed to dependents as usual.
+            on_complete: Awaited inside the phase task as soon as a phase succeeds,
+                before it is reported, so its result survives a later cancellation.
+        """
+        restored = restored or {}
+        tasks: Dict[str, asyncio.Task] = {}
+        outcomes: Dict[str, PhaseOutcome] = {}
+
+        async def _run_phase(spec: PhaseSpec) -> PhaseOutcome:
+            if spec.name in restored:
+                outcome = PhaseOutcome(name=spec.name, result=restored[spec.name], restored=True)
+                outcomes[spec.name] = outcome
+                return outcome
+
+            for dep in spec.depends_on:
+                dep_outcome = await tasks[dep]
+                if not dep_outcome.ok:
+                    outcome = PhaseOutcome(name=spec.name, skipped=True,
+                                           error=f"Skipped because '{dep}' did not complete")
+                    outcomes[spec.name] = outcome
+                    return outcome
+
+            inputs = {name: outcomes[name].result for name in self.ancestors[spec.name]}
+            started = time.perf_counter()
+            try:
+                result = await spec.run(inputs)
+                error = f"Phase '{spec.name}' reported an error" if spec.failed(result) else None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Phase '{spec.name}' raised: {e}", exc_info=True)
+                result, error = None, f"{spec.name} phase failed: {e}"
+            outcome = PhaseOutcome(
+                name=spec.name,
+                result=result,
+                error=error,
+                duration_s=time.perf_counter() - started
+            )
+            outcomes[spec.name] = outcome
+            logger.info(f"Phase '{spec.name}' finished in {outcome.duration_s * 1000:.0f}ms")
+            if on_complete is not None and outcome.ok:
+                try:
+                    await on_complete(outcome)
+                except Exception as e:
+                    logger.error(f"on_complete hook failed for phase '{spec.name}': {e}", exc_info=True)
+            return outcome
+
+        for spec in self.phases:
+            tasks[spec.name] = asyncio.create_task(_run_phase(spec), name=f"phase:{spec.name}")
+
+        try:
+            for spec in self.phases:
+                yield spec, tasks[spec.name]
+        finally:
+            pending = [t for t in tasks.values() if not t.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+
+def format_timings(outcomes: List[PhaseOutcome]) -> Dict[str, int]:
+    """Per-phase wall time in milliseconds, for logging and the final stream event."""
+    return {o.name: round(o.duration_s * 1000) for o in outcomes if not (o.skipped or o.restored)}
@@ -0,0 +1,492 @@
+"""
+Durable thread state store for PostChain conversations.
+
+Each thread is an append-only sequence of message records. The default backend
+is an embedded SQLite database; an in-memory LRU sits in front of it so hot
+threads are served without touching disk. All public methods are async and
+safe to call concurrently from request handlers.
+
+While a turn is in flight, each completed phase is checkpointed under
+(thread_id, turn) so an interrupted run can be resumed without repeating
+the phases that already finished.
+
+Existing per-thread JSON files written by the old ``save_state`` helper can be
+imported with::
+
+    python -m app.postchain.thread_store migrate [--dir thread_state] [--db PATH]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+from app.config import Config
+
+logger = logging.getLogger("postchain_thread_store")
+
+
+@dataclass
+class TurnCheckpoint:
+    """Phases completed so far for an unfinished turn.
+
+    Attributes:
+        thread_id: Thread the turn belongs to
+        turn: Number of stored thread messages when the turn started
+        query: The user query that started the turn
+        phases: Phase name -> checkpoint payload, in completion order
+    """
+    thread_id: str
+    turn: int
+    query: str
+    phases: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+class ThreadStateStore(ABC):
+    """Interface for thread message storage backends."""
+
+    @abstractmethod
+    async def append_messages(self, thread_id: str, messages: List[BaseMessage]) -> int:
+        """Append messages to a thread.
+
+        Args:
+            thread_id: Thread to append to
+            messages: Messages in conversation order
+
+        Returns:
+            Number of messages stored for the thread after the append
+        """
+
+    @abstractmethod
+    async def get_messages(self, thread_id: str, limit: Optional[int] = None) -> List[BaseMessage]:
+        """Return a thread's messages in order, or only the last ``limit`` of them."""
+
+    @abstractmethod
+    async def count_messages(self, thread_id: str) -> int:
+        """Return the number of messages stored for a thread."""
+
+    @abstractmethod
+    async def delete_thread(self, thread_id: str) -> bool:
+        """Delete every record of a thread. Returns True if anything was deleted."""
+
+    @abstractmethod
+    async def save_phase_checkpoint(self, thread_id: str, turn: int, query: str, phase: str, payload: Dict[str, Any]) -> None:
+        """Record a completed phase of an in-flight turn."""
+
+    @abstractmethod
+    async def load_checkpoint(self, thread_id: str) -> Optional[TurnCheckpoint]:
+        """Return the latest unfinished turn of a thread, if any."""
+
+    @abstractmethod
+    async def clear_checkpoint(self, thread_id: str) -> None:
+        """Drop all phase checkpoints of a thread."""
+
+    async def thread_version(self, thread_id: str) -> Any:
+        """Value that changes whenever a thread's stored messages change.
+
+        Caches compare it against the version they loaded to detect writes made
+        by other processes sharing the backend.
+        """
+        return await self.count_messages(thread_id)
+
+    async def append_messages_versioned(self, thread_id: str, messages: List[BaseMessage]) -> Tuple[int, Any]:
+        """Append messages and return the thread's message count and version right after.
+
+        Backends shared between processes override this to read the version in
+        the same transaction as the append.
+        """
+        count = await self.append_messages(thread_id, messages)
+        return count, await self.thread_version(thread_id)
+
+    async def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+def _tail(messages: List[BaseMessage], limit: Optional[int]) -> List[BaseMessage]:
+    return list(messages[-limit:]) if limit else list(messages)
+
+
+class InMemoryThreadStateStore(ThreadStateStore):
+    """Process-local backend, useful for tests and single-instance development."""
+
+    def __init__(self):
+        self._threads: Dict[str, List[BaseMessage]] = {}
+        self._checkpoints: Dict[str, TurnCheckpoint] = {}
+
+    async def append_messages(self, thread_id: str, messages: List[BaseMessage]) -> int:
+        stored = self._threads.setdefault(thread_id, [])
+        stored.extend(messages)
+        return len(stored)
+
+    async def get_messages(self, thread_id: str, limit: Optional[int] = None) -> List[BaseMessage]:
+        return _tail(self._threads.get(thread_id, []), limit)
+
+    async def count_messages(self, thread_id: str) -> int:
+        return len(self._threads.get(thread_id, []))
+
+    async def delete_thread(self, thread_id: str) -> bool:
+        self._checkpoints.pop(thread_id, None)
+        return self._threads.pop(thread_id, None) is not None
+
+    async def save_phase_checkpoint(self, thread_id: str, turn: int, query: str, phase: str, payload: Dict[str, Any]) -> None:
+        checkpoint = self._checkpoints.get(thread_id)
+        if checkpoint is None or checkpoint.turn != turn:
+            checkpoint = self._checkpoints[thread_id] = TurnCheckpoint(thread_id=thread_id, turn=turn, query=query)
+        checkpoint.phases[phase] = payload
+
+    async def load_checkpoint(self, thread_id: str) -> Optional[TurnCheckpoint]:
+        return self._checkpoints.get(thread_id)
+
+    async def clear_checkpoint(self, thread_id: str) -> None:
+        self._checkpoints.pop(thread_id, None)
+
+
+class SQLiteThreadStateStore(ThreadStateStore):
+    """Embedded SQLite backend with one append-only row per message.
+
+    SQLite calls are blocking, so they run in a worker thread and are
+    serialized on a single connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS thread_messages (
+                    thread_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    message TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (thread_id, seq)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS phase_checkpoints (
+                    thread_id TEXT NOT NULL,
+                    turn INTEGER NOT NULL,
+                    phase TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (thread_id, turn, phase)
+                )
+                """
+            )
+            conn.commit()
+            self._conn = conn
+            logger.info(f"Opened thread state database at {self.path}")
+        return self._conn
+
+    async def _run(self, fn, *args):
+        def _locked():
+            with self._lock:
+                return fn(self._connection(), *args)
+        return await asyncio.to_thread(_locked)
+
+    @classmethod
+    def _append(cls, conn: sqlite3.Connection, thread_id: str, records: List[str]) -> Tuple:
+        with conn:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM thread_messages WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+            now = time.time()
+            conn.executemany(
+                "INSERT INTO thread_messages (thread_id, seq, message, created_at) VALUES (?, ?, ?, ?)",
+                [(thread_id, count + i, record, now) for i, record in enumerate(records)]
+            )
+            return cls._version(conn, thread_id)
+
+    @staticmethod
+    def _select(conn: sqlite3.Connection, thread_id: str, limit: Optional[int]) -> List[str]:
+        if limit:
+            rows = conn.execute(
+                "SELECT message FROM (SELECT seq, message FROM thread_messages WHERE thread_id = ? "
+                "ORDER BY seq DESC LIMIT ?) ORDER BY seq",
+                (thread_id, limit)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT message FROM thread_messages WHERE thread_id = ? ORDER BY seq", (thread_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection, thread_id: str) -> int:
+        return conn.execute(
+            "SELECT COUNT(*) FROM thread_messages WHERE thread_id = ?", (thread_id,)
+        ).fetchone()[0]
+
+    @staticmethod
+    def _version(conn: sqlite3.Connection, thread_id: str) -> Tuple:
+        # The append timestamp tells a deleted-and-rewritten thread of the same length apart
+        return conn.execute(
+            "SELECT COUNT(*), MAX(rowid), MAX(created_at) FROM thread_messages WHERE thread_id = ?", (thread_id,)
+        ).fetchone()
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, thread_id: str) -> int:
+        with conn:
+            conn.execute("DELETE FROM phase_checkpoints WHERE thread_id = ?", (thread_id,))
+            return conn.execute("DELETE FROM thread_messages WHERE thread_id = ?", (thread_id,)).rowcount
+
+    @staticmethod
+    def _save_checkpoint(conn: sqlite3.Connection, thread_id: str, turn: int, query: str, phase: str, payload: str) -> None:
+        with conn:
+            # Only the latest turn of a thread is resumable
+            conn.execute("DELETE FROM phase_checkpoints WHERE thread_id = ? AND turn != ?", (thread_id, turn))
+            conn.execute(
+                "INSERT OR REPLACE INTO phase_checkpoints (thread_id, turn, phase, query, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (thread_id, turn, phase, query, payload, time.time())
+            )
+
+    @staticmethod
+    def _load_checkpoint(conn: sqlite3.Connection, thread_id: str) -> List[tuple]:
+        return conn.execute(
+            "SELECT turn, query, phase, payload FROM phase_checkpoints WHERE thread_id = ? "
+            "AND turn = (SELECT MAX(turn) FROM phase_checkpoints WHERE thread_id = ?) ORDER BY created_at, rowid",
+            (thread_id, thread_id)
+        ).fetchall()
+
+    @staticmethod
+    def _clear_checkpoint(conn: sqlite3.Connection, thread_id: str) -> None:
+        with conn:
+            conn.execute("DELETE FROM phase_checkpoints WHERE thread_id = ?", (thread_id,))
+
+    async def append_messages(self, thread_id: str, messages: List[BaseMessage]) -> int:
+        count, _ = await self.append_messages_versioned(thread_id, messages)
+        return count
+
+    async def append_messages_versioned(self, thread_id: str, messages: List[BaseMessage]) -> Tuple[int, Tuple]:
+        records = [json.dumps(message_to_dict(m)) for m in messages]
+        version = tuple(await self._run(self._append, thread_id, records))
+        return version[0], version
+
+    async def get_messages(self, thread_id: str, limit: Optional[int] = None) -> List[BaseMessage]:
+        records = await self._run(self._select, thread_id, limit)
+        return messages_from_dict([json.loads(r) for r in records])
+
+    async def count_messages(self, thread_id: str) -> int:
+        return await self._run(self._count, thread_id)
+
+    async def thread_version(self, thread_id: str) -> Tuple:
+        return tuple(await self._run(self._version, thread_id))
+
+    async def delete_thread(self, thread_id: str) -> bool:
+        return await self._run(self._delete, thread_id) > 0
+
+    async def save_phase_checkpoint(self, thread_id: str, turn: int, query: str, phase: str, payload: Dict[str, Any]) -> None:
+        await self._run(self._save_checkpoint, thread_id, turn, query, phase, json.dumps(payload))
+
+    async def load_checkpoint(self, thread_id: str) -> Optional[TurnCheckpoint]:
+        rows = await self._run(self._load_checkpoint, thread_id)
+        if not rows:
+            return None
+        turn, query = rows[0][0], rows[0][1]
+        return TurnCheckpoint(
+            thread_id=thread_id,
+            turn=turn,
+            query=query,
+            phases={phase: json.loads(payload) for _, _, phase, payload in rows}
+        )
+
+    async def clear_checkpoint(self, thread_id: str) -> None:
+        await self._run(self._clear_checkpoint, thread_id)
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            def _close():
+                with self._lock:
+                    self._conn.close()
+                    self._conn = None
+            await asyncio.to_thread(_close)
+
+
+class CachedThreadStateStore(ThreadStateStore):
+    """LRU cache of whole threads in front of another backend.
+
+    Appends are written through to the backend first, then applied to the
+    cached copy, so the cache never holds messages the backend does not.
+    Every read checks the backend's ``thread_version`` (one indexed query)
+    and reloads the thread if another process sharing the backend (another
+    uvicorn worker or container on the same SQLite volume) has written to it.
+    Message counts, which key turns, always come from the backend.
+    """
+
+    def __init__(self, backend: ThreadStateStore, max_threads: int = 256):
+        self.backend = backend
+        self.max_threads = max_threads
+        # thread_id -> (backend version the messages were loaded at, messages)
+        self._cache: "OrderedDict[str, Tuple[Any, List[BaseMessage]]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def _remember(self, thread_id: str, version: Any, messages: List[BaseMessage]) -> None:
+        self._cache[thread_id] = (version, messages)
+        self._cache.move_to_end(thread_id)
+        while len(self._cache) > self.max_threads:
+            self._cache.popitem(last=False)
+
+    async def append_messages(self, thread_id: str, messages: List[BaseMessage]) -> int:
+        async with self._lock:
+            count, version = await self.backend.append_messages_versioned(thread_id, messages)
+            cached = self._cache.get(thread_id)
+            if cached is not None:
+                if len(cached[1]) + len(messages) == count:
+                    self._remember(thread_id, version, cached[1] + list(messages))
+                else:
+                    # Someone else appended in between; reload on the next read
+                    self._cache.pop(thread_id)
+            return count
+
+    async def get_messages(self, thread_id: str, limit: Optional[int] = None) -> List[BaseMessage]:
+        version = await self.backend.thread_version(thread_id)
+        cached = self._cache.get(thread_id)
+        if cached is not None and cached[0] == version:
+            self._cache.move_to_end(thread_id)
+            return _tail(cached[1], limit)
+        async with self._lock:
+            version = await self.backend.thread_version(thread_id)
+            messages = await self.backend.get_messages(thread_id)
+            self._remember(thread_id, version, messages)
+        return _tail(messages, limit)
+
+    async def count_messages(self, thread_id: str) -> int:
+        return await self.backend.count_messages(thread_id)
+
+    async def thread_version(self, thread_id: str) -> Any:
+        return await self.backend.thread_version(thread_id)
+
+    async def delete_thread(self, thread_id: str) -> bool:
+        async with self._lock:
+            self._cache.pop(thread_id, None)
+            return await self.backend.delete_thread(thread_id)
+
+    # Checkpoints are written once and read only on resume, so they bypass the cache
+
+    async def save_phase_checkpoint(self, thread_id: str, turn: int, query: str, phase: str, payload: Dict[str, Any]) -> None:
+        await self.backend.save_phase_checkpoint(thread_id, turn, query, phase, payload)
+
+    async def load_checkpoint(self, thread_id: str) -> Optional[TurnCheckpoint]:
+        return await self.backend.load_checkpoint(thread_id)
+
+    async def clear_checkpoint(self, thread_id: str) -> None:
+        await self.backend.clear_checkpoint(thread_id)
+
+    async def close(self) -> None:
+        self._cache.clear()
+        await self.backend.close()
+
+
+def create_thread_store(config: Config) -> ThreadStateStore:
+    """Build the configured thread state store.
+
+    Args:
+        config: Application config (THREAD_STATE_BACKEND, THREAD_STATE_DB_PATH,
+            THREAD_STATE_CACHE_SIZE)
+
+    Returns:
+        The backend wrapped in an LRU cache
+    """
+    backend_name = config.THREAD_STATE_BACKEND.lower()
+    if backend_name == "sqlite":
+        backend: ThreadStateStore = SQLiteThreadStateStore(config.THREAD_STATE_DB_PATH)
+    elif backend_name == "memory":
+        backend = InMemoryThreadStateStore()
+    else:
+        raise ValueError(f"Unknown THREAD_STATE_BACKEND: {config.THREAD_STATE_BACKEND}")
+    return CachedThreadStateStore(backend, max_threads=config.THREAD_STATE_CACHE_SIZE)
+
+
+# --- Migration from per-thread JSON files ---
+
+async def migrate_json_states(store: ThreadStateStore, directory: str) -> Dict[str, int]:
+    """Import ``<thread_id>.json`` files written by the old save_state helper.
+
+    Threads that already have records in the store are skipped, so the
+    migration can be re-run safely.
+
+    Args:
+        store: Destination store
+        directory: Directory containing the JSON state files
+
+    Returns:
+        Counts of migrated, skipped and failed threads and of imported messages
+    """
+    stats = {"migrated": 0, "skipped": 0, "failed": 0, "messages": 0}
+    if not os.path.isdir(directory):
+        logger.warning(f"No thread state directory at {directory}")
+        return stats
+
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        thread_id = filename[:-len(".json")]
+        try:
+            if await store.count_messages(thread_id):
+                stats["skipped"] += 1
+                continue
+            with open(os.path.join(directory, filename), "r") as f:
+                state_dict = json.load(f)
+            # BaseMessage.dict() output carries its type alongside the fields
+            messages = messages_from_dict([
+                {"type": m["type"], "data": m} for m in state_dict.get("messages", [])
+            ])
+            if messages:
+                await store.append_messages(thread_id, messages)
+            stats["migrated"] += 1
+            stats["messages"] += len(messages)
+        except Exception as e:
+            logger.error(f"Failed to migrate thread state file {filename}: {e}", exc_info=True)
+            stats["failed"] += 1
+
+    logger.info(f"Thread state migration finished: {stats}")
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from app.postchain.utils import STATE_STORAGE_DIR
+
+    config = Config()
+    parser = argparse.ArgumentParser(description="PostChain thread state store tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser("migrate", help="Import legacy per-thread JSON state files")
+    migrate.add_argument("--dir", default=STATE_STORAGE_DIR, help="Directory with <thread_id>.json files")
+    migrate.add_argument("--db", default=config.THREAD_STATE_DB_PATH, help="SQLite database to import into")
+    args = parser.parse_args(argv)
+
+    async def _migrate():
+        store = SQLiteThreadStateStore(args.db)
+        try:
+            return await migrate_json_states(store, args.dir)
+        finally:
+            await store.close()
+
+    print(json.dumps(asyncio.run(_migrate())))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
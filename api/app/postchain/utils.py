@@ -7,77 +7,78 @@ including thread ID validation, state management, and formatting utilities.
 
 import uuid
 import logging
-import json
-import os
 from typing import Dict, Any, List, Optional, Union
 
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 
 from app.postchain.schemas.state import PostChainState
+from app.services.container import get_services
 
 # Configure logging
 logger = logging.getLogger("postchain_utils")
 
-STATE_STORAGE_DIR = "thread_state" # Define directory for thread state storage
+POSTCHAIN_PHASES = ["action", "experience_vectors", "experience_web", "intention", "observation", "understanding", "yield"]
 
-def save_state(state: PostChainState) -> bool:
-    """Save PostChainState to a JSON file."""
+STATE_STORAGE_DIR = "thread_state" # Legacy per-thread JSON files (see app.postchain.thread_store migrate)
+
+async def save_state(state: PostChainState) -> bool:
+    """Persist PostChainState messages to the thread state store.
+
+    The store is append-only, so only messages beyond those already stored
+    for the thread are written.
+    """
     thread_id = state.thread_id
     if not thread_id:
         logger.warning("Attempted to save state with no thread_id")
         return False
 
-    # Ensure storage directory exists
-    if not os.path.exists(STATE_STORAGE_DIR):
-        os.makedirs(STATE_STORAGE_DIR, exist_ok=True)
-
-    filepath = os.path.join(STATE_STORAGE_DIR, f"{thread_id}.json")
+    store = get_services().thread_store
     try:
-        with open(filepath, 'w') as f:
-            json.dump(state.dict(), f, indent=2)
-        logger.debug(f"Saved state for thread {thread_id} to disk")
+        stored_count = await store.count_messages(thread_id)
+        new_messages = state.messages[stored_count:]
+        if new_messages:
+            await store.append_messages(thread_id, new_messages)
+        logger.debug(f"Saved {len(new_messages)} new messages for thread {thread_id}")
         return True
     except Exception as e:
-        logger.error(f"Error saving state to disk for thread {thread_id}: {e}", exc_info=True)
+        logger.error(f"Error saving state for thread {thread_id}: {e}", exc_info=True)
         return False
 
-def recover_state(thread_id: str) -> Optional[PostChainState]:
-    """Recover PostChainState from a JSON file."""
-    thread_id = validate_thread_id(thread_id)
-    filepath = os.path.join(STATE_STORAGE_DIR, f"{thread_id}.json")
+async def recover_state(thread_id: str) -> Optional[PostChainState]:
+    """Recover PostChainState from the thread state store.
 
-    if not os.path.exists(filepath):
-        logger.debug(f"No state file found on disk for thread {thread_id}")
+    If a turn was interrupted, phase_state marks its checkpointed phases as
+    complete and current_phase is the first phase still to run.
+    """
+    thread_id = validate_thread_id(thread_id)
+    store = get_services().thread_store
+    try:
+        messages = await store.get_messages(thread_id)
+        checkpoint = await store.load_checkpoint(thread_id)
+    except Exception as e:
+        logger.error(f"Error loading state for thread {thread_id}: {e}", exc_info=True)
         return None
 
-    try:
-        with open(filepath, 'r') as f:
-            state_dict = json.load(f)
-            loaded_state = PostChainState.parse_obj(state_dict) # Load state directly from dict
-            logger.info(f"Recovered state from disk for thread {thread_id} with {len(loaded_state.messages)} messages")
-            return loaded_state
-    except FileNotFoundError:
-        logger.debug(f"No state file found on disk for thread {thread_id}")
+    if not messages and not checkpoint:
+        logger.debug(f"No stored state found for thread {thread_id}")
         return None
-    except json.JSONDecodeError:
-        logger.error(f"JSONDecodeError while loading state for thread {thread_id}, state file possibly corrupted. Returning None.", exc_info=True)
-    except Exception as e:
-        logger.error(f"Error loading state from disk for thread {thread_id}: {e}", exc_info=True)
-    return None
 
-def delete_state(thread_id: str) -> bool: # Add delete_state function
-    """Delete state file for a thread."""
+    state = PostChainState(thread_id=thread_id, messages=messages)
+    if checkpoint:
+        state.phase_state = {phase: "complete" for phase in checkpoint.phases}
+        state.current_phase = next((p for p in POSTCHAIN_PHASES if p not in checkpoint.phases), "yield")
+    logger.info(f"Recovered state for thread {thread_id} with {len(messages)} messages and {len(state.phase_state)} checkpointed phases")
+    return state
+
+async def delete_state(thread_id: str) -> bool:
+    """Delete all stored state for a thread."""
     thread_id = validate_thread_id(thread_id)
-    filepath = os.path.join(STATE_STORAGE_DIR, f"{thread_id}.json")
     try:
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            logger.info(f"Deleted state file for thread {thread_id} from disk")
-            return True
-        logger.info(f"No state file found to delete for thread {thread_id}")
-        return False
+        deleted = await get_services().thread_store.delete_thread(thread_id)
+        logger.info(f"{'Deleted' if deleted else 'No'} stored state for thread {thread_id}")
+        return deleted
     except Exception as e:
-        logger.error(f"Error deleting state file for thread {thread_id}: {e}", exc_info=True)
+        logger.error(f"Error deleting state for thread {thread_id}: {e}", exc_info=True)
         return False
 
 
@@ -0,0 +1,59 @@
+"""
+Maximal Marginal Relevance (MMR) re-ranking of retrieved vectors.
+
+MMR picks hits one at a time, each maximizing
+
+    lambda * sim(query, hit) - (1 - lambda) * max sim(hit, already picked)
+
+so near-duplicates of an already chosen hit lose out to slightly less
+relevant but different ones. Similarities are cosine, matching the
+collections' distance. Each step is one matrix-vector product over the
+candidates, so re-ranking a few hundred 1536-d candidates takes well under a
+millisecond.
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def mmr_select(
+    query_vector: Sequence[float],
+    candidate_vectors: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = 0.7
+) -> List[int]:
+    """Choose up to ``k`` diverse, relevant candidates.
+
+    Args:
+        query_vector: Query embedding
+        candidate_vectors: Embeddings of the retrieved candidates
+        k: Number of candidates to keep
+        lambda_mult: 1.0 ranks by relevance only; lower values favour diversity
+
+    Returns:
+        Indices into ``candidate_vectors`` in selection order
+    """
+    if k <= 0 or len(candidate_vectors) == 0:
+        return []
+    candidates = _normalize(np.asarray(candidate_vectors, dtype=np.float32))
+    query = _normalize(np.asarray(query_vector, dtype=np.float32))
+    relevance = candidates @ query
+
+    selected: List[int] = []
+    available = np.ones(len(candidates), dtype=bool)
+    # Similarity of each candidate to its closest selected candidate
+    redundancy = np.zeros(len(candidates), dtype=np.float32)
+    for _ in range(min(k, len(candidates))):
+        scores = relevance if not selected else lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores = np.where(available, scores, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, candidates @ candidates[best])
+    return selected
@@ -0,0 +1,340 @@
+"""
+Bulkheads, circuit breakers and deadlines for outbound dependencies.
+
+Every remote dependency (Qdrant, embeddings, web search, Sui, APNs) gets a
+``Dependency`` guard from ``get_dependency(name)``:
+
+- a bulkhead caps its concurrent calls, so a slow dependency can hold at most
+  that many requests (a call that can't get a slot within
+  ``BULKHEAD_MAX_WAIT`` fails immediately); blocking clients run on a worker
+  pool of the same size and keep their slot until the thread returns;
+- a per-call deadline bounds how long any one call may take;
+- a circuit breaker opens after ``BREAKER_FAILURE_THRESHOLD`` consecutive
+  failures (errors or deadline misses), rejects calls for
+  ``BREAKER_RESET_TIMEOUT`` seconds, then lets a single probe call through
+  (half-open) and closes again if it succeeds.
+
+Rejected calls raise ``DependencyUnavailable`` without touching the
+dependency, so callers can fall back to degraded output straight away.
+Breaker state is exposed on the health endpoints via ``snapshot()``.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app import metrics
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class DependencyUnavailable(Exception):
+    """A call was rejected (breaker open, bulkhead full) or missed its deadline."""
+
+    def __init__(self, dependency: str, reason: str):
+        super().__init__(f"{dependency} unavailable: {reason}")
+        self.dependency = dependency
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        # Breakers are shared by sync (threaded) and async callers
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now (claims the probe slot when half-open)."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True if this opened the breaker."""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                opened = self.state != OPEN
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                return opened
+            return False
+
+    def release_probe(self) -> None:
+        """Give back an unused half-open probe slot (the call was never made)."""
+        with self._lock:
+            self._probing = False
+
+
+class Dependency:
+    """Bulkhead + circuit breaker + deadline around one outbound dependency."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        deadline: Optional[float],
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        max_wait: float = 1.0,
+        is_failure: Callable[[BaseException], bool] = lambda e: True
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        # None means calls run to completion (e.g. transactions that can't be abandoned)
+        self.deadline = deadline
+        self.max_wait = max_wait
+        self.is_failure = is_failure
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        # asyncio primitives are bound to one loop, so each loop gets its own bulkhead
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.in_flight = 0
+
+    def _reject(self, reason: str) -> DependencyUnavailable:
+        metrics.increment("dependency_rejected", dependency=self.name, reason=reason)
+        return DependencyUnavailable(self.name, reason)
+
+    def _failed(self) -> None:
+        if self.breaker.record_failure():
+            logger.warning(f"Circuit breaker for {self.name} opened after {self.breaker.failures} failures")
+            metrics.increment("dependency_breaker_opened", dependency=self.name)
+
+    def _worker_pool(self) -> ThreadPoolExecutor:
+        # One worker per bulkhead slot: slots are held until the thread finishes,
+        # so blocking calls never queue behind abandoned ones
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix=f"dependency-{self.name}"
+                )
+            return self._executor
+
+    async def _enter(self) -> asyncio.Semaphore:
+        """Pass the breaker and take a bulkhead slot (waiting up to ``max_wait``)."""
+        if not self.breaker.allow():
+            raise self._reject("breaker_open")
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        try:
+            if slots.locked():
+                async with asyncio.timeout(self.max_wait):
+                    await slots.acquire()
+            else:
+                await slots.acquire()
+        except TimeoutError:
+            self.breaker.release_probe()
+            raise self._reject("bulkhead_full")
+        except asyncio.CancelledError:
+            self.breaker.release_probe()
+            raise
+        self.in_flight += 1
+        return slots
+
+    def _leave(self, slots: asyncio.Semaphore) -> None:
+        self.in_flight -= 1
+        slots.release()
+
+    async def _settle(self, start: Callable[[], Awaitable[Any]], deadline: Optional[float]) -> Any:
+        """Await the call under its deadline and record the outcome on the breaker."""
+        deadline = self.deadline if deadline is None else deadline
+        try:
+            async with asyncio.timeout(deadline):
+                result = await start()
+        except TimeoutError:
+            self._failed()
+            metrics.increment("dependency_timeouts", dependency=self.name)
+            raise DependencyUnavailable(self.name, f"no response within {deadline}s")
+        except Exception as e:
+            if self.is_failure(e):
+                self._failed()
+            else:
+                self.breaker.record_success()
+            raise
+        except asyncio.CancelledError:
+            self.breaker.release_probe()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args: Any, deadline: Optional[float] = None, **kwargs: Any) -> Any:
+        """Await ``fn(*args, **kwargs)`` under the bulkhead, breaker and deadline.
+
+        Args:
+            fn: Coroutine function calling the dependency
+            deadline: Seconds before the call is abandoned (defaults to the dependency's)
+
+        Returns:
+            Whatever ``fn`` returns
+
+        Raises:
+            DependencyUnavailable: Breaker open, bulkhead full or deadline exceeded
+        """
+        slots = await self._enter()
+        try:
+            return await self._settle(functools.partial(fn, *args, **kwargs), deadline)
+        finally:
+            self._leave(slots)
+
+    async def run_sync(self, fn: Callable[..., Any], *args: Any, deadline: Optional[float] = None, **kwargs: Any) -> Any:
+        """Run a blocking client call in the dependency's worker pool under the same guards.
+
+        On a deadline miss the caller moves on, but the bulkhead slot stays
+        taken until the thread actually returns, so a hung dependency can't
+        pile up more than ``max_concurrency`` threads.
+        """
+        slots = await self._enter()
+        loop = asyncio.get_running_loop()
+        try:
+            work = self._worker_pool().submit(fn, *args, **kwargs)
+        except BaseException:
+            self._leave(slots)
+            raise
+        work.add_done_callback(lambda _: self._leave_from_thread(loop, slots))
+        return await self._settle(lambda: asyncio.wrap_future(work), deadline)
+
+    def _leave_from_thread(self, loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore) -> None:
+        try:
+            loop.call_soon_threadsafe(self._leave, slots)
+        except RuntimeError:
+            # The loop is gone, and its bulkhead with it
+            pass
+
+    def state(self) -> Dict[str, Any]:
+        breaker = self.breaker
+        retry_in = None
+        if breaker.state == OPEN and breaker.opened_at is not None:
+            retry_in = round(max(0.0, breaker.reset_timeout - (time.monotonic() - breaker.opened_at)), 1)
+        return {
+            "state": breaker.state,
+            "consecutive_failures": breaker.failures,
+            "retry_in": retry_in,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "deadline": self.deadline,
+        }
+
+
+def _settings(config: Config) -> Dict[str, Tuple[int, Optional[float], float]]:
+    """Bulkhead size, per-call deadline and bulkhead wait (seconds) of each known dependency."""
+    wait = config.BULKHEAD_MAX_WAIT
+    return {
+        "qdrant": (config.QDRANT_MAX_CONCURRENCY, config.QDRANT_CALL_DEADLINE, wait),
+        # Bulk scrolls/upserts from app.admin run as long as the batch takes
+        "qdrant_admin": (config.QDRANT_MAX_CONCURRENCY, None, wait),
+        "embeddings": (config.EMBEDDINGS_MAX_CONCURRENCY, config.EMBEDDINGS_CALL_DEADLINE, wait),
+        # One guard per search provider, so a failing provider doesn't block its fallback
+        "brave_search": (config.WEB_SEARCH_MAX_CONCURRENCY, config.WEB_SEARCH_CALL_DEADLINE, wait),
+        "tavily_search": (config.WEB_SEARCH_MAX_CONCURRENCY, config.WEB_SEARCH_CALL_DEADLINE, wait),
+        "sui": (config.SUI_MAX_CONCURRENCY, config.SUI_CALL_DEADLINE, wait),
+        # Concurrent transactions from one signer can equivocate on its gas coin, and an
+        # abandoned submission may still land, so mints are serialized and never timed out
+        "sui_mint": (1, None, config.SUI_MINT_MAX_WAIT),
+        "apns": (config.APNS_MAX_CONCURRENCY, config.APNS_CALL_DEADLINE, wait),
+    }
+
+
+_dependencies: Dict[str, Dependency] = {}
+_registry_lock = threading.Lock()
+
+
+def get_dependency(
+    name: str,
+    config: Optional[Config] = None,
+    is_failure: Optional[Callable[[BaseException], bool]] = None
+) -> Dependency:
+    """Return the process-wide guard for a dependency, creating it on first use.
+
+    Args:
+        name: One of qdrant, qdrant_admin, embeddings, brave_search, tavily_search, sui, sui_mint, apns
+        config: Settings source (defaults to Config())
+        is_failure: Which exceptions count against the breaker (first caller decides)
+    """
+    with _registry_lock:
+        dependency = _dependencies.get(name)
+        if dependency is None:
+            config = config or Config()
+            max_concurrency, deadline, max_wait = _settings(config)[name]
+            dependency = Dependency(
+                name,
+                max_concurrency=max_concurrency,
+                deadline=deadline,
+                failure_threshold=config.BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=config.BREAKER_RESET_TIMEOUT,
+                max_wait=max_wait,
+                is_failure=is_failure or (lambda e: True)
+            )
+            _dependencies[name] = dependency
+        return dependency
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Breaker and bulkhead state of every dependency used so far."""
+    with _registry_lock:
+        return {name: dependency.state() for name, dependency in _dependencies.items()}
+
+
+def degraded() -> bool:
+    """Whether any dependency's breaker is currently not closed."""
+    return any(state["state"] != CLOSED for state in snapshot().values())
+
+
+def reset() -> None:
+    """Forget all guards (used by tests)."""
+    with _registry_lock:
+        _dependencies.clear()
+
+
+class GuardedClient:
+    """Proxy that routes an async client's coroutine methods through a Dependency."""
+
+    def __init__(self, client: Any, dependency: Dependency, unguarded: Tuple[str, ...] = ("close",)):
+        self._client = client
+        self._dependency = dependency
+        self._unguarded = unguarded
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._client, name)
+        if name in self._unguarded or not asyncio.iscoroutinefunction(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def guarded(*args: Any, **kwargs: Any) -> Any:
+            return await self._dependency.call(attribute, *args, **kwargs)
+
+        return guarded
@@ -2,6 +2,8 @@ import logging
 from fastapi import APIRouter, HTTPException, status, Depends
 from app.models.auth import ChallengeRequest, ChallengeResponse, AuthRequest, AuthResponse, TokenData
 from app.services.auth_service import AuthService, get_current_user
+from app.services.container import get_db
+from app.database import DatabaseClient
 from app.config import Config
 from datetime import datetime, UTC
 
@@ -34,7 +36,7 @@ async def get_challenge(request: ChallengeRequest):
         )
 
 @router.post("/login", response_model=AuthResponse)
-async def login(request: AuthRequest):
+async def login(request: AuthRequest, db: DatabaseClient = Depends(get_db)):
     """Authenticate with a signed challenge"""
     logger = logging.getLogger(__name__)
     logger.info(f"Login request received for wallet: {request.wallet_address}")
@@ -58,7 +60,7 @@ async def login(request: AuthRequest):
     logger.info(f"Signature verified successfully for wallet: {request.wallet_address}")
 
     # Get or create user
-    user_id = await auth_service.get_or_create_user(request.wallet_address)
+    user_id = await auth_service.get_or_create_user(request.wallet_address, db)
     logger.info(f"User ID: {user_id} for wallet: {request.wallet_address}")
 
     # Create access token
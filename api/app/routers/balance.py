@@ -1,18 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.services.sui_service import SuiService
 from app.services.auth_service import get_current_user
+from app.services.container import get_sui_service
 from app.models.auth import TokenData
 
 router = APIRouter()
-sui_service = SuiService()
 
 @router.get("/balance/{address}")
-async def get_balance(address: str, current_user: TokenData = Depends(get_current_user)):
-    balance = sui_service.get_balance(address)
+async def get_balance(address: str, current_user: TokenData = Depends(get_current_user), sui_service: SuiService = Depends(get_sui_service)):
+    balance = await sui_service.get_balance(address)
     return balance
 
 @router.post("/mint_choir/{recipient_address}")
-async def mint_choir(recipient_address: str, amount: int = 1_000_000_000, current_user: TokenData = Depends(get_current_user)):
+async def mint_choir(recipient_address: str, amount: int = 1_000_000_000, current_user: TokenData = Depends(get_current_user), sui_service: SuiService = Depends(get_sui_service)):
     result = await sui_service.mint_choir(recipient_address, amount)
     if result["success"]:
         return {
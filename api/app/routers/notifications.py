@@ -2,29 +2,36 @@
 Notifications API router.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Query
 from typing import Optional, Dict, Any, List
 from app.models.api import APIResponse
-from app.database import DatabaseClient
-from app.config import Config
+from app.database import DatabaseClient, MAX_PAGE_SIZE
 from app.services.auth_service import get_current_user
 from app.models.auth import TokenData
-from app.services.notification_service import NotificationService
 from app.services.push_notification_service import PushNotificationService
+from app.services.container import get_db, get_push_notification_service
 
 router = APIRouter()
-config = Config.from_env()
-db = DatabaseClient(config)
-notification_service = NotificationService()
-push_notification_service = PushNotificationService()
 
 @router.get("", response_model=APIResponse)
-async def get_notifications(wallet_address: Optional[str] = None, current_user: TokenData = Depends(get_current_user)):
+async def get_notifications(
+    wallet_address: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    current_user: TokenData = Depends(get_current_user),
+    db: DatabaseClient = Depends(get_db)
+):
     """
-    Get notifications/transactions for the current user across all their wallets.
+    Get notifications/transactions for the current user across all their wallets, newest first.
 
     Args:
         wallet_address: Optional wallet address to filter notifications for a specific wallet
+        limit: Page size
+        cursor: next_cursor from the previous page
+        before: Only notifications created before this ISO timestamp
+        after: Only notifications created after this ISO timestamp (e.g. for polling)
     """
     try:
         if not current_user.wallet_address:
@@ -46,17 +53,29 @@ async def get_notifications(wallet_address: Optional[str] = None, current_user:
             wallet_addresses = [current_user.wallet_address]
 
         # Get notifications for all wallet addresses
-        notifications = await db.get_user_notifications(wallet_addresses)
+        page = await db.get_user_notifications_page(
+            wallet_addresses,
+            limit,
+            cursor=cursor,
+            before=before,
+            after=after
+        )
 
         return APIResponse(
             success=True,
-            data={"notifications": notifications}
+            data=page
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/{notification_id}/read", response_model=APIResponse)
-async def mark_notification_as_read(notification_id: str, current_user: TokenData = Depends(get_current_user)):
+async def mark_notification_as_read(
+    notification_id: str,
+    current_user: TokenData = Depends(get_current_user),
+    db: DatabaseClient = Depends(get_db)
+):
     """Mark a notification as read."""
     try:
         result = await db.mark_notification_as_read(notification_id)
@@ -78,7 +97,8 @@ async def mark_notification_as_read(notification_id: str, current_user: TokenDat
 async def register_device_token(
     device_token: str = Body(..., embed=True),
     wallet_address: str = Body(..., embed=True),
-    current_user: TokenData = Depends(get_current_user)
+    current_user: TokenData = Depends(get_current_user),
+    db: DatabaseClient = Depends(get_db)
 ):
     """
     Register a device token for push notifications.
@@ -115,7 +135,8 @@ async def register_device_token(
 @router.post("/test-push", response_model=APIResponse)
 async def test_push_notification(
     device_token: str = Body(..., embed=True),
-    current_user: TokenData = Depends(get_current_user)
+    current_user: TokenData = Depends(get_current_user),
+    push_notification_service: PushNotificationService = Depends(get_push_notification_service)
 ):
     """
     Send a test push notification to a device.
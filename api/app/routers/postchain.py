@@ -11,9 +11,12 @@ import asyncio
 import uuid
 import logging
 
+from app import metrics, resilience
 from app.config import Config
 from app.postchain.langchain_workflow import run_langchain_postchain_workflow # Import the new workflow
-from app.postchain.utils import validate_thread_id, recover_state
+from app.postchain.utils import validate_thread_id, recover_state, POSTCHAIN_PHASES
+from app.postchain.thread_store import ThreadStateStore
+from app.services.container import get_thread_store
 
 # Import ModelConfig from langchain_utils
 from app.langchain_utils import ModelConfig
@@ -26,10 +29,16 @@ class SimplePostChainRequest(BaseModel):
     user_query: str = Field(..., description="The user's input query")
     thread_id: str = Field(..., description="Thread ID for persistence") # Make thread_id required
     model_configs: Optional[Dict[str, ModelConfig]] = Field(None, description="Optional model configurations by phase")
+    stream_tokens: bool = Field(False, description="Stream token deltas for each phase as 'delta' events before its 'complete' event")
 
 class RecoverThreadRequest(BaseModel):
     thread_id: str = Field(..., description="Thread ID to recover")
 
+class ResumeThreadRequest(BaseModel):
+    thread_id: str = Field(..., description="Thread ID whose interrupted turn should be resumed")
+    model_configs: Optional[Dict[str, ModelConfig]] = Field(None, description="Optional model configurations by phase")
+    stream_tokens: bool = Field(False, description="Stream token deltas for each phase as 'delta' events before its 'complete' event")
+
 # Get config
 # def get_config(): # REMOVED - Config object no longer injected
 #     return Config()
@@ -39,11 +48,111 @@ router = APIRouter()
 @router.get("/health")
 async def health_check():
     """Check the health of the PostChain API."""
-    return {"status": "healthy", "message": "PostChain API is running"}
+    return {
+        "status": "degraded" if resilience.degraded() else "healthy",
+        "message": "PostChain API is running",
+        "metrics": metrics.snapshot(),
+        "dependencies": resilience.snapshot(),
+    }
+
+# How often to check whether the client is still connected while a phase runs
+DISCONNECT_POLL_INTERVAL = 0.5
+
+_STREAM_END = object()
+
+async def _cancel_on_disconnect(http_request: Request, task: asyncio.Task) -> None:
+    """Cancel task once the client behind http_request disconnects."""
+    while not task.done():
+        if await http_request.is_disconnected():
+            logging.getLogger(__name__).info("Client disconnected; cancelling PostChain workflow")
+            task.cancel()
+            return
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+async def _workflow_event_stream(
+    http_request: Request,
+    thread_id: str,
+    user_query: str,
+    current_user: TokenData,
+    model_configs: Optional[Dict[str, ModelConfig]] = None,
+    stream_tokens: bool = False,
+    resume: bool = False
+):
+    """Run the PostChain workflow and format its events as SSE lines.
+
+    The workflow runs in its own task so a client disconnect cancels it (and
+    with it every in-flight LLM, search and embedding call) even while no
+    event is being written.
+    """
+    # Recover message history using thread_id
+    state = await recover_state(thread_id)
+    message_history = state.messages if state else []
+
+    # Build model config overrides from request if provided
+    model_overrides = {}
+    if model_configs:
+        for phase, model_config_from_request in model_configs.items():
+            # Convert phase name to the override parameter name
+            # IMPORTANT: The model_config_from_request MUST now contain the API keys sent from the client
+            if phase in POSTCHAIN_PHASES:
+                 # Ensure the received object is actually a ModelConfig instance
+                 # (FastAPI should handle validation based on the request model)
+                model_overrides[f"{phase}_mc_override"] = model_config_from_request
+
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def _produce():
+        try:
+            async for event in run_langchain_postchain_workflow(
+                query=user_query,
+                thread_id=thread_id,
+                message_history=message_history, # Pass the recovered history
+                # Pass user information for rewards
+                user_id=current_user.user_id,
+                wallet_address=current_user.wallet_address,
+                **model_overrides, # Expand the model overrides as keyword arguments
+                stream_tokens=stream_tokens,
+                resume=resume,
+            ):
+                events.put_nowait(event)
+        finally:
+            events.put_nowait(_STREAM_END)
+
+    producer = asyncio.create_task(_produce(), name=f"postchain:{thread_id}")
+    watcher = asyncio.create_task(_cancel_on_disconnect(http_request, producer))
+    try:
+        while (event := await events.get()) is not _STREAM_END:
+            # Convert chunk to JSON and yield with newline for proper SSE formatting
+            json_data = json.dumps(event)
+            if event.get("status") == "delta":
+                # Token deltas are small and frequent; skip debug logging and the flush delay
+                yield f"data: {json_data}\n\n"
+                continue
+            # Enhanced debug logging
+            if "model_name" in event:
+                print(f"SERVER: Sending event with model_name: {event['model_name']}")
+                print(f"SERVER: JSON keys: {list(event.keys())}")
+                print(f"SERVER: Full JSON: {json_data}")
+            yield f"data: {json_data}\n\n"
+            await asyncio.sleep(0.01) # Add a small delay to allow flushing
+
+        await asyncio.wait({producer})
+        if producer.cancelled():
+            return
+        producer.result() # Surface workflow errors
+
+        # End of stream
+        yield "data: [DONE]\n\n"
+    finally:
+        # Reached early when the server closes the stream after a disconnect
+        watcher.cancel()
+        producer.cancel()
+        await asyncio.gather(producer, watcher, return_exceptions=True)
 
 @router.post("/langchain")
 async def process_simple_postchain(
     request: SimplePostChainRequest,
+    http_request: Request,
     # config: Config = Depends(get_config) # REMOVED - Config no longer injected
     current_user: TokenData = Depends(get_current_user)
 ):
@@ -64,52 +173,59 @@ async def process_simple_postchain(
 
     try:
         # Client-side streaming (SSE format)
-        async def stream_generator():
-            # Recover message history using thread_id
-            state = recover_state(thread_id)
-            message_history = state.messages if state else []
-
-            # Build model config overrides from request if provided
-            model_overrides = {}
-            if request.model_configs:
-                for phase, model_config_from_request in request.model_configs.items():
-                    # Convert phase name to the override parameter name
-                    # IMPORTANT: The model_config_from_request MUST now contain the API keys sent from the client
-                    if phase in ["action", "experience_vectors", "experience_web", "intention", "observation", "understanding", "yield"]:
-                         # Ensure the received object is actually a ModelConfig instance
-                         # (FastAPI should handle validation based on the request model)
-                        model_overrides[f"{phase}_mc_override"] = model_config_from_request
-            async for event in run_langchain_postchain_workflow(
-                query=request.user_query,
-                thread_id=thread_id,
-                message_history=message_history, # Pass the recovered history
-                # Pass user information for rewards
-                user_id=current_user.user_id,
-                wallet_address=current_user.wallet_address,
-                # config=config, # REMOVED
-                **model_overrides, # Expand the model overrides as keyword arguments
-            ):
-                # Convert chunk to JSON and yield with newline for proper SSE formatting
-                json_data = json.dumps(event)
-                # Enhanced debug logging
-                if "model_name" in event:
-                    print(f"SERVER: Sending event with model_name: {event['model_name']}")
-                    print(f"SERVER: JSON keys: {list(event.keys())}")
-                    print(f"SERVER: Full JSON: {json_data}")
-                yield f"data: {json_data}\n\n"
-                await asyncio.sleep(0.01) # Add a small delay to allow flushing
-
-            # End of stream
-            yield "data: [DONE]\n\n"
-
-        # Return streaming response
         return StreamingResponse(
-            stream_generator(),
+            _workflow_event_stream(
+                http_request=http_request,
+                thread_id=thread_id,
+                user_query=request.user_query,
+                current_user=current_user,
+                model_configs=request.model_configs,
+                stream_tokens=request.stream_tokens,
+            ),
             media_type="text/event-stream"
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing PostChain: {str(e)}")
 
+@router.post("/resume")
+async def resume_postchain(
+    request: ResumeThreadRequest,
+    http_request: Request,
+    current_user: TokenData = Depends(get_current_user),
+    thread_store: ThreadStateStore = Depends(get_thread_store)
+):
+    """
+    Resume an interrupted PostChain turn.
+
+    Phases checkpointed by the interrupted run are replayed from storage (their
+    events carry "replayed": true) and the workflow continues from the first
+    incomplete phase, so completed LLM calls are not paid for twice.
+    """
+    logger = logging.getLogger(__name__)
+    logger.info(f"Resuming PostChain for user: {current_user.user_id}, wallet: {current_user.wallet_address}")
+
+    try:
+        thread_id = validate_thread_id(request.thread_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    checkpoint = await thread_store.load_checkpoint(thread_id)
+    if not checkpoint:
+        raise HTTPException(status_code=404, detail="No interrupted turn to resume for this thread")
+
+    return StreamingResponse(
+        _workflow_event_stream(
+            http_request=http_request,
+            thread_id=thread_id,
+            user_query=checkpoint.query,
+            current_user=current_user,
+            model_configs=request.model_configs,
+            stream_tokens=request.stream_tokens,
+            resume=True,
+        ),
+        media_type="text/event-stream"
+    )
+
 @router.post("/recover")
 async def recover_thread(
     request: RecoverThreadRequest,
@@ -133,7 +249,7 @@ async def recover_thread(
         thread_id = validate_thread_id(request.thread_id)
 
         # Attempt to recover state
-        state = recover_state(thread_id)
+        state = await recover_state(thread_id)
 
         if state:
             # Return recovered state information
@@ -143,7 +259,9 @@ async def recover_thread(
                 "phase_states": state.phase_state,
                 "current_phase": state.current_phase,
                 "error": state.error,
-                "message_count": len(state.messages)
+                "message_count": len(state.messages),
+                # An interrupted turn with checkpointed phases can continue via /resume
+                "resumable": bool(state.phase_state)
             }
         else:
             # No state found
@@ -1,15 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Query
 from app.models.api import ThreadCreate, ThreadUpdate, ThreadResponse, APIResponse
-from app.database import DatabaseClient
-from app.config import Config
+from app.database import DatabaseClient, MAX_PAGE_SIZE
+from app.services.container import get_db
 from typing import Optional
 
 router = APIRouter()
-config = Config.from_env()
-db = DatabaseClient(config)
 
 @router.post("", response_model=APIResponse)
-async def create_thread(request: ThreadCreate):
+async def create_thread(request: ThreadCreate, db: DatabaseClient = Depends(get_db)):
     try:
         thread = await db.create_thread(request)
         return APIResponse(
@@ -20,7 +18,7 @@ async def create_thread(request: ThreadCreate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{thread_id}", response_model=APIResponse)
-async def get_thread(thread_id: str):
+async def get_thread(thread_id: str, db: DatabaseClient = Depends(get_db)):
     try:
         thread = await db.get_thread(thread_id)
         if not thread:
@@ -35,12 +33,30 @@ async def get_thread(thread_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{thread_id}/messages", response_model=APIResponse)
-async def get_thread_messages(thread_id: str, limit: int = 50, before: Optional[str] = None):
+async def get_thread_messages(
+    thread_id: str,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    cursor: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    db: DatabaseClient = Depends(get_db)
+):
+    """Page through a thread's messages by created_at; pass back next_cursor for the next page."""
     try:
-        messages = await db.get_thread_messages(thread_id, limit, before)
+        page = await db.get_thread_messages_page(
+            thread_id,
+            limit,
+            cursor=cursor,
+            before=before,
+            after=after,
+            descending=order == "desc"
+        )
         return APIResponse(
             success=True,
-            data={"messages": messages}
+            data=page
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
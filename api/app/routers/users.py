@@ -1,14 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Query
 from app.models.api import UserCreate, UserResponse, APIResponse
-from app.database import DatabaseClient
-from app.config import Config
+from app.database import DatabaseClient, MAX_PAGE_SIZE
+from app.services.container import get_db
+from typing import Optional
 
 router = APIRouter()
-config = Config.from_env()
-db = DatabaseClient(config)
 
 @router.post("", response_model=APIResponse)
-async def create_user(request: UserCreate):
+async def create_user(request: UserCreate, db: DatabaseClient = Depends(get_db)):
     try:
         user = await db.create_user(request)
         return APIResponse(
@@ -19,7 +18,7 @@ async def create_user(request: UserCreate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{user_id}", response_model=APIResponse)
-async def get_user(user_id: str):
+async def get_user(user_id: str, db: DatabaseClient = Depends(get_db)):
     try:
         user = await db.get_user(user_id)
         if not user:
@@ -34,12 +33,30 @@ async def get_user(user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{user_id}/threads", response_model=APIResponse)
-async def get_user_threads(user_id: str):
+async def get_user_threads(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    cursor: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    db: DatabaseClient = Depends(get_db)
+):
+    """Page through the threads a user owns by created_at; pass back next_cursor for the next page."""
     try:
-        threads = await db.get_user_threads(user_id)
+        page = await db.get_user_threads_page(
+            user_id,
+            limit,
+            cursor=cursor,
+            before=before,
+            after=after,
+            descending=order == "desc"
+        )
         return APIResponse(
             success=True,
-            data={"threads": threads}
+            data=page
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
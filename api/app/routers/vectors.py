@@ -1,32 +1,59 @@
-from fastapi import APIRouter, HTTPException
-from app.models.api import VectorSearchRequest, VectorStoreRequest, APIResponse
+from fastapi import APIRouter, HTTPException, Depends
+from app.models.api import VectorSearchRequest, VectorBatchSearchRequest, VectorStoreRequest, APIResponse
 from app.database import DatabaseClient
 from app.config import Config
+from app.resilience import DependencyUnavailable
+from app.services.container import get_db
 import logging
 
 logger = logging.getLogger("api")
 
 router = APIRouter()
 config = Config.from_env()
-db = DatabaseClient(config)
 
 @router.post("/search", response_model=APIResponse)
-async def search_vectors(request: VectorSearchRequest):
+async def search_vectors(request: VectorSearchRequest, db: DatabaseClient = Depends(get_db)):
     try:
         results = await db.search_similar(
             config.MESSAGES_COLLECTION,
             request.query_vector,
-            request.limit or config.SEARCH_LIMIT
+            request.limit or config.SEARCH_LIMIT,
+            score_threshold=request.score_threshold,
+            fields=request.fields,
+            filter=request.filter,
+            query_text=request.query_text,
+            mmr_lambda=request.mmr_lambda
         )
         return APIResponse(
             success=True,
             data={"results": results}
         )
+    except DependencyUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/search/batch", response_model=APIResponse)
+async def search_vectors_batch(request: VectorBatchSearchRequest, db: DatabaseClient = Depends(get_db)):
+    """Run several searches in one Qdrant request; results align with request.queries."""
+    if len(request.queries) > config.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.SEARCH_BATCH_MAX_QUERIES} queries per batch"
+        )
+    try:
+        results = await db.search_batch(config.MESSAGES_COLLECTION, request.queries)
+        return APIResponse(
+            success=True,
+            data={"results": results}
+        )
+    except DependencyUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/store", response_model=APIResponse)
-async def store_vector(request: VectorStoreRequest):
+async def store_vector(request: VectorStoreRequest, db: DatabaseClient = Depends(get_db)):
     try:
         await db.save_message({
             "content": request.content,
@@ -41,7 +68,7 @@ async def store_vector(request: VectorStoreRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{vector_id}", response_model=APIResponse)
-async def get_vector(vector_id: str):
+async def get_vector(vector_id: str, db: DatabaseClient = Depends(get_db)):
     """Get a specific vector by ID."""
     logger.info(f"Getting vvvvvvector with ID: {vector_id}")
     try:
@@ -21,6 +21,7 @@ import pysui_fastcrypto as pfc
 from app.config import Config
 from app.database import DatabaseClient
 from app.models.auth import TokenData
+from app.services.container import get_services
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,7 +35,6 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 challenges: Dict[str, Tuple[str, float]] = {}
 
 config = Config.from_env()
-db = DatabaseClient(config)
 
 class AuthService:
     """Service for authentication-related operations"""
@@ -171,8 +171,9 @@ class AuthService:
             return False
 
     @staticmethod
-    async def get_or_create_user(wallet_address: str) -> str:
+    async def get_or_create_user(wallet_address: str, db: Optional[DatabaseClient] = None) -> str:
         """Get user ID for wallet address or create a new user"""
+        db = db or get_services().db
         # Check if user exists with this wallet address (public key)
         users = await db.search_users_by_public_key(wallet_address)
 
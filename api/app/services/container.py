@@ -0,0 +1,140 @@
+"""
+Application-scoped service container.
+
+Builds each outbound client (Qdrant, Sui, APNs, LLM providers, embeddings, web search)
+and the thread state store once per process. The FastAPI lifespan in main.py starts and
+stops the container; routers receive services through the ``get_*``
+dependencies below, and non-request code (workflow phases, tools) calls
+``get_services()`` directly.
+"""
+
+import logging
+from typing import Optional
+
+import httpx
+
+from app.config import Config
+from app.database import DatabaseClient
+from app.postchain.model_pool import ModelPool
+from app.postchain.thread_store import ThreadStateStore, create_thread_store
+from app.services.embedding_service import EmbeddingService
+from app.services.notification_service import NotificationService
+from app.services.push_notification_service import PushNotificationService
+from app.services.rewards_service import RewardsService
+from app.services.sui_service import SuiService
+from app.tools.http_client import create_search_http_client
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """Holds the process-wide singletons shared by every request."""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.db = DatabaseClient(config)
+        self.thread_store: ThreadStateStore = create_thread_store(config)
+        self.embeddings = EmbeddingService(config)
+        self.model_pool = ModelPool(
+            max_size=config.MODEL_POOL_MAX_SIZE,
+            idle_ttl=config.MODEL_POOL_IDLE_TTL,
+            limits=httpx.Limits(
+                max_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.LLM_HTTP_MAX_KEEPALIVE
+            ),
+            timeout=config.LLM_HTTP_TIMEOUT
+        )
+        # Pooled keep-alive client shared by the Brave and Tavily search tools
+        self.search_http = create_search_http_client(config)
+        self.push_notification_service = PushNotificationService(db=self.db)
+        self.notification_service = NotificationService(
+            db=self.db,
+            push_notification_service=self.push_notification_service
+        )
+        # Sui needs a private key and an RPC round-trip, so it is built on first use
+        self._sui_service: Optional[SuiService] = None
+        self._rewards_service: Optional[RewardsService] = None
+
+    @property
+    def sui_service(self) -> SuiService:
+        if self._sui_service is None:
+            self._sui_service = SuiService()
+        return self._sui_service
+
+    @property
+    def rewards_service(self) -> RewardsService:
+        if self._rewards_service is None:
+            self._rewards_service = RewardsService(
+                sui_service=self.sui_service,
+                notification_service=self.notification_service,
+                db=self.db
+            )
+        return self._rewards_service
+
+    async def startup(self) -> None:
+        """Warm up clients that need network verification."""
+        await self.db.ensure_collections()
+        logger.info("Service container started")
+
+    async def shutdown(self) -> None:
+        """Release pooled connections."""
+        await self.embeddings.aclose()
+        await self.db.close()
+        await self.thread_store.close()
+        await self.model_pool.aclose()
+        await self.search_http.aclose()
+        logger.info("Service container stopped")
+
+
+_services: Optional[ServiceContainer] = None
+
+
+def init_services(config: Optional[Config] = None) -> ServiceContainer:
+    """Create the process-wide container (idempotent)."""
+    global _services
+    if _services is None:
+        _services = ServiceContainer(config or Config.from_env())
+    return _services
+
+
+def get_services() -> ServiceContainer:
+    """Return the process-wide container, creating it on first use outside the app lifespan."""
+    return _services or init_services()
+
+
+async def shutdown_services() -> None:
+    """Stop and drop the process-wide container."""
+    global _services
+    if _services is not None:
+        await _services.shutdown()
+        _services = None
+
+
+# --- FastAPI dependencies ---
+
+def get_db() -> DatabaseClient:
+    return get_services().db
+
+
+def get_thread_store() -> ThreadStateStore:
+    return get_services().thread_store
+
+
+def get_embedding_service() -> EmbeddingService:
+    return get_services().embeddings
+
+
+def get_sui_service() -> SuiService:
+    return get_services().sui_service
+
+
+def get_notification_service() -> NotificationService:
+    return get_services().notification_service
+
+
+def get_push_notification_service() -> PushNotificationService:
+    return get_services().push_notification_service
+
+
+def get_rewards_service() -> RewardsService:
+    return get_services().rewards_service
@@ -0,0 +1,388 @@
+"""
+Embedding service with a two-tier cache.
+
+Every embedding in the API goes through ``EmbeddingService.embed_query``.
+Vectors are cached by (model, sha256 of normalized text): first in a bounded
+in-memory LRU, then in an on-disk store that survives restarts. The disk tier
+is one append-only float32 file per model, read through a memory map, plus a
+text index of ``<key>\\t<row>`` lines.
+
+Cache misses go through ``EmbeddingBatcher``, which coalesces texts requested
+within a few milliseconds of each other into one ``aembed_documents`` call.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_openai import OpenAIEmbeddings
+
+from app import metrics
+from app.config import Config
+from app.resilience import get_dependency
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a text for embedding and cache keys."""
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def embedding_cache_key(model: str, normalized_text: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalized_text}".encode("utf-8")).hexdigest()
+
+
+class DiskEmbeddingStore:
+    """Append-only float32 vector file with a key -> row index, for one model.
+
+    Files in ``directory``:
+        meta.json    -- {"dim": <vector dimension>}
+        vectors.f32  -- rows of ``dim`` little-endian float32 values
+        index.tsv    -- one ``<key>\\t<row>`` line per stored vector
+        .lock        -- flock()ed around appends; several processes may share the directory
+
+    Each appended row's number is taken from the vector file's size under the
+    lock, so concurrent writers never record the same row for different keys.
+    Rows appended by other processes are picked up on restart.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.dim: Optional[int] = None
+        self._index: Dict[str, int] = {}
+        self._rows = 0
+        self._mmap: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.f32")
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "index.tsv")
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock shared with other processes using the same directory."""
+        with open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _complete_rows(self) -> int:
+        """Number of whole rows in the vector file, dropping a partial row left by a crash.
+
+        Must be called with the file lock held.
+        """
+        row_bytes = self.dim * 4
+        size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        if size % row_bytes:
+            size -= size % row_bytes
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(size)
+        return size // row_bytes
+
+    def _load(self) -> None:
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, "r") as f:
+            self.dim = json.load(f)["dim"]
+
+        with self._file_lock():
+            self._rows = self._complete_rows()
+
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r") as f:
+                for line in f:
+                    key, _, row = line.rstrip("\n").partition("\t")
+                    if row.isdigit() and int(row) < self._rows:
+                        self._index[key] = int(row)
+        logger.info(f"Loaded {len(self._index)} cached embeddings from {self.directory}")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> Optional[List[float]]:
+        row = self._index.get(key)
+        if row is None:
+            return None
+        with self._lock:
+            if self._mmap is None or self._mmap.shape[0] <= row:
+                self._mmap = np.memmap(self._vectors_path, dtype="<f4", mode="r", shape=(self._rows, self.dim))
+            return self._mmap[row].tolist()
+
+    def put(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            if key in self._index:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            with self._file_lock():
+                if self.dim is None:
+                    # Another process may have created the store since we loaded
+                    if os.path.exists(self._meta_path):
+                        with open(self._meta_path, "r") as f:
+                            self.dim = json.load(f)["dim"]
+                    else:
+                        self.dim = len(vector)
+                        with open(self._meta_path, "w") as f:
+                            json.dump({"dim": self.dim}, f)
+                if len(vector) != self.dim:
+                    logger.warning(f"Not caching embedding of dimension {len(vector)} in store of dimension {self.dim}")
+                    return
+
+                row = self._complete_rows()
+                with open(self._vectors_path, "ab") as f:
+                    f.write(np.asarray(vector, dtype="<f4").tobytes())
+                # The index line is written last, so a crash never points at a missing row
+                with open(self._index_path, "a") as f:
+                    f.write(f"{key}\t{row}\n")
+            self._rows = row + 1
+            self._index[key] = row
+
+
+class EmbeddingCache:
+    """In-memory LRU in front of an optional per-model disk store."""
+
+    def __init__(self, max_entries: int = 10000, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._disk: Dict[str, DiskEmbeddingStore] = {}
+
+    def _disk_store(self, model: str) -> Optional[DiskEmbeddingStore]:
+        if not self.directory:
+            return None
+        store = self._disk.get(model)
+        if store is None:
+            safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model)
+            store = self._disk[model] = DiskEmbeddingStore(os.path.join(self.directory, safe_name))
+        return store
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, model: str, key: str) -> Optional[List[float]]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            metrics.increment("embedding_cache_hits", tier="memory")
+            return vector
+
+        disk = self._disk_store(model)
+        vector = disk.get(key) if disk is not None else None
+        if vector is not None:
+            self._remember(key, vector)
+            metrics.increment("embedding_cache_hits", tier="disk")
+            return vector
+
+        metrics.increment("embedding_cache_misses")
+        return None
+
+    async def put(self, model: str, key: str, vector: List[float]) -> None:
+        self._remember(key, vector)
+        disk = self._disk_store(model)
+        if disk is not None:
+            try:
+                await asyncio.to_thread(disk.put, key, vector)
+            except OSError as e:
+                logger.error(f"Failed to persist embedding to disk cache: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": sum(len(store) for store in self._disk.values()),
+        }
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text embedding requests into batch calls.
+
+    A batch is sent when it reaches ``max_batch_size`` texts or ``max_wait``
+    seconds after its first text arrived, whichever comes first. At most
+    ``max_concurrent_batches`` batches are in flight at once for the API key
+    behind ``embed_documents``. Identical keys requested while a batch is
+    pending or in flight share one result.
+    """
+
+    def __init__(
+        self,
+        embed_documents: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        max_concurrent_batches: int = 4
+    ):
+        self._embed_documents = embed_documents
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_concurrent_batches = max_concurrent_batches
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[str, str]] = []
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.texts = 0
+
+    def _bind_loop(self) -> None:
+        # Futures and the semaphore belong to one event loop; start fresh if it changed
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = []
+            self._futures = {}
+            self._timer = None
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+            self._tasks = set()
+
+    async def submit(self, key: str, text: str) -> List[float]:
+        """Queue a text for the next batch and wait for its vector.
+
+        Args:
+            key: Cache key of the text; duplicate keys share one request
+            text: Normalized text to embed
+
+        Returns:
+            The embedding vector
+        """
+        self._bind_loop()
+        future = self._futures.get(key)
+        if future is None:
+            future = self._loop.create_future()
+            self._futures[key] = future
+            self._pending.append((key, text))
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = self._loop.call_later(self.max_wait, self._flush)
+        # Shield the shared future so one cancelled caller doesn't fail the others
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = self._loop.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, str]]) -> None:
+        keys = [key for key, _ in batch]
+        try:
+            async with self._semaphore:
+                vectors = await self._embed_documents([text for _, text in batch])
+            if len(vectors) != len(batch):
+                raise ValueError(f"Embedding provider returned {len(vectors)} vectors for {len(batch)} texts")
+            self.batches += 1
+            self.texts += len(batch)
+            metrics.increment("embedding_batches")
+            metrics.increment("embedding_batch_texts", len(batch))
+            for key, vector in zip(keys, vectors):
+                future = self._futures.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(vector)
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(batch)} texts failed: {e}")
+            for key in keys:
+                future = self._futures.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+        except asyncio.CancelledError:
+            for key in keys:
+                future = self._futures.pop(key, None)
+                if future is not None:
+                    future.cancel()
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "pending": len(self._pending),
+            "in_flight": len(self._tasks),
+        }
+
+    async def aclose(self) -> None:
+        """Send anything still queued and wait for in-flight batches."""
+        if self._loop is not asyncio.get_running_loop():
+            return
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class EmbeddingService:
+    """Shared embeddings client with caching; one per process."""
+
+    def __init__(self, config: Config, cache: Optional[EmbeddingCache] = None):
+        self.config = config
+        self.model = config.EMBEDDING_MODEL
+        self.cache = cache or EmbeddingCache(
+            max_entries=config.EMBEDDING_CACHE_SIZE,
+            directory=config.EMBEDDING_CACHE_DIR if config.EMBEDDING_CACHE_PERSIST else None
+        )
+        self._embeddings: Optional[OpenAIEmbeddings] = None
+        self.dependency = get_dependency("embeddings", config)
+        self.batcher = EmbeddingBatcher(
+            lambda texts: self.dependency.call(self.embeddings.aembed_documents, texts),
+            max_batch_size=config.EMBEDDING_BATCH_SIZE,
+            max_wait=config.EMBEDDING_BATCH_MAX_WAIT_MS / 1000,
+            max_concurrent_batches=config.EMBEDDING_BATCH_MAX_CONCURRENCY
+        )
+
+    @property
+    def embeddings(self) -> OpenAIEmbeddings:
+        # Built on first use so the service can exist without an API key (e.g. in tests)
+        if self._embeddings is None:
+            self._embeddings = OpenAIEmbeddings(model=self.model, api_key=self.config.OPENAI_API_KEY)
+        return self._embeddings
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Embed a single text, serving repeated texts from the cache.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            The embedding vector
+        """
+        normalized = normalize_text(text)
+        key = embedding_cache_key(self.model, normalized)
+        vector = self.cache.get(self.model, key)
+        if vector is not None:
+            return vector
+
+        vector = await self.batcher.submit(key, normalized)
+        await self.cache.put(self.model, key, vector)
+        return vector
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"cache": self.cache.stats(), "batcher": self.batcher.stats()}
+
+    async def aclose(self) -> None:
+        await self.batcher.aclose()
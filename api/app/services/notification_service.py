@@ -14,11 +14,20 @@ logger = logging.getLogger("notification_service")
 class NotificationService:
     """Service for recording in-app notifications."""
 
-    def __init__(self):
-        """Initialize the notification service."""
+    def __init__(
+        self,
+        db: Optional[DatabaseClient] = None,
+        push_notification_service: Optional[PushNotificationService] = None
+    ):
+        """Initialize the notification service.
+
+        Args:
+            db: Shared database client (a new one is created if omitted)
+            push_notification_service: Shared push service (a new one is created if omitted)
+        """
         self.config = Config.from_env()
-        self.db = DatabaseClient(self.config)
-        self.push_notification_service = PushNotificationService()
+        self.db = db or DatabaseClient(self.config)
+        self.push_notification_service = push_notification_service or PushNotificationService(db=self.db)
 
     async def send_citation_notification(self, vector_id: str, citing_wallet_address: str) -> Dict[str, Any]:
         """
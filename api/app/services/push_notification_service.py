@@ -6,10 +6,12 @@ import logging
 import json
 import http.client
 import jwt
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta, UTC
+from qdrant_client import models
 from app.database import DatabaseClient
 from app.config import Config
+from app.resilience import get_dependency
 
 # Configure logging
 logger = logging.getLogger("push_notification_service")
@@ -17,10 +19,14 @@ logger = logging.getLogger("push_notification_service")
 class PushNotificationService:
     """Service for sending push notifications to mobile devices."""
 
-    def __init__(self):
-        """Initialize the push notification service."""
+    def __init__(self, db: Optional[DatabaseClient] = None):
+        """Initialize the push notification service.
+
+        Args:
+            db: Shared database client (a new one is created if omitted)
+        """
         self.config = Config.from_env()
-        self.db = DatabaseClient(self.config)
+        self.db = db or DatabaseClient(self.config)
         
         # Apple Push Notification service configuration
         self.apns_key_id = self.config.APNS_KEY_ID
@@ -28,6 +34,8 @@ class PushNotificationService:
         self.apns_auth_key = self.config.APNS_AUTH_KEY
         self.apns_topic = self.config.APNS_TOPIC  # Bundle ID of your app
         self.apns_production = not self.config.DEBUG  # Use production APNs in non-debug mode
+        # APNs calls are blocking, so they run in worker threads behind a breaker
+        self.dependency = get_dependency("apns", self.config)
         
         # Cache the JWT token for 50 minutes (APNs tokens are valid for 60 minutes)
         self.apns_token = None
@@ -104,7 +112,8 @@ class PushNotificationService:
                     ]
                 ),
                 limit=100,  # Get up to 100 device tokens
-                with_payload=True
+                with_payload=True,
+                timeout=self.db.read_timeout
             )
             
             points, _ = search_result
@@ -160,9 +169,6 @@ class PushNotificationService:
             # Get the APNs token
             token = self._get_apns_token()
             
-            # Set up the connection
-            conn = http.client.HTTPSConnection(apns_host, 443)
-            
             # Set up the headers
             headers = {
                 "authorization": f"bearer {token}",
@@ -172,32 +178,22 @@ class PushNotificationService:
             }
             
             # Send the notification
-            conn.request(
-                "POST",
-                f"/3/device/{device_token}",
-                payload_json,
-                headers
+            status, response_data = await self.dependency.run_sync(
+                self._post, apns_host, f"/3/device/{device_token}", payload_json, headers
             )
             
-            # Get the response
-            response = conn.getresponse()
-            response_data = response.read().decode("utf-8")
-            
-            # Close the connection
-            conn.close()
-            
             # Check the response
-            if response.status == 200:
+            if status == 200:
                 logger.info(f"Successfully sent push notification to device {device_token}")
                 return {
                     "success": True,
-                    "status_code": response.status
+                    "status_code": status
                 }
             else:
-                logger.error(f"Failed to send push notification to device {device_token}: {response.status} {response_data}")
+                logger.error(f"Failed to send push notification to device {device_token}: {status} {response_data}")
                 return {
                     "success": False,
-                    "status_code": response.status,
+                    "status_code": status,
                     "response": response_data
                 }
         except Exception as e:
@@ -207,6 +203,24 @@ class PushNotificationService:
                 "error": str(e)
             }
 
+    def _post(self, host: str, path: str, body: str, headers: Dict[str, str]) -> Tuple[int, str]:
+        """
+        Blocking APNs request; server errors raise so they count against the breaker.
+        
+        Returns:
+            Response status and body
+        """
+        conn = http.client.HTTPSConnection(host, 443, timeout=self.config.APNS_CALL_DEADLINE)
+        try:
+            conn.request("POST", path, body, headers)
+            response = conn.getresponse()
+            response_data = response.read().decode("utf-8")
+        finally:
+            conn.close()
+        if response.status >= 500:
+            raise http.client.HTTPException(f"APNs returned {response.status}: {response_data}")
+        return response.status, response_data
+
     async def send_citation_notification(self, wallet_address: str, vector_id: str, citing_wallet_address: str) -> Dict[str, Any]:
         """
         Send a citation notification to a wallet address.
@@ -8,6 +8,8 @@ import math
 from typing import Dict, List, Optional, Tuple, Any
 import asyncio
 
+from app.config import Config
+from app.database import DatabaseClient
 from app.services.sui_service import SuiService
 from app.services.notification_service import NotificationService
 
@@ -16,9 +18,15 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class RewardsService:
-    def __init__(self):
-        self.sui_service = SuiService()
-        self.notification_service = NotificationService()
+    def __init__(
+        self,
+        sui_service: Optional[SuiService] = None,
+        notification_service: Optional[NotificationService] = None,
+        db: Optional[DatabaseClient] = None
+    ):
+        self.db = db or DatabaseClient(Config.from_env())
+        self.sui_service = sui_service or SuiService()
+        self.notification_service = notification_service or NotificationService(db=self.db)
 
     async def calculate_novelty_reward(self, max_similarity: float) -> int:
         """
@@ -166,10 +174,7 @@ class RewardsService:
 
         # Issue rewards to the authors of the cited content
         if citation_ids:
-            from app.database import DatabaseClient
-            from app.config import Config
-
-            db = DatabaseClient(Config.from_env())
+            db = self.db
             author_rewards = []
             total_reward_amount = 0
 
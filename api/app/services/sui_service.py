@@ -1,5 +1,6 @@
 import logging
 from app.config import Config
+from app.resilience import get_dependency
 from pysui import SuiConfig
 from pysui.sui.sui_clients.sync_client import SuiClient
 from pysui.sui.sui_types.address import SuiAddress
@@ -37,6 +38,9 @@ class SuiService:
                 prv_keys=[deployer_key]
             )
             self.client = SuiClient(config=self.config)
+            # pysui's client is blocking, so RPC calls run in worker threads behind a breaker
+            self.dependency = get_dependency("sui", config)
+            self.mint_dependency = get_dependency("sui_mint", config)
             self.signer = keypair_from_keystring(deployer_key)
 
             # Store deployed CHOIR contract info based on network
@@ -96,22 +100,26 @@ class SuiService:
         print(f"SUI SERVICE: Minting {amount/1_000_000_000} CHOIR to {recipient_address}")
 
         try:
-            # Create transaction
-            txn = SuiTransaction(client=self.client)
-
-            # Add move call command with proper argument types
-            txn.move_call(
-                target=f"{self.package_id}::choir::mint",
-                arguments=[
-                    ObjectID(self.treasury_cap_id),    # Treasury cap as ObjectID
-                    SuiU64(amount),                    # Amount as SuiU64
-                    SuiAddress(recipient_address)      # Recipient as SuiAddress
-                ],
-                type_arguments=[]
-            )
-
-            # Execute transaction
-            result = txn.execute()
+            def submit():
+                # Building the transaction fetches gas and object refs, so it
+                # runs in the worker thread along with execution
+                txn = SuiTransaction(client=self.client)
+
+                # Add move call command with proper argument types
+                txn.move_call(
+                    target=f"{self.package_id}::choir::mint",
+                    arguments=[
+                        ObjectID(self.treasury_cap_id),    # Treasury cap as ObjectID
+                        SuiU64(amount),                    # Amount as SuiU64
+                        SuiAddress(recipient_address)      # Recipient as SuiAddress
+                    ],
+                    type_arguments=[]
+                )
+                return txn.execute()
+
+            # One mint at a time and no deadline: abandoning a submitted mint
+            # wouldn't stop it landing on chain
+            result = await self.mint_dependency.run_sync(submit)
 
             # Log the full result for debugging
             logger.info(f"Transaction result: {result.result_data}")
@@ -168,7 +176,7 @@ class SuiService:
                 "error": error_msg
             }
 
-    def get_balance(self, address: str):
+    async def get_balance(self, address: str):
         """Get SUI balance for address"""
         try:
             # Create a builder for getting all coin balances
@@ -176,7 +184,7 @@ class SuiService:
                 owner=SuiAddress(address)
             )
             # Execute the builder through the client
-            result = self.client.execute(builder)
+            result = await self.dependency.run_sync(self.client.execute, builder)
 
             if result.is_ok():
                 balances = result.result_data
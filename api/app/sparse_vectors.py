@@ -0,0 +1,126 @@
+"""
+BM25-style sparse vectors for hybrid (dense + keyword) search.
+
+Documents are tokenized locally, each token is hashed to a sparse index and
+weighted by BM25's saturated term frequency with length normalization. The
+IDF half of BM25 is applied by Qdrant at query time (``Modifier.IDF`` on the
+sparse vector), so queries only carry a weight of 1 per distinct token and
+nothing needs a corpus-wide vocabulary.
+
+Sparse vectors live next to the dense embedding in the messages collection
+under SPARSE_VECTOR_NAME. Collections created before hybrid search get them
+via ``migrate-collection`` (new collection) or ``backfill-sparse`` (in place,
+once the collection has the sparse vector config).
+"""
+
+import logging
+import re
+import zlib
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from qdrant_client import models
+
+if TYPE_CHECKING:
+    from app.database import DatabaseClient
+
+logger = logging.getLogger(__name__)
+
+SPARSE_VECTOR_NAME = "text"
+# BM25 parameters; AVG_DOC_TOKENS approximates the corpus's mean document length
+BM25_K1 = 1.2
+BM25_B = 0.75
+AVG_DOC_TOKENS = 256
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i if in into is it its me my not of on or so that the "
+    "their them then there these they this to was we were what when where which who will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords (names, numbers and IDs are kept whole)."""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def _index(token: str) -> int:
+    # Stable across processes, unlike hash()
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def _sparse(weights: Dict[int, float]) -> models.SparseVector:
+    indices = sorted(weights)
+    return models.SparseVector(indices=indices, values=[weights[i] for i in indices])
+
+
+def encode_document(text: str) -> models.SparseVector:
+    """BM25 term-frequency weights of a stored text."""
+    counts = Counter(tokenize(text))
+    length_norm = 1 - BM25_B + BM25_B * sum(counts.values()) / AVG_DOC_TOKENS
+    weights: Dict[int, float] = {}
+    for token, tf in counts.items():
+        index = _index(token)
+        weights[index] = weights.get(index, 0.0) + tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+    return _sparse(weights)
+
+
+def encode_query(text: str) -> Optional[models.SparseVector]:
+    """Query side of BM25: one unit weight per distinct token; None if nothing is searchable."""
+    indices = {_index(token) for token in tokenize(text)}
+    if not indices:
+        return None
+    return _sparse({index: 1.0 for index in indices})
+
+
+def sparse_vectors_config() -> Dict[str, models.SparseVectorParams]:
+    return {SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+
+
+def dense_vector(vector: Any) -> Any:
+    """The unnamed dense vector of a point whose vectors may be returned by name."""
+    return vector.get("") if isinstance(vector, dict) else vector
+
+
+async def backfill_sparse_vectors(db: "DatabaseClient", batch_size: int = 256) -> Dict[str, Any]:
+    """Add sparse vectors to messages that were stored without one.
+
+    Args:
+        db: Database client
+        batch_size: Points per scroll/update page
+
+    Returns:
+        {"collection", "scanned", "updated"}
+    """
+    collection = db.config.MESSAGES_COLLECTION
+    info = await db.admin_client.get_collection(collection)
+    if SPARSE_VECTOR_NAME not in (info.config.params.sparse_vectors or {}):
+        raise ValueError(
+            f"'{collection}' has no '{SPARSE_VECTOR_NAME}' sparse vector config; "
+            "rebuild it with migrate-collection, which also computes the sparse vectors"
+        )
+    scanned = updated = 0
+    offset = None
+    while True:
+        points, offset = await db.admin_client.scroll(
+            collection_name=collection,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["content"],
+            with_vectors=[SPARSE_VECTOR_NAME]
+        )
+        scanned += len(points)
+        missing = [
+            models.PointVectors(
+                id=point.id,
+                vector={SPARSE_VECTOR_NAME: encode_document((point.payload or {}).get("content", ""))}
+            )
+            for point in points
+            if SPARSE_VECTOR_NAME not in (point.vector or {})
+        ]
+        if missing:
+            await db.admin_client.update_vectors(collection_name=collection, points=missing, wait=True)
+            updated += len(missing)
+        if offset is None:
+            logger.info(f"Backfilled sparse vectors for {updated} of {scanned} points in {collection}")
+            return {"collection": collection, "scanned": scanned, "updated": updated}
@@ -4,12 +4,14 @@ Brave Search tool implementation.
 import os
 import json
 import logging
-import asyncio
-import requests
 from typing import Dict, Any, List, Optional, Union
 
+import httpx
+
 from app.config import Config
+from app.resilience import get_dependency
 from app.tools.base import BaseTool
+from app.tools.http_client import is_retryable, send_with_retries
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +36,8 @@ class BraveSearchTool(BaseTool):
         country: Optional[str] = None,
         search_lang: Optional[str] = None,
         name: Optional[str] = None,
-        description: Optional[str] = None
+        description: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None
     ):
         """
         Initialize the Brave Search tool.
@@ -47,6 +50,7 @@ class BraveSearchTool(BaseTool):
             search_lang: Optional language code (e.g., 'en', 'es', 'fr')
             name: Optional custom name for the tool
             description: Optional custom description for the tool
+            http_client: Optional HTTP client (defaults to the shared pooled search client)
         """
         self.config = config or Config()
 
@@ -64,6 +68,8 @@ class BraveSearchTool(BaseTool):
         self.max_results = max_results
         self.country = country
         self.search_lang = search_lang
+        self.dependency = get_dependency("brave_search", self.config)
+        self._http_client = http_client
 
         # Initialize the base class
         super().__init__(name=name, description=description)
@@ -117,35 +123,12 @@ class BraveSearchTool(BaseTool):
             if self.search_lang:
                 params["search_lang"] = self.search_lang
 
-            # Add rate limit handling with exponential backoff
-            max_retries = 3
-            backoff_factor = 1.5
-            current_retry = 0
-
-            while current_retry <= max_retries:
-                # Make the request
-                response = requests.get(self.API_ENDPOINT, headers=headers, params=params)
-
-                # Check if we hit a rate limit
-                if response.status_code == 429:
-                    current_retry += 1
-                    if current_retry > max_retries:
-                        logger.warning(f"Brave Search rate limit exceeded after {max_retries} retries")
-                        break
-
-                    # Get retry-after header if available, otherwise use exponential backoff
-                    retry_after = response.headers.get('Retry-After')
-                    if retry_after and retry_after.isdigit():
-                        wait_time = int(retry_after)
-                    else:
-                        wait_time = backoff_factor ** current_retry
-
-                    logger.info(f"Rate limit hit, retrying in {wait_time} seconds (attempt {current_retry}/{max_retries})")
-                    await asyncio.sleep(wait_time)
-                    continue
-
-                # Break the loop if we got a non-429 response
-                break
+            # Rate-limited requests are retried after a non-blocking pause (honouring Retry-After)
+            response = await send_with_retries(
+                lambda: self.dependency.call(self._get, headers, params),
+                max_retries=self.config.SEARCH_MAX_RETRIES,
+                max_delay=self.config.SEARCH_MAX_RETRY_DELAY
+            )
 
             # Check if the request was successful
             if response.status_code != 200:
@@ -192,6 +175,21 @@ class BraveSearchTool(BaseTool):
             }
             return json.dumps(error_response, ensure_ascii=False)
 
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            # Imported here because the container itself imports this package
+            from app.services.container import get_services
+            return get_services().search_http
+        return self._http_client
+
+    async def _get(self, headers: Dict[str, str], params: Dict[str, Any]) -> httpx.Response:
+        """One API request; server errors raise so they count against the breaker (unless retryable)."""
+        response = await self.http.get(self.API_ENDPOINT, headers=headers, params=params)
+        if response.status_code >= 500 and not is_retryable(response):
+            response.raise_for_status()
+        return response
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert the tool to a dictionary for serialization."""
         base_dict = super().to_dict()
@@ -0,0 +1,93 @@
+"""
+Shared async HTTP client for the web search tools.
+
+Brave and Tavily requests go through one pooled ``httpx.AsyncClient`` (owned
+by the service container), so queries reuse keep-alive (HTTP/2 when
+available) connections instead of opening a new one each time, and never
+block the event loop. Rate-limited responses (and 503s that say when to come
+back) are retried with non-blocking backoff that honours ``Retry-After``.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, UTC
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying after a pause
+RETRY_STATUSES = {429}
+# Retried only when the server says when to come back (a bare 503 is an outage)
+RETRY_AFTER_STATUSES = {503}
+
+
+def create_search_http_client(config: Config) -> httpx.AsyncClient:
+    """Build the pooled client shared by the web search tools."""
+    return httpx.AsyncClient(
+        http2=config.SEARCH_HTTP2,
+        limits=httpx.Limits(
+            max_connections=config.SEARCH_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.SEARCH_HTTP_MAX_KEEPALIVE
+        ),
+        timeout=httpx.Timeout(config.WEB_SEARCH_CALL_DEADLINE, connect=config.SEARCH_CONNECT_TIMEOUT)
+    )
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Delay requested by a ``Retry-After`` header (seconds or HTTP date), if any."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(response: httpx.Response) -> bool:
+    """Whether a response asks the client to pause and try again."""
+    if response.status_code in RETRY_STATUSES:
+        return True
+    return response.status_code in RETRY_AFTER_STATUSES and "Retry-After" in response.headers
+
+
+async def send_with_retries(
+    send: Callable[[], Awaitable[httpx.Response]],
+    max_retries: int = 3,
+    backoff_factor: float = 1.5,
+    max_delay: float = 5.0
+) -> httpx.Response:
+    """Send a request, retrying responses that ask for a pause (see ``is_retryable``).
+
+    Args:
+        send: Coroutine function issuing the request once
+        max_retries: Retries after the first attempt
+        backoff_factor: Base of the exponential backoff used without ``Retry-After``
+        max_delay: Longest pause between attempts (seconds)
+
+    Returns:
+        The first response not asking for a retry, or the last one once retries run out
+    """
+    attempt = 0
+    while True:
+        response = await send()
+        retryable = is_retryable(response)
+        if not retryable or attempt >= max_retries:
+            if retryable:
+                logger.warning(f"Still getting {response.status_code} after {max_retries} retries: {response.request.url.host}")
+            return response
+        attempt += 1
+        delay = retry_after_seconds(response)
+        if delay is None:
+            delay = backoff_factor ** attempt
+        delay = min(delay, max_delay)
+        logger.info(f"{response.status_code} from {response.request.url.host}; retrying in {delay:.1f}s (attempt {attempt}/{max_retries})")
+        await asyncio.sleep(delay)
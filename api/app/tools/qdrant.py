@@ -4,6 +4,7 @@ This module provides tools for interacting with the Qdrant vector database,
 allowing models to search for semantically similar content and store new information.
 """
 
+import json
 import uuid
 import logging
 from typing import Dict, List, Optional, Any
@@ -11,11 +12,10 @@ from typing import Dict, List, Optional, Any
 from langchain_core.tools import tool
 
 from app.config import Config
-from app.database import DatabaseClient
+from app.resilience import DependencyUnavailable
+from app.services.container import get_services
 
-# Get database client
 config = Config()
-db_client = DatabaseClient(config)
 
 # Configure logging
 logger = logging.getLogger("qdrant_tool")
@@ -33,18 +33,20 @@ async def qdrant_search(query: str, collection: str = None, limit: int = 5) -> s
     Returns:
         Text summary of the search results
     """
-    from langchain_openai import OpenAIEmbeddings
-
     # Use default collection if not specified
     if collection is None:
         collection = config.MESSAGES_COLLECTION
 
-    # Generate embedding for the query
-    embeddings = OpenAIEmbeddings(model=config.EMBEDDING_MODEL)
-    query_vector = await embeddings.aembed_query(query)
+    try:
+        # Generate embedding for the query
+        query_vector = await get_services().embeddings.embed_query(query)
 
-    # Search for similar vectors
-    results = await db_client.search_vectors(query_vector, limit=limit)
+        # Search for similar vectors
+        results = await get_services().db.search_vectors(query_vector, limit=limit, fields=("content", "metadata"), query_text=query)
+    except DependencyUnavailable as e:
+        # Degrade to "no results" rather than failing the model's tool call
+        logger.warning(f"Qdrant search skipped: {e}")
+        results = []
 
 
 
@@ -55,7 +57,7 @@ async def qdrant_search(query: str, collection: str = None, limit: int = 5) -> s
         if content is not None and content not in seen_content:
             unique_results_list.append({
                 "content": content,
-                "score": r.get("score", 0.0),
+                "score": r.get("similarity", 0.0),
                 "metadata": r.get("metadata", {}),
                 "provider": "qdrant" # Add provider field
             })
@@ -83,22 +85,19 @@ async def qdrant_store(content: str, collection: str = None, metadata: Dict[str,
     Returns:
         Confirmation message with the ID of the stored content
     """
-    from langchain_openai import OpenAIEmbeddings
-
     # Use default collection if not specified
     if collection is None:
         collection = config.MESSAGES_COLLECTION
 
     # Generate embedding for the content
-    embeddings = OpenAIEmbeddings(model=config.EMBEDDING_MODEL)
-    content_vector = await embeddings.aembed_query(content)
+    content_vector = await get_services().embeddings.embed_query(content)
 
     # Prepare metadata
     if metadata is None:
         metadata = {}
 
     # Store the vector
-    result = await db_client.store_vector(content, content_vector, metadata)
+    result = await get_services().db.store_vector(content, content_vector, metadata)
 
     return f"Successfully stored in the vector database with ID: {result['id']}"
 
@@ -119,7 +118,7 @@ async def qdrant_delete(vector_id: str, collection: str = None) -> str:
         collection = config.MESSAGES_COLLECTION
 
     # Delete the vector
-    result = await db_client.delete_vector(vector_id, collection)
+    result = await get_services().db.delete_vector(vector_id, collection)
 
     if result["status"] == "success":
         return f"Successfully deleted vector with ID: {result['id']}"
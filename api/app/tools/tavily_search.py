@@ -3,18 +3,14 @@ Tavily search tool implementation.
 """
 import os
 import logging
-import asyncio
-import json
 from typing import Dict, Any, List, Optional, Union
 
-# Conditional import since langchain_community might not be installed
-try:
-    from langchain_community.tools.tavily_search import TavilySearchResults as LCTavilySearch
-except ImportError:
-    LCTavilySearch = None
+import httpx
 
 from .base import BaseTool
+from .http_client import is_retryable, send_with_retries
 from app.config import Config
+from app.resilience import get_dependency
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +22,11 @@ class TavilySearchTool(BaseTool):
     name = "tavily_search"
     description = "Search the web for current information. Input should be a search query."
 
+    # Tavily Search API endpoint
+    API_ENDPOINT = "https://api.tavily.com/search"
+    # Most results the API returns per query
+    MAX_API_RESULTS = 20
+
     def __init__(
         self,
         config: Config = None,
@@ -33,7 +34,8 @@ class TavilySearchTool(BaseTool):
         include_raw_content: bool = True,
         include_images: bool = False,
         k: int = 40,
-        max_results_length: int = 2000
+        max_results_length: int = 2000,
+        http_client: Optional[httpx.AsyncClient] = None
     ):
         """Initialize the Tavily search tool.
 
@@ -44,6 +46,7 @@ class TavilySearchTool(BaseTool):
             include_images: Whether to include image links
             k: Number of results to return
             max_results_length: Maximum length of formatted results
+            http_client: Optional HTTP client (defaults to the shared pooled search client)
         """
         super().__init__()
 
@@ -64,21 +67,30 @@ class TavilySearchTool(BaseTool):
         self.include_images = include_images
         self.k = k
         self.max_results_length = max_results_length
+        self.dependency = get_dependency("tavily_search", self.config)
+        self._http_client = http_client
 
-        # Initialize the langchain tool
-        if LCTavilySearch is None:
-            logger.warning("langchain_community not installed, Tavily search tool will not work")
-            self._langchain_tool = None
-        elif not self.api_key:
+        if not self.api_key:
             logger.warning("Tavily API key not found, Tavily search tool will not work")
-            self._langchain_tool = None
-        else:
-            self._langchain_tool = LCTavilySearch(
-                tavily_api_key=self.api_key,
-                k=self.k,
-                include_raw_content=self.include_raw_content,
-                include_images=self.include_images
-            )
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            # Imported here because the container itself imports this package
+            from app.services.container import get_services
+            return get_services().search_http
+        return self._http_client
+
+    async def _post(self, body: Dict[str, Any]) -> httpx.Response:
+        """One API request; server errors raise so they count against the breaker (unless retryable)."""
+        response = await self.http.post(
+            self.API_ENDPOINT,
+            json=body,
+            headers={"Authorization": f"Bearer {self.api_key}"}
+        )
+        if response.status_code >= 500 and not is_retryable(response):
+            response.raise_for_status()
+        return response
 
     def _format_results(self, results: List[Dict[str, str]]) -> str:
         """Format search results into a readable string.
@@ -122,53 +134,27 @@ class TavilySearchTool(BaseTool):
         Returns:
             Formatted search results
         """
-        if not self._langchain_tool:
+        if not self.api_key:
             return "Error: Tavily search tool not properly configured."
 
         try:
-            # Run in executor since the LangChain tool is synchronous
-            loop = asyncio.get_event_loop()
-
-            # Add retry logic for better error handling
-            max_retries = 2
-            backoff_factor = 2
-            retry_count = 0
-
-            while retry_count <= max_retries:
-                try:
-                    raw_results = await loop.run_in_executor(
-                        None,
-                        lambda: self._langchain_tool.invoke({"query": query})
-                    )
-
-                    # Log raw response for debugging
-                    logger.debug(f"Raw Tavily response type: {type(raw_results)}")
-                    if isinstance(raw_results, str):
-                        logger.debug(f"Raw Tavily response prefix: {raw_results[:100]}")
-
-                    # Response validation
-                    if not raw_results:
-                        raise ValueError("Empty response from Tavily")
-
-                    # Break the retry loop on success
-                    break
-
-                except (ValueError, json.JSONDecodeError) as e:
-                    logger.warning(f"Tavily search attempt {retry_count+1} failed: {str(e)}")
-                    if retry_count == max_retries:
-                        raise
-                    retry_count += 1
-                    # Exponential backoff
-                    await asyncio.sleep(backoff_factor ** retry_count)
-
-            # Format the results
-            if isinstance(raw_results, list):
-                return self._format_results(raw_results)
-            elif isinstance(raw_results, str):
-                return raw_results
-            else:
-                # Handle the case where results are in a different format
-                return f"Search results for '{query}':\n\n{str(raw_results)}"
+            body = {
+                "query": query,
+                "max_results": min(self.k, self.MAX_API_RESULTS),
+                "include_raw_content": self.include_raw_content,
+                "include_images": self.include_images
+            }
+            # Rate-limited requests are retried after a non-blocking pause (honouring Retry-After)
+            response = await send_with_retries(
+                lambda: self.dependency.call(self._post, body),
+                max_retries=self.config.SEARCH_MAX_RETRIES,
+                max_delay=self.config.SEARCH_MAX_RETRY_DELAY
+            )
+            if response.status_code != 200:
+                logger.error(f"Tavily API error: {response.status_code} - {response.text}")
+                return f"Error executing search: Tavily returned {response.status_code}: {response.text}"
+
+            return self._format_results(response.json().get("results", []))
 
         except Exception as e:
             logger.error(f"Error in Tavily search: {str(e)}")
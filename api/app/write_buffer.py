@@ -0,0 +1,164 @@
+"""
+Write-behind buffer for vector upserts.
+
+Points are acknowledged to the caller immediately and sent to Qdrant in
+batches, by size or after a short wait, with ``wait=False`` so the request
+returns as soon as Qdrant has the write in its log. Failed batches are retried
+with exponential backoff before being dropped.
+
+Until a point is sent, and for ``settle_time`` seconds after (while Qdrant
+indexes it), it stays visible through ``visible_points`` so searches in this
+process can merge in their own recent writes.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from qdrant_client import models
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Batches point upserts per collection and sends them in the background."""
+
+    def __init__(
+        self,
+        upsert: Callable[[str, List[models.PointStruct]], Awaitable[None]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.05,
+        max_retries: int = 3,
+        retry_backoff: float = 0.2,
+        settle_time: float = 2.0
+    ):
+        self._upsert = upsert
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.settle_time = settle_time
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, List[models.PointStruct]] = {}
+        # collection -> point id -> (point, monotonic time it stops being visible; None until sent)
+        self._visible: Dict[str, Dict[str, Tuple[models.PointStruct, Optional[float]]]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._in_flight = 0
+        self.written = 0
+        self.dropped = 0
+
+    def _bind_loop(self) -> None:
+        # Timers and tasks belong to one event loop; queued points carry over to a new one
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._timer = None
+            self._tasks = set()
+            self._in_flight = 0
+
+    def add(self, collection: str, point: models.PointStruct) -> None:
+        """Queue a point for upsert without waiting for it to be sent."""
+        self._bind_loop()
+        self._pending.setdefault(collection, []).append(point)
+        self._visible.setdefault(collection, {})[str(point.id)] = (point, None)
+        if sum(len(points) for points in self._pending.values()) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self.max_wait, self.flush)
+        self._report_depth()
+
+    def flush(self) -> None:
+        """Start sending everything queued (does not wait for it)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        for collection, points in pending.items():
+            for start in range(0, len(points), self.max_batch_size):
+                batch = points[start:start + self.max_batch_size]
+                self._in_flight += len(batch)
+                task = self._loop.create_task(self._send(collection, batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, collection: str, points: List[models.PointStruct]) -> None:
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await self._upsert(collection, points)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        logger.error(f"Dropping {len(points)} points for {collection} after {attempt + 1} attempts: {e}")
+                        self.dropped += len(points)
+                        metrics.increment("vector_writes_dropped", len(points), collection=collection)
+                        self._forget(collection, points)
+                        return
+                    metrics.increment("vector_write_retries", collection=collection)
+                    logger.warning(f"Upsert of {len(points)} points to {collection} failed ({e}); retrying")
+                    await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+            self.written += len(points)
+            metrics.increment("vector_write_batches", collection=collection)
+            metrics.increment("vector_writes", len(points), collection=collection)
+            settled = time.monotonic() + self.settle_time
+            visible = self._visible.get(collection, {})
+            for point in points:
+                key = str(point.id)
+                if visible.get(key, (None, None))[0] is point:
+                    visible[key] = (point, settled)
+        finally:
+            self._in_flight -= len(points)
+            self._report_depth()
+
+    def _forget(self, collection: str, points: List[models.PointStruct]) -> None:
+        visible = self._visible.get(collection, {})
+        for point in points:
+            if visible.get(str(point.id), (None, None))[0] is point:
+                del visible[str(point.id)]
+
+    def _report_depth(self) -> None:
+        metrics.set_gauge("vector_write_queue_depth", self.depth())
+
+    def depth(self) -> int:
+        """Points queued or being sent."""
+        return sum(len(points) for points in self._pending.values()) + self._in_flight
+
+    def visible_points(self, collection: str) -> List[models.PointStruct]:
+        """Points written through the buffer that a search may not see yet."""
+        visible = self._visible.get(collection)
+        if not visible:
+            return []
+        now = time.monotonic()
+        expired = [key for key, (_, until) in visible.items() if until is not None and until <= now]
+        for key in expired:
+            del visible[key]
+        return [point for point, _ in visible.values()]
+
+    def get(self, collection: str, point_id: str) -> Optional[models.PointStruct]:
+        entry = self._visible.get(collection, {}).get(str(point_id))
+        return entry[0] if entry else None
+
+    def discard(self, collection: str, point_id: str) -> None:
+        """Stop showing a point to local searches (e.g. once it has been deleted)."""
+        self._visible.get(collection, {}).pop(str(point_id), None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self.depth(),
+            "visible": sum(len(points) for points in self._visible.values()),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+    async def drain(self) -> None:
+        """Send everything queued and wait until every batch has finished (used at shutdown)."""
+        if self._loop is None:
+            return
+        self._bind_loop()
+        self.flush()
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
@@ -4,17 +4,30 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates # Import Jinja2Templates
 from pathlib import Path
+from contextlib import asynccontextmanager
 import markdown # Import markdown library
 import os
 from datetime import datetime # For footer year
 
 from app.routers import threads, users, balance, postchain, auth, vectors, notifications
+from app import resilience
 from app.config import Config
-
-app = FastAPI(title="Choir API", version="1.0.0")
+from app.services.container import init_services, shutdown_services
 
 config = Config.from_env()
 
+# --- Application Lifespan ---
+# Build each outbound client (Qdrant, Sui, APNs) once per process and close it on shutdown.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    services = init_services(config)
+    await services.startup()
+    app.state.services = services
+    yield
+    await shutdown_services()
+
+app = FastAPI(title="Choir API", version="1.0.0", lifespan=lifespan)
+
 # --- Configure Jinja2 Templating ---
 # Assumes main.py is in 'api/' directory
 templates = Jinja2Templates(directory="templates")
@@ -93,7 +106,11 @@ async def marketing_page(request: Request):
 # --- Health Check ---
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    # Open breakers degrade the API but don't make it unhealthy, so the status code stays 200
+    return {
+        "status": "degraded" if resilience.degraded() else "healthy",
+        "dependencies": resilience.snapshot(),
+    }
 
 # --- API Routers ---
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
@@ -30,6 +30,7 @@ logger = logging.getLogger("push_notification_test")
 # Import services
 from app.config import Config
 from app.database import DatabaseClient
+from qdrant_client import models
 from app.services.push_notification_service import PushNotificationService
 from app.services.notification_service import NotificationService
 from app.services.rewards_service import RewardsService
@@ -113,7 +114,7 @@ async def test_citation_notification_flow(device_token):
         
         # Save to database
         token_id = str(uuid.uuid4())
-        db.client.upsert(
+        await db.client.upsert(
             collection_name=config.NOTIFICATIONS_COLLECTION,
             points=[
                 models.PointStruct(
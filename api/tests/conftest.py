@@ -41,3 +41,10 @@ def test_input():
         "content": "What is the capital of France?",
         "thread_id": None
     }
+
+@pytest.fixture(autouse=True)
+def reset_dependency_guards():
+    """Give each test fresh circuit breakers so one test's failures can't open them for the next."""
+    from app import resilience
+    resilience.reset()
+    yield
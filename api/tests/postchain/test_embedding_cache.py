@@ -0,0 +1,173 @@
+"""
+Tests for the embedding cache, batcher and EmbeddingService.
+"""
+import asyncio
+import os
+
+import pytest
+
+from app import metrics
+from app.config import Config
+from app.services.embedding_service import (
+    DiskEmbeddingStore,
+    EmbeddingBatcher,
+    EmbeddingCache,
+    EmbeddingService,
+    embedding_cache_key,
+    normalize_text,
+)
+
+
+class CountingEmbeddings:
+    """Embeddings double that records every text sent to the provider."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def aembed_documents(self, texts):
+        self.calls.extend(texts)
+        return [[float(len(text)), 0.5, -1.0] for text in texts]
+
+
+def _service(cache):
+    service = EmbeddingService(Config(), cache=cache)
+    service._embeddings = CountingEmbeddings()
+    return service
+
+
+class TestEmbeddingCache:
+    """Tests for the memory and disk tiers."""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_key_uses_normalized_text(self):
+        assert normalize_text("  café \n") == "café"
+        assert embedding_cache_key("m", normalize_text("café ")) == embedding_cache_key("m", "café")
+        assert embedding_cache_key("m1", "x") != embedding_cache_key("m2", "x")
+
+    async def test_memory_hit_and_lru_bound(self):
+        cache = EmbeddingCache(max_entries=2)
+        await cache.put("m", "a", [1.0])
+        await cache.put("m", "b", [2.0])
+        assert cache.get("m", "a") == [1.0]
+        await cache.put("m", "c", [3.0])  # evicts "b", the least recently used
+        assert cache.get("m", "b") is None
+        assert cache.get("m", "c") == [3.0]
+        counters = metrics.snapshot()
+        assert counters["embedding_cache_hits{tier=memory}"] == 2
+        assert counters["embedding_cache_misses"] == 1
+
+    async def test_disk_tier_survives_restart(self, tmp_path):
+        cache = EmbeddingCache(max_entries=10, directory=str(tmp_path))
+        await cache.put("text-embedding-3-small", "k1", [0.25, 0.5])
+        await cache.put("text-embedding-3-small", "k2", [1.0, 2.0])
+
+        restarted = EmbeddingCache(max_entries=10, directory=str(tmp_path))
+        assert restarted.get("text-embedding-3-small", "k2") == [1.0, 2.0]
+        assert restarted.get("text-embedding-3-small", "k1") == [0.25, 0.5]
+        assert restarted.stats() == {"memory_entries": 2, "disk_entries": 2}
+        assert metrics.snapshot()["embedding_cache_hits{tier=disk}"] == 2
+
+    def test_partial_trailing_row_is_dropped(self, tmp_path):
+        store = DiskEmbeddingStore(str(tmp_path))
+        store.put("k1", [1.0, 2.0])
+        with open(os.path.join(tmp_path, "vectors.f32"), "ab") as f:
+            f.write(b"\x00\x00")  # interrupted write of the next row
+
+        reloaded = DiskEmbeddingStore(str(tmp_path))
+        assert os.path.getsize(os.path.join(tmp_path, "vectors.f32")) == 8
+        assert reloaded.get("k1") == [1.0, 2.0]
+        reloaded.put("k2", [3.0, 4.0])
+        assert reloaded.get("k2") == [3.0, 4.0]
+
+    def test_stores_sharing_a_directory_never_reuse_rows(self, tmp_path):
+        # Two processes with the same cache directory, each with its own row counter
+        first = DiskEmbeddingStore(str(tmp_path))
+        second = DiskEmbeddingStore(str(tmp_path))
+        first.put("a", [1.0, 0.0])
+        second.put("b", [0.0, 1.0])
+        first.put("c", [2.0, 2.0])
+
+        assert (first.get("a"), second.get("b"), first.get("c")) == ([1.0, 0.0], [0.0, 1.0], [2.0, 2.0])
+        restarted = DiskEmbeddingStore(str(tmp_path))
+        assert [restarted.get(k) for k in "abc"] == [[1.0, 0.0], [0.0, 1.0], [2.0, 2.0]]
+
+
+class TestEmbeddingService:
+    """Tests for cached embedding calls."""
+
+    async def test_repeated_text_is_embedded_once(self):
+        service = _service(EmbeddingCache(max_entries=10))
+        first = await service.embed_query("hello world")
+        second = await service.embed_query("  hello world\n")
+        assert first == second
+        assert service.embeddings.calls == ["hello world"]
+
+    async def test_persisted_vectors_skip_the_provider(self, tmp_path):
+        await _service(EmbeddingCache(directory=str(tmp_path))).embed_query("persist me")
+
+        service = _service(EmbeddingCache(directory=str(tmp_path)))
+        assert await service.embed_query("persist me") == [10.0, 0.5, -1.0]
+        assert service.embeddings.calls == []
+
+
+class RecordingBatchEmbedder:
+    """Batch embed function double that records batch sizes."""
+
+    def __init__(self, delay=0.0, error=None):
+        self.batches = []
+        self.delay = delay
+        self.error = error
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, texts):
+        self.batches.append(list(texts))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return [[float(len(text))] for text in texts]
+        finally:
+            self.active -= 1
+
+
+class TestEmbeddingBatcher:
+    """Tests for coalescing concurrent embedding requests."""
+
+    async def test_concurrent_requests_share_one_call(self):
+        embedder = RecordingBatchEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_batch_size=10, max_wait=0.01)
+        vectors = await asyncio.gather(*(batcher.submit(f"k{i}", "x" * i) for i in range(1, 4)))
+        assert vectors == [[1.0], [2.0], [3.0]]
+        assert embedder.batches == [["x", "xx", "xxx"]]
+
+    async def test_full_batch_is_sent_without_waiting(self):
+        embedder = RecordingBatchEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_batch_size=2, max_wait=10)
+        await asyncio.wait_for(asyncio.gather(batcher.submit("a", "a"), batcher.submit("b", "bb")), 1)
+        assert embedder.batches == [["a", "bb"]]
+
+    async def test_duplicate_keys_are_embedded_once(self):
+        embedder = RecordingBatchEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_wait=0.01)
+        first, second = await asyncio.gather(batcher.submit("same", "text"), batcher.submit("same", "text"))
+        assert first == second == [4.0]
+        assert embedder.batches == [["text"]]
+
+    async def test_in_flight_batches_are_limited(self):
+        embedder = RecordingBatchEmbedder(delay=0.05)
+        batcher = EmbeddingBatcher(embedder, max_batch_size=1, max_concurrent_batches=2)
+        await asyncio.gather(*(batcher.submit(str(i), "t") for i in range(5)))
+        assert len(embedder.batches) == 5
+        assert embedder.max_active == 2
+
+    async def test_errors_reach_every_caller(self):
+        batcher = EmbeddingBatcher(RecordingBatchEmbedder(error=RuntimeError("rate limited")), max_wait=0.01)
+        results = await asyncio.gather(batcher.submit("a", "a"), batcher.submit("b", "b"), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        with pytest.raises(RuntimeError):
+            await batcher.submit("a", "a")
@@ -0,0 +1,60 @@
+"""
+Tests for the pooled LangChain model instances.
+"""
+import pytest
+
+from app.langchain_utils import ModelConfig
+from app.postchain import model_pool
+from app.postchain.model_pool import ModelPool, pool_key
+
+
+def _config(**overrides):
+    values = {"provider": "openai", "model_name": "gpt-4.1-mini", "temperature": 0.3, "openai_api_key": "sk-test-1"}
+    values.update(overrides)
+    return ModelConfig(**values)
+
+
+class TestModelPool:
+    """Tests for pooling, keying and eviction."""
+
+    @pytest.fixture
+    async def pool(self):
+        pool = ModelPool(max_size=2, idle_ttl=600)
+        yield pool
+        await pool.aclose()
+
+    async def test_same_config_reuses_instance(self, pool):
+        assert pool.get(_config()) is pool.get(_config())
+        assert pool.stats()["hits"] == 1 and pool.stats()["misses"] == 1
+
+    async def test_key_covers_temperature_and_credentials(self, pool):
+        assert pool.get(_config()) is not pool.get(_config(temperature=0.9))
+        assert pool_key(_config()) != pool_key(_config(openai_api_key="sk-test-2"))
+        # Credentials are fingerprinted, never stored in the key
+        assert "sk-test-1" not in repr(pool_key(_config()))
+
+    async def test_providers_share_one_transport(self, pool):
+        first = pool.get(_config())
+        second = pool.get(_config(model_name="gpt-4o"))
+        assert first.http_async_client is second.http_async_client
+
+    async def test_evicts_least_recently_used_beyond_max_size(self, pool):
+        first = pool.get(_config(model_name="a"))
+        pool.get(_config(model_name="b"))
+        pool.get(_config(model_name="c"))
+        assert pool.stats()["size"] == 2
+        assert pool.get(_config(model_name="a")) is not first
+
+    async def test_evicts_idle_models(self, monkeypatch):
+        clock = {"now": 1000.0}
+        monkeypatch.setattr(model_pool.time, "monotonic", lambda: clock["now"])
+        pool = ModelPool(max_size=8, idle_ttl=60)
+        try:
+            first = pool.get(_config())
+            clock["now"] += 30
+            assert pool.get(_config()) is first
+            clock["now"] += 61
+            assert pool.get(_config()) is not first
+            assert pool.stats()["evictions"] == 1
+        finally:
+            await pool.aclose()
@@ -0,0 +1,113 @@
+"""
+Tests for the PostChain phase dependency scheduler.
+"""
+import asyncio
+from contextlib import aclosing
+
+import pytest
+
+from app.postchain.scheduler import PhaseGraph, PhaseSpec, format_timings
+
+
+def _phase(name, depends_on=(), delay=0.0, result=None, log=None, failed=lambda r: False):
+    async def run(inputs):
+        if log is not None:
+            log.append(("start", name, sorted(inputs)))
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result if result is not None else name
+    return PhaseSpec(name=name, run=run, depends_on=depends_on, failed=failed)
+
+
+async def _collect(graph):
+    outcomes = []
+    async with aclosing(graph.run()) as phases:
+        async for spec, task in phases:
+            outcomes.append(await task)
+    return outcomes
+
+
+class TestPhaseGraph:
+    """Tests for dependency validation and scheduling."""
+
+    def test_rejects_undeclared_dependency(self):
+        with pytest.raises(ValueError):
+            PhaseGraph([_phase("b", depends_on=("a",)), _phase("a")])
+
+    def test_rejects_duplicate_phase(self):
+        with pytest.raises(ValueError):
+            PhaseGraph([_phase("a"), _phase("a")])
+
+    async def test_independent_phases_overlap(self):
+        graph = PhaseGraph([
+            _phase("action"),
+            _phase("vectors", depends_on=("action",), delay=0.2),
+            _phase("web", depends_on=("action",), delay=0.2),
+            _phase("intention", depends_on=("vectors", "web")),
+        ])
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        outcomes = await _collect(graph)
+        elapsed = loop.time() - started
+
+        assert [o.name for o in outcomes] == ["action", "vectors", "web", "intention"]
+        assert all(o.ok for o in outcomes)
+        assert elapsed < 0.35
+        assert set(format_timings(outcomes)) == {"action", "vectors", "web", "intention"}
+
+    async def test_outcomes_follow_declaration_order(self):
+        # "slow" finishes last but is still reported first
+        graph = PhaseGraph([_phase("slow", delay=0.1), _phase("fast")])
+        outcomes = await _collect(graph)
+        assert [o.name for o in outcomes] == ["slow", "fast"]
+
+    async def test_phase_receives_transitive_ancestor_results(self):
+        log = []
+        graph = PhaseGraph([
+            _phase("a", log=log),
+            _phase("b", depends_on=("a",), log=log),
+            _phase("c", depends_on=("b",), log=log),
+        ])
+        await _collect(graph)
+        assert ("start", "c", ["a", "b"]) in log
+
+    async def test_failure_skips_dependents(self):
+        graph = PhaseGraph([
+            _phase("a", result={"error": "boom"}, failed=lambda r: "error" in r),
+            _phase("b", depends_on=("a",)),
+        ])
+        outcomes = await _collect(graph)
+        assert outcomes[0].error and outcomes[0].result == {"error": "boom"}
+        assert outcomes[1].skipped and not outcomes[1].ok
+
+    async def test_exception_becomes_error_outcome(self):
+        graph = PhaseGraph([_phase("a", result=RuntimeError("kaput"))])
+        outcomes = await _collect(graph)
+        assert outcomes[0].result is None
+        assert "kaput" in outcomes[0].error
+
+    async def test_restored_phases_are_not_rerun(self):
+        log = []
+        graph = PhaseGraph([
+            _phase("a", log=log),
+            _phase("b", depends_on=("a",), log=log),
+        ])
+        outcomes = []
+        async with aclosing(graph.run(restored={"a": "from-checkpoint"})) as phases:
+            async for spec, task in phases:
+                outcomes.append(await task)
+        assert outcomes[0].restored and outcomes[0].result == "from-checkpoint"
+        assert log == [("start", "b", ["a"])]
+        assert format_timings(outcomes).keys() == {"b"}
+
+    async def test_closing_early_cancels_pending_phases(self):
+        log = []
+        graph = PhaseGraph([_phase("a"), _phase("b", delay=5, log=log)])
+        async with aclosing(graph.run()) as phases:
+            async for spec, task in phases:
+                await task
+                break
+        # The slow phase was started but never reported
+        assert ("start", "b", []) in log
+        assert all(t.done() for t in asyncio.all_tasks() if t.get_name() == "phase:b")
@@ -0,0 +1,74 @@
+"""
+Tests that a client disconnect cancels the in-flight PostChain workflow.
+"""
+import asyncio
+
+from app.models.auth import TokenData
+from app.routers import postchain as postchain_router
+
+THREAD_ID = "3f2b8a36-4a53-4a3e-9a55-0d5f1c1b2a10"
+
+
+class FakeRequest:
+    """Stand-in for starlette's Request that disconnects after a few checks."""
+
+    def __init__(self, connected_checks: int):
+        self.connected_checks = connected_checks
+
+    async def is_disconnected(self) -> bool:
+        self.connected_checks -= 1
+        return self.connected_checks < 0
+
+
+async def _no_state(thread_id):
+    return None
+
+
+async def test_disconnect_cancels_workflow(monkeypatch):
+    state = {"cancelled": False}
+
+    async def slow_workflow(**kwargs):
+        yield {"phase": "action", "status": "running"}
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        yield {"phase": "action", "status": "complete"}
+
+    monkeypatch.setattr(postchain_router, "recover_state", _no_state)
+    monkeypatch.setattr(postchain_router, "run_langchain_postchain_workflow", slow_workflow)
+    monkeypatch.setattr(postchain_router, "DISCONNECT_POLL_INTERVAL", 0.01)
+
+    stream = postchain_router._workflow_event_stream(
+        http_request=FakeRequest(connected_checks=2),
+        thread_id=THREAD_ID,
+        user_query="hello",
+        current_user=TokenData(user_id="user", wallet_address="0x1"),
+    )
+    lines = await asyncio.wait_for(_collect(stream), timeout=2)
+
+    assert state["cancelled"]
+    assert len(lines) == 1 and '"running"' in lines[0]
+    assert "data: [DONE]\n\n" not in lines
+
+
+async def test_completed_stream_ends_with_done(monkeypatch):
+    async def quick_workflow(**kwargs):
+        yield {"phase": "yield", "status": "complete"}
+
+    monkeypatch.setattr(postchain_router, "recover_state", _no_state)
+    monkeypatch.setattr(postchain_router, "run_langchain_postchain_workflow", quick_workflow)
+
+    stream = postchain_router._workflow_event_stream(
+        http_request=FakeRequest(connected_checks=100),
+        thread_id=THREAD_ID,
+        user_query="hello",
+        current_user=TokenData(user_id="user", wallet_address="0x1"),
+    )
+    lines = await _collect(stream)
+    assert lines[-1] == "data: [DONE]\n\n"
+
+
+async def _collect(stream):
+    return [line async for line in stream]
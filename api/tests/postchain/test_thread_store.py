@@ -0,0 +1,138 @@
+"""
+Tests for the PostChain thread state store.
+"""
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.postchain.thread_store import (
+    CachedThreadStateStore,
+    InMemoryThreadStateStore,
+    SQLiteThreadStateStore,
+    migrate_json_states,
+)
+
+THREAD_ID = "3f2b8a36-4a53-4a3e-9a55-0d5f1c1b2a10"
+
+
+class TestSQLiteThreadStateStore:
+    """Tests for the embedded SQLite backend."""
+
+    async def test_append_and_read_round_trip(self, tmp_path):
+        store = SQLiteThreadStateStore(str(tmp_path / "threads.sqlite3"))
+        try:
+            assert await store.append_messages(THREAD_ID, [HumanMessage(content="hi")]) == 1
+            assert await store.append_messages(THREAD_ID, [
+                AIMessage(content="hello", additional_kwargs={"phase": "yield"})
+            ]) == 2
+
+            messages = await store.get_messages(THREAD_ID)
+            assert [type(m) for m in messages] == [HumanMessage, AIMessage]
+            assert messages[1].content == "hello"
+            assert messages[1].additional_kwargs == {"phase": "yield"}
+            assert [m.content for m in await store.get_messages(THREAD_ID, limit=1)] == ["hello"]
+        finally:
+            await store.close()
+
+    async def test_persists_across_reopen_and_deletes(self, tmp_path):
+        path = str(tmp_path / "threads.sqlite3")
+        store = SQLiteThreadStateStore(path)
+        await store.append_messages(THREAD_ID, [HumanMessage(content="hi")])
+        await store.close()
+
+        reopened = SQLiteThreadStateStore(path)
+        try:
+            assert await reopened.count_messages(THREAD_ID) == 1
+            assert await reopened.delete_thread(THREAD_ID)
+            assert await reopened.get_messages(THREAD_ID) == []
+            assert not await reopened.delete_thread(THREAD_ID)
+        finally:
+            await reopened.close()
+
+    async def test_phase_checkpoints(self, tmp_path):
+        store = SQLiteThreadStateStore(str(tmp_path / "threads.sqlite3"))
+        try:
+            assert await store.load_checkpoint(THREAD_ID) is None
+            await store.save_phase_checkpoint(THREAD_ID, 0, "q", "action", {"content": "a"})
+            await store.save_phase_checkpoint(THREAD_ID, 0, "q", "experience_vectors", {"content": "v"})
+
+            checkpoint = await store.load_checkpoint(THREAD_ID)
+            assert (checkpoint.turn, checkpoint.query) == (0, "q")
+            assert list(checkpoint.phases) == ["action", "experience_vectors"]
+            assert checkpoint.phases["action"] == {"content": "a"}
+
+            # A newer turn replaces the abandoned one
+            await store.save_phase_checkpoint(THREAD_ID, 2, "q2", "action", {"content": "a2"})
+            checkpoint = await store.load_checkpoint(THREAD_ID)
+            assert (checkpoint.turn, list(checkpoint.phases)) == (2, ["action"])
+
+            await store.clear_checkpoint(THREAD_ID)
+            assert await store.load_checkpoint(THREAD_ID) is None
+        finally:
+            await store.close()
+
+
+class TestCachedThreadStateStore:
+    """Tests for the LRU cache in front of a backend."""
+
+    async def test_appends_update_cached_threads(self):
+        store = CachedThreadStateStore(InMemoryThreadStateStore(), max_threads=2)
+        await store.append_messages(THREAD_ID, [HumanMessage(content="one")])
+        assert len(await store.get_messages(THREAD_ID)) == 1
+        await store.append_messages(THREAD_ID, [AIMessage(content="two")])
+        assert [m.content for m in await store.get_messages(THREAD_ID)] == ["one", "two"]
+
+    async def test_evicts_least_recently_used(self):
+        store = CachedThreadStateStore(InMemoryThreadStateStore(), max_threads=2)
+        for thread in ("a", "b", "c"):
+            await store.append_messages(thread, [HumanMessage(content=thread)])
+            await store.get_messages(thread)
+        assert list(store._cache) == ["b", "c"]
+        # Evicted threads are reloaded from the backend
+        assert [m.content for m in await store.get_messages("a")] == ["a"]
+
+    async def test_sees_writes_from_other_processes_sharing_sqlite(self, tmp_path):
+        path = str(tmp_path / "threads.sqlite3")
+        worker_a = CachedThreadStateStore(SQLiteThreadStateStore(path))
+        worker_b = CachedThreadStateStore(SQLiteThreadStateStore(path))
+        try:
+            await worker_a.append_messages(THREAD_ID, [HumanMessage(content="one")])
+            assert len(await worker_a.get_messages(THREAD_ID)) == 1
+            await worker_b.append_messages(THREAD_ID, [AIMessage(content="two")])
+
+            assert await worker_a.count_messages(THREAD_ID) == 2
+            assert [m.content for m in await worker_a.get_messages(THREAD_ID)] == ["one", "two"]
+            # An append on a stale cached copy doesn't resurrect the missing message
+            await worker_b.append_messages(THREAD_ID, [HumanMessage(content="three")])
+            assert await worker_a.append_messages(THREAD_ID, [AIMessage(content="four")]) == 4
+            assert [m.content for m in await worker_a.get_messages(THREAD_ID)] == ["one", "two", "three", "four"]
+
+            await worker_b.delete_thread(THREAD_ID)
+            await worker_b.append_messages(THREAD_ID, [HumanMessage(content="new")] * 4)
+            assert [m.content for m in await worker_a.get_messages(THREAD_ID)] == ["new"] * 4
+        finally:
+            await worker_a.close()
+            await worker_b.close()
+
+
+async def test_migrate_json_states(tmp_path):
+    legacy_dir = tmp_path / "thread_state"
+    legacy_dir.mkdir()
+    state = {
+        "thread_id": THREAD_ID,
+        "messages": [HumanMessage(content="q").dict(), AIMessage(content="a").dict()],
+        "current_phase": "yield",
+        "phase_state": {},
+        "error": None,
+    }
+    (legacy_dir / f"{THREAD_ID}.json").write_text(json.dumps(state, indent=2))
+    (legacy_dir / "broken.json").write_text("{not json")
+
+    store = InMemoryThreadStateStore()
+    stats = await migrate_json_states(store, str(legacy_dir))
+    assert stats == {"migrated": 1, "skipped": 0, "failed": 1, "messages": 2}
+    assert [m.content for m in await store.get_messages(THREAD_ID)] == ["q", "a"]
+
+    # Re-running skips threads that are already present
+    stats = await migrate_json_states(store, str(legacy_dir))
+    assert stats["skipped"] == 1 and stats["migrated"] == 0
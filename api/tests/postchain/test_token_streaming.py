@@ -0,0 +1,114 @@
+"""
+Tests for token-level "delta" streaming of PostChain phases.
+"""
+import asyncio
+from types import SimpleNamespace
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+
+from app.postchain import langchain_workflow, postchain_llm
+from app.postchain.langchain_workflow import STREAMABLE_PHASES, run_langchain_postchain_workflow
+from app.postchain.postchain_llm import collect_streaming_response
+from app.langchain_utils import ModelConfig
+
+TOKENS = ["Hel", "lo ", "world"]
+
+
+async def test_collect_streaming_response_forwards_deltas_and_assembles_message(monkeypatch):
+    async def fake_post_llm(messages, model_config, stream=False):
+        assert stream
+
+        async def chunks():
+            yield AIMessageChunk(content="Hel")
+            yield AIMessageChunk(content="")
+            yield AIMessageChunk(content=[{"type": "text", "text": "lo "}, "world"])
+        return chunks()
+
+    monkeypatch.setattr(postchain_llm, "post_llm", fake_post_llm)
+    deltas = []
+    message = await collect_streaming_response(
+        [HumanMessage(content="hi")], ModelConfig(provider="openai", model_name="test"), deltas.append
+    )
+
+    assert deltas == ["Hel", "lo world"]
+    assert isinstance(message, AIMessage)
+    assert message.content == "Hello world"
+
+
+def _fake_phases(monkeypatch, handed_callbacks):
+    """Replace every phase with a fake that streams TOKENS through on_delta if given one."""
+
+    def streaming(name, result=None):
+        async def run(*args, on_delta=None, **kwargs):
+            handed_callbacks[name] = on_delta
+            for token in TOKENS:
+                await asyncio.sleep(0.005)
+                if on_delta:
+                    on_delta(token)
+            response = AIMessage(content="".join(TOKENS))
+            return result(response) if result else {f"{name}_response": response}
+        return run
+
+    async def experience_web(*args, **kwargs):
+        # Runs alongside Experience Vectors and finishes while it is still streaming
+        await asyncio.sleep(0.002)
+        return SimpleNamespace(experience_web_response=AIMessage(content="web"), web_results=[], error=None)
+
+    async def yield_phase(*args, **kwargs):
+        return SimpleNamespace(yield_response=AIMessage(content="done"), citation_reward=None, citations=[], error=None)
+
+    async def nothing(*args, **kwargs):
+        return {}
+
+    monkeypatch.setattr(langchain_workflow, "run_action_phase", streaming("action"))
+    monkeypatch.setattr(langchain_workflow, "run_experience_vectors_phase", streaming(
+        "experience_vectors",
+        lambda response: SimpleNamespace(
+            experience_vectors_response=response, vector_results=[], max_similarity=None, novelty_reward=None, error=None
+        )
+    ))
+    monkeypatch.setattr(langchain_workflow, "run_experience_web_phase", experience_web)
+    monkeypatch.setattr(langchain_workflow, "run_intention_phase", streaming("intention"))
+    monkeypatch.setattr(langchain_workflow, "run_observation_phase", streaming("observation"))
+    monkeypatch.setattr(langchain_workflow, "run_understanding_phase", streaming("understanding"))
+    monkeypatch.setattr(langchain_workflow, "run_yield_phase", yield_phase)
+    monkeypatch.setattr(langchain_workflow, "_load_restorable_phases", nothing)
+    monkeypatch.setattr(langchain_workflow, "_checkpoint_phase", nothing)
+    monkeypatch.setattr(langchain_workflow, "_complete_turn", nothing)
+
+
+async def _run(stream_tokens):
+    return [
+        event async for event in run_langchain_postchain_workflow(
+            query="hello", thread_id="thread", message_history=[], stream_tokens=stream_tokens
+        )
+    ]
+
+
+async def test_deltas_precede_each_phase_complete_without_interleaving(monkeypatch):
+    _fake_phases(monkeypatch, {})
+    events = await _run(stream_tokens=True)
+
+    assert events[-1]["phase"] == "yield" and events[-1]["status"] == "complete"
+    for phase in STREAMABLE_PHASES:
+        running = _position(events, phase, "running")
+        complete = _position(events, phase, "complete")
+        between = events[running + 1:complete]
+        # Only this phase's deltas sit between its running and complete events
+        assert between and all(e["phase"] == phase and e["status"] == "delta" for e in between)
+        assert "".join(e["content"] for e in between) == events[complete]["content"]
+    assert not any(e["status"] == "delta" for e in events if e["phase"] not in STREAMABLE_PHASES)
+
+
+async def test_no_deltas_without_stream_tokens(monkeypatch):
+    handed_callbacks = {}
+    _fake_phases(monkeypatch, handed_callbacks)
+    events = await _run(stream_tokens=False)
+
+    assert not any(e["status"] == "delta" for e in events)
+    assert set(handed_callbacks) == STREAMABLE_PHASES
+    assert all(callback is None for callback in handed_callbacks.values())
+
+
+def _position(events, phase, status):
+    return next(i for i, e in enumerate(events) if e["phase"] == phase and e["status"] == status)
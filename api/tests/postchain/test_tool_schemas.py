@@ -0,0 +1,63 @@
+"""
+Tests for the memoized tool-schema registry and handle_tools binding.
+"""
+from langchain_openai import ChatOpenAI
+
+from app.langchain_utils import convert_tools_to_pydantic, get_tool_schema
+from app.postchain.postchain_llm import handle_tools
+from app.tools.base import BaseTool
+
+
+class EchoSearchTool(BaseTool):
+    name = "echo_search"
+    description = "Echo the search query back."
+
+    async def run(self, input: str) -> str:
+        return input
+
+
+async def _noop(**kwargs):
+    return kwargs
+
+
+DICT_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "issue_reward",
+        "description": "Issue a reward.",
+        "parameters": {
+            "type": "object",
+            "properties": {"amount": {"type": "integer", "description": "Reward amount", "minimum": 1}},
+            "required": ["amount"],
+        },
+    },
+    "coroutine": _noop,
+}
+
+
+class TestToolSchemaRegistry:
+    """Tests for schema memoization."""
+
+    def test_models_are_built_once_per_tool(self):
+        first = convert_tools_to_pydantic([EchoSearchTool(), DICT_TOOL])
+        second = convert_tools_to_pydantic([EchoSearchTool(), DICT_TOOL])
+        assert first[0] is second[0] and first[1] is second[1]
+        assert set(first[0].model_fields) == {"query"}
+        assert set(first[1].model_fields) == {"amount"}
+
+    def test_dict_tool_declaration_is_kept_verbatim(self):
+        openai_tool = get_tool_schema(DICT_TOOL).openai_tool
+        assert openai_tool == {"type": "function", "function": DICT_TOOL["function"]}
+        assert "coroutine" not in openai_tool
+
+    def test_base_tool_schema_is_openai_format(self):
+        function = get_tool_schema(EchoSearchTool()).openai_tool["function"]
+        assert function["name"] == "echo_search"
+        assert function["parameters"]["required"] == ["query"]
+
+
+async def test_handle_tools_binds_cached_schemas():
+    model = ChatOpenAI(api_key="sk-test", model="gpt-4.1-mini")
+    bound = await handle_tools(model, [EchoSearchTool(), DICT_TOOL])
+    names = [tool["function"]["name"] for tool in bound.kwargs["tools"]]
+    assert names == ["echo_search", "issue_reward"]
@@ -0,0 +1,198 @@
+"""
+Tests for collection storage profiles and profile migration.
+
+Migration runs against qdrant-client's in-process local mode.
+"""
+import random
+from datetime import datetime, UTC
+
+import pytest
+from qdrant_client import models
+
+from app.collection_profiles import get_profile, migrate_collection, migrate_to_vectorless, resolve_alias
+from app.config import Config
+from app.database import DatabaseClient
+from app.sparse_vectors import SPARSE_VECTOR_NAME
+
+DIM = 8
+
+
+class TestProfiles:
+    """Profile definitions translate to Qdrant configs."""
+
+    def test_default_profile_uses_qdrant_defaults(self):
+        profile = get_profile("default")
+        assert profile.quantization_config() is None
+        assert profile.search_params() is None
+        assert profile.vectors_config(DIM).on_disk is False
+
+    def test_scalar_profile_rescores_oversampled_candidates(self):
+        profile = get_profile("scalar")
+        assert profile.quantization_config().scalar.type == models.ScalarType.INT8
+        assert profile.vectors_config(DIM).on_disk is True
+        params = profile.search_params()
+        assert params.quantization.rescore is True
+        assert params.quantization.oversampling == 2.0
+
+    def test_unknown_profile_is_rejected(self):
+        with pytest.raises(ValueError):
+            get_profile("fp8")
+
+
+@pytest.fixture
+async def local_db(monkeypatch):
+    monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+    monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", ":memory:")
+    config = Config()
+    db = DatabaseClient(config)
+    await db.client.create_collection(
+        collection_name=config.MESSAGES_COLLECTION,
+        vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE)
+    )
+    rng = random.Random(7)
+    await db.client.upsert(
+        collection_name=config.MESSAGES_COLLECTION,
+        points=[
+            models.PointStruct(
+                id=i,
+                vector=[rng.uniform(-1, 1) for _ in range(DIM)],
+                payload={"content": f"message {i}", "created_at": datetime.now(UTC).isoformat()}
+            )
+            for i in range(40)
+        ]
+    )
+    yield db
+    await db.client.close()
+
+
+class TestMigration:
+    """migrate_collection copies, reports and switches via an alias."""
+
+    async def test_plain_collection_is_not_replaced_without_permission(self, local_db):
+        summary = await migrate_collection(local_db, get_profile("scalar"), batch_size=16, sample_size=5)
+        assert summary["copied"] == 40
+        assert not summary["switched"]
+        assert await local_db.client.collection_exists(local_db.config.MESSAGES_COLLECTION)
+        assert (await local_db.client.count(summary["target"])).count == 40
+        # The rebuilt collection carries BM25 vectors for hybrid search
+        copied = await local_db.client.retrieve(summary["target"], ids=[0], with_vectors=True)
+        assert copied[0].vector[SPARSE_VECTOR_NAME].indices
+
+    async def test_replace_then_atomic_alias_switch(self, local_db):
+        name = local_db.config.MESSAGES_COLLECTION
+        first = await migrate_collection(
+            local_db, get_profile("scalar"), batch_size=16, sample_size=5, min_recall=0.0, replace_original=True
+        )
+        assert first["switched"]
+        assert first["report"]["queries"] == 5
+        assert await resolve_alias(local_db, name) == first["target"]
+
+        second = await migrate_collection(
+            local_db, get_profile("binary"), alias=name, sample_size=5, min_recall=0.0, drop_old=True
+        )
+        assert second["source"] == first["target"]
+        assert await resolve_alias(local_db, name) == second["target"]
+        assert not await local_db.client.collection_exists(first["target"])
+        assert (await local_db.client.count(name)).count == 40
+
+    async def test_writes_racing_the_switch_survive_drop_old(self, local_db, monkeypatch):
+        name = local_db.config.MESSAGES_COLLECTION
+        first = await migrate_collection(
+            local_db, get_profile("scalar"), sample_size=5, min_recall=0.0, replace_original=True
+        )
+        qdrant = local_db.admin_client._client
+        switch = qdrant.update_collection_aliases
+
+        async def write_then_switch(**kwargs):
+            # A message lands in the old collection after the last pre-switch copy
+            await qdrant.upsert(name, points=[models.PointStruct(
+                id=99, vector=[1.0] * DIM, payload={"content": "late", "created_at": datetime.now(UTC).isoformat()}
+            )])
+            return await switch(**kwargs)
+
+        monkeypatch.setattr(qdrant, "update_collection_aliases", write_then_switch)
+        second = await migrate_collection(
+            local_db, get_profile("binary"), alias=name, sample_size=5, min_recall=0.0, drop_old=True
+        )
+        assert not await local_db.client.collection_exists(first["target"])
+        assert (await local_db.client.count(name)).count == 41
+        assert second["caught_up"] >= 1
+
+    async def test_low_recall_keeps_the_old_collection(self, local_db):
+        summary = await migrate_collection(
+            local_db, get_profile("scalar"), sample_size=5, min_recall=1.1, replace_original=True
+        )
+        assert not summary["switched"]
+        assert await resolve_alias(local_db, local_db.config.MESSAGES_COLLECTION) is None
+
+
+class TestVectorlessMigration:
+    """migrate_to_vectorless drops placeholder vectors from record collections."""
+
+    async def test_legacy_users_move_to_vectorless_points(self, local_db):
+        users = local_db.config.USERS_COLLECTION
+        await local_db.client.create_collection(
+            collection_name=users,
+            vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE)
+        )
+        await local_db.client.upsert(
+            collection_name=users,
+            points=[
+                models.PointStruct(id=i, vector=[0.0] * DIM, payload={"public_key": f"pk-{i}", "thread_ids": []})
+                for i in range(10)
+            ]
+        )
+
+        summary = await migrate_to_vectorless(local_db, users, batch_size=4, replace_original=True)
+        assert summary["switched"] and summary["copied"] == 10
+        assert await resolve_alias(local_db, users) == summary["target"]
+        assert not (await local_db.client.get_collection(users)).config.params.vectors
+        points, _ = await local_db.client.scroll(users, limit=20, with_vectors=True)
+        assert {p.payload["public_key"] for p in points} == {f"pk-{i}" for i in range(10)}
+
+        again = await migrate_to_vectorless(local_db, users)
+        assert again["target"] is None and not again["switched"]
+
+    async def test_record_updates_racing_the_switch_survive_drop_old(self, local_db, monkeypatch):
+        users = local_db.config.USERS_COLLECTION
+        qdrant = local_db.admin_client._client
+        await qdrant.create_collection(
+            collection_name="users_legacy",
+            vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE)
+        )
+        await qdrant.upsert("users_legacy", points=[
+            models.PointStruct(id=i, vector=[0.0] * DIM, payload={"public_key": f"pk-{i}", "thread_ids": []})
+            for i in range(5)
+        ])
+        await qdrant.update_collection_aliases(change_aliases_operations=[
+            models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name="users_legacy", alias_name=users)),
+        ])
+        switch = qdrant.update_collection_aliases
+
+        async def write_then_switch(**kwargs):
+            # A thread is added to one user and a new user signs up after the last full copy
+            await qdrant.set_payload("users_legacy", payload={"thread_ids": ["t1"]}, points=[0])
+            await qdrant.upsert("users_legacy", points=[
+                models.PointStruct(id=5, vector=[0.0] * DIM, payload={"public_key": "pk-5", "thread_ids": []})
+            ])
+            return await switch(**kwargs)
+
+        monkeypatch.setattr(qdrant, "update_collection_aliases", write_then_switch)
+        summary = await migrate_to_vectorless(local_db, users, drop_old=True)
+        assert summary["switched"] and summary["caught_up"] == 2
+        assert not await qdrant.collection_exists("users_legacy")
+        points, _ = await local_db.client.scroll(users, limit=20)
+        by_key = {p.payload["public_key"]: p.payload for p in points}
+        assert len(by_key) == 6
+        assert by_key["pk-0"]["thread_ids"] == ["t1"]
+
+    async def test_vector_collections_are_rejected(self, local_db):
+        with pytest.raises(ValueError):
+            await migrate_to_vectorless(local_db, local_db.config.MESSAGES_COLLECTION)
+
+
+def test_search_params_apply_to_messages_collection_only(monkeypatch):
+    monkeypatch.setattr(Config, "MESSAGES_COLLECTION_PROFILE", "scalar")
+    db = DatabaseClient(Config())
+    assert db._search_params(db.config.MESSAGES_COLLECTION).quantization.rescore is True
+    assert db._search_params(db.config.USERS_COLLECTION) is None
@@ -0,0 +1,353 @@
+"""
+Tests for DatabaseClient search, batch search, payload indexes and embedded mode.
+
+Most tests use a recording Qdrant client; embedded mode uses qdrant-client's
+in-process local mode.
+"""
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from qdrant_client import models
+
+from app.config import Config
+from app.database import PREVIEW_FIELD, SEARCH_RESULT_FIELDS, DatabaseClient
+from app.models.api import ThreadCreate, UserCreate, VectorSearchRequest
+
+
+class RecordingQdrant:
+    """Stands in for AsyncQdrantClient and records search arguments."""
+
+    def __init__(self, points):
+        self.points = points
+        self.search_calls = []
+        self.batch_calls = []
+        self.upserts = []
+        self.payload_schema = {}
+        self.created_indexes = []
+
+    def _hits(self, limit, with_payload):
+        include = with_payload or []
+        return [
+            models.ScoredPoint(
+                id=point["id"], version=0, score=point["score"],
+                payload={k: v for k, v in point["payload"].items() if k in include}
+            )
+            for point in self.points[:limit]
+        ]
+
+    async def search(self, **kwargs):
+        self.search_calls.append(kwargs)
+        return self._hits(kwargs["limit"], kwargs["with_payload"])
+
+    async def search_batch(self, collection_name, requests, timeout=None):
+        self.batch_calls.append(requests)
+        return [self._hits(r.limit, r.with_payload) for r in requests]
+
+    async def upsert(self, collection_name, points):
+        self.upserts.extend(points)
+
+    async def get_collection(self, collection_name):
+        return SimpleNamespace(points_count=10, payload_schema=dict(self.payload_schema.get(collection_name, {})))
+
+    async def create_payload_index(self, collection_name, field_name, field_schema, wait=True):
+        self.created_indexes.append((collection_name, field_name, field_schema))
+        self.payload_schema.setdefault(collection_name, {})[field_name] = models.PayloadIndexInfo(
+            data_type=field_schema, points=0
+        )
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def db():
+    config = Config()
+    client = DatabaseClient(config)
+    client._collections_verified = True
+    client.client = RecordingQdrant([
+        {
+            "id": "00000000-0000-0000-0000-000000000001",
+            "score": 0.9,
+            "payload": {"content": "x" * 300, "thread_id": "t1", PREVIEW_FIELD: "x" * 100 + "..."},
+        },
+        {
+            "id": "00000000-0000-0000-0000-000000000002",
+            "score": 0.5,
+            "payload": {"content": "legacy point without preview"},
+        },
+    ])
+    return client
+
+
+class TestSearchSimilar:
+    """search_similar forwards limit, threshold and projection to Qdrant."""
+
+    async def test_limit_and_threshold_are_forwarded(self, db):
+        vector = [0.0] * db.config.VECTOR_SIZE
+        results = await db.search_similar("messages", vector, limit=1, score_threshold=0.3)
+        call = db.client.search_calls[0]
+        assert call["limit"] == 1
+        assert call["score_threshold"] == 0.3
+        assert call["with_payload"] == list(SEARCH_RESULT_FIELDS)
+        assert len(results) == 1 and results[0]["thread_id"] == "t1"
+
+    async def test_limit_is_capped_by_search_limit(self, db):
+        vector = [0.0] * db.config.VECTOR_SIZE
+        await db.search_similar("messages", vector, limit=10_000)
+        assert db.client.search_calls[0]["limit"] == db.config.SEARCH_LIMIT
+
+    async def test_projection_returns_only_requested_fields(self, db):
+        vector = [0.0] * db.config.VECTOR_SIZE
+        results = await db.search_similar("messages", vector, fields=[PREVIEW_FIELD])
+        assert db.client.search_calls[0]["with_payload"] == [PREVIEW_FIELD]
+        assert set(results[0]) == {"id", "similarity", PREVIEW_FIELD}
+        assert results[0][PREVIEW_FIELD].endswith("...")
+        # Legacy points have no stored preview and the content was not fetched
+        assert results[1][PREVIEW_FIELD] == ""
+
+    async def test_saved_messages_store_a_preview(self, db):
+        await db.save_message({"content": "y" * 150, "vector": [0.0] * db.config.VECTOR_SIZE})
+        payload = db.client.upserts[0].payload
+        assert payload[PREVIEW_FIELD] == "y" * 100 + "..."
+
+
+class TestSearchBatch:
+    """search_batch sends one request and aligns results with the inputs."""
+
+    async def test_results_align_with_queries(self, db):
+        vector = [0.0] * db.config.VECTOR_SIZE
+        results = await db.search_batch("messages", [
+            VectorSearchRequest(query_vector=vector, limit=2, fields=["thread_id"]),
+            VectorSearchRequest(query_vector=[1.0], limit=2),  # wrong size
+            VectorSearchRequest(query_vector=vector, limit=1, filter={"thread_id": "t1", "role": ["user", "ai"]}),
+        ])
+        assert len(db.client.batch_calls) == 1
+        requests = db.client.batch_calls[0]
+        assert len(requests) == 2
+        assert requests[0].with_payload == ["thread_id"] and requests[0].filter is None
+        conditions = requests[1].filter.must
+        assert conditions[0].match.value == "t1"
+        assert conditions[1].match.any == ["user", "ai"]
+
+        assert [len(r) for r in results] == [2, 0, 1]
+        assert set(results[0][0]) == {"id", "similarity", "thread_id"}
+        assert set(results[2][0]) == {"id", "similarity", *SEARCH_RESULT_FIELDS}
+
+    async def test_all_invalid_queries_skip_the_round_trip(self, db):
+        results = await db.search_batch("messages", [VectorSearchRequest(query_vector=[1.0])])
+        assert results == [[]]
+        assert db.client.batch_calls == []
+
+
+class TestPayloadIndexes:
+    """Declared payload indexes are created once and reported."""
+
+    async def test_missing_indexes_are_created_idempotently(self, db):
+        messages = db.config.MESSAGES_COLLECTION
+        db.client.payload_schema[messages] = {
+            "thread_id": models.PayloadIndexInfo(data_type=models.PayloadSchemaType.KEYWORD, points=10)
+        }
+        created = await db.ensure_payload_indexes()
+        assert created[messages] == ["created_at", "metadata.prompt_hash"]
+        assert created[db.config.USERS_COLLECTION] == ["public_key"]
+        assert (messages, "created_at", models.PayloadSchemaType.DATETIME) in db.client.created_indexes
+
+        assert await db.ensure_payload_indexes() == {}
+
+    async def test_coverage_reports_missing_and_mistyped_fields(self, db):
+        users = db.config.USERS_COLLECTION
+        db.client.payload_schema[users] = {
+            "public_key": models.PayloadIndexInfo(data_type=models.PayloadSchemaType.TEXT, points=3),
+            "legacy": models.PayloadIndexInfo(data_type=models.PayloadSchemaType.KEYWORD, points=3),
+        }
+        report = await db.index_coverage()
+        assert report[users]["fields"]["public_key"]["status"] == "type_mismatch"
+        assert report[users]["undeclared"] == ["legacy"]
+        assert report[db.config.MESSAGES_COLLECTION]["fields"]["thread_id"] == {
+            "expected": "keyword", "actual": None, "indexed_points": 0, "status": "missing"
+        }
+
+
+class TestEmbeddedMode:
+    """QDRANT_MODE=local bootstraps every collection in-process."""
+
+    async def test_local_mode_creates_collections_and_serves_search(self, monkeypatch):
+        monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+        monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", ":memory:")
+        db = DatabaseClient(Config())
+        try:
+            await db.ensure_collections()
+            names = {c.name for c in (await db.client.get_collections()).collections}
+            assert names == {
+                db.config.MESSAGES_COLLECTION,
+                db.config.USERS_COLLECTION,
+                db.config.CHAT_THREADS_COLLECTION,
+                db.config.NOTIFICATIONS_COLLECTION,
+            }
+            vector = [0.1] * db.config.VECTOR_SIZE
+            saved = await db.save_message({"content": "hello", "vector": vector})
+            results = await db.search_similar(db.config.MESSAGES_COLLECTION, vector, limit=1)
+            assert results[0]["id"] == saved["id"]
+        finally:
+            await db.close()
+
+    async def test_local_mode_persists_to_a_path(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+        monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", str(tmp_path))
+        db = DatabaseClient(Config())
+        await db.ensure_collections()
+        await db.save_message({"content": "kept", "vector": [0.2] * db.config.VECTOR_SIZE})
+        await db.close()
+
+        reopened = DatabaseClient(Config())
+        try:
+            await reopened.ensure_collections()
+            assert (await reopened.client.count(reopened.config.MESSAGES_COLLECTION)).count == 1
+        finally:
+            await reopened.close()
+
+    async def test_records_are_stored_without_vectors(self, local_db):
+        user = await local_db.create_user(UserCreate(public_key="pk-1"))
+        thread = await local_db.create_thread(ThreadCreate(name="t", user_id=user["id"]))
+        saved = await local_db.save_notification({"type": "citation", "recipient_wallet_address": "0xabc"})
+        assert (await local_db.mark_notification_as_read(saved["id"]))["success"]
+
+        assert [t["id"] for t in await local_db.get_user_threads(user["id"])] == [thread["id"]]
+        for collection in local_db.record_collections():
+            info = await local_db.client.get_collection(collection)
+            assert not info.config.params.vectors
+        points = await local_db.client.retrieve(
+            local_db.config.NOTIFICATIONS_COLLECTION, ids=[saved["id"]], with_vectors=True
+        )
+        assert points[0].payload["read"] is True
+        assert not points[0].vector
+
+    def test_unknown_mode_is_rejected(self, monkeypatch):
+        monkeypatch.setattr(Config, "QDRANT_MODE", "cluster")
+        with pytest.raises(ValueError):
+            DatabaseClient(Config())
+
+
+@pytest.fixture
+async def local_db(monkeypatch):
+    monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+    monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", ":memory:")
+    client = DatabaseClient(Config())
+    await client.ensure_collections()
+    yield client
+    await client.close()
+
+
+async def _add_points(db, collection, payloads):
+    await db.client.upsert(
+        collection_name=collection,
+        points=[
+            models.PointStruct(id=i + 1, vector=db._record_vector(collection) if collection in db.record_collections()
+                               else [0.0] * db.config.VECTOR_SIZE, payload=payload)
+            for i, payload in enumerate(payloads)
+        ]
+    )
+
+
+class TestPagination:
+    """Cursor pagination is ordered by created_at and never repeats or skips ties."""
+
+    async def _collect(self, db, **kwargs):
+        messages, cursor = [], None
+        while True:
+            page = await db.get_thread_messages_page("t1", limit=3, cursor=cursor, **kwargs)
+            messages.extend(page["messages"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                stamps = [m["created_at"] for m in messages]
+                assert stamps == sorted(stamps, reverse=kwargs.get("descending", False))
+                return [int(m["id"]) for m in messages]
+
+    async def test_pages_cover_every_message_in_order(self, local_db):
+        # Four messages share one timestamp, so pages must split a tie
+        stamps = ["2025-01-01T00:00:01", "2025-01-01T00:00:02", "2025-01-01T00:00:02",
+                  "2025-01-01T00:00:02", "2025-01-01T00:00:02", "2025-01-01T00:00:03", "2025-01-01T00:00:04"]
+        await _add_points(local_db, local_db.config.MESSAGES_COLLECTION, [
+            {"thread_id": "t1", "created_at": stamp, "content": str(i)} for i, stamp in enumerate(stamps)
+        ] + [{"thread_id": "other", "created_at": "2025-01-01T00:00:02"}])
+
+        ascending = await self._collect(local_db)
+        assert sorted(ascending) == [1, 2, 3, 4, 5, 6, 7] and len(ascending) == 7
+        descending = await self._collect(local_db, descending=True)
+        assert sorted(descending) == [1, 2, 3, 4, 5, 6, 7] and len(descending) == 7
+        assert descending[:2] == [7, 6] and descending[-1] == 1
+        assert await self._collect(local_db, after="2025-01-01T00:00:02") == [6, 7]
+
+    async def test_cursor_rejects_tampering_and_order_switch(self, local_db):
+        await _add_points(local_db, local_db.config.MESSAGES_COLLECTION, [
+            {"thread_id": "t1", "created_at": f"2025-01-01T00:00:0{i}"} for i in range(5)
+        ])
+        page = await local_db.get_thread_messages_page("t1", limit=2)
+        with pytest.raises(ValueError):
+            await local_db.get_thread_messages_page("t1", cursor=page["next_cursor"], descending=True)
+        with pytest.raises(ValueError):
+            await local_db.get_thread_messages_page("t1", cursor="not-a-cursor")
+
+    async def test_notifications_are_newest_first(self, local_db):
+        await _add_points(local_db, local_db.config.NOTIFICATIONS_COLLECTION, [
+            {"recipient_wallet_address": "0xa", "created_at": "2025-01-01T00:00:01"},
+            {"recipient_wallet_address": "0xb", "created_at": "2025-01-01T00:00:03"},
+            {"recipient_wallet_address": "0xc", "created_at": "2025-01-01T00:00:02"},
+        ])
+        first = await local_db.get_user_notifications_page(["0xa", "0xb"], limit=1)
+        assert [n["id"] for n in first["notifications"]] == ["2"]
+        second = await local_db.get_user_notifications_page(["0xa", "0xb"], limit=1, cursor=first["next_cursor"])
+        assert [n["id"] for n in second["notifications"]] == ["1"]
+        assert second["next_cursor"] is None
+
+    async def test_user_threads_come_from_the_ownership_index(self, local_db):
+        owner = await local_db.create_user(UserCreate(public_key="pk-owner"))
+        other = await local_db.create_user(UserCreate(public_key="pk-other"))
+        created = [
+            await local_db.create_thread(ThreadCreate(name=f"t{i}", user_id=owner["id"])) for i in range(3)
+        ]
+        await local_db.create_thread(ThreadCreate(name="theirs", user_id=other["id"]))
+
+        first = await local_db.get_user_threads_page(owner["id"], limit=2, descending=True)
+        rest = await local_db.get_user_threads_page(owner["id"], limit=2, cursor=first["next_cursor"], descending=True)
+        ids = [t["id"] for t in first["threads"] + rest["threads"]]
+        assert sorted(ids) == sorted(t["id"] for t in created)
+        assert rest["next_cursor"] is None
+        assert "thread_ids" not in await local_db.get_user(owner["id"])
+        with pytest.raises(ValueError):
+            await local_db.create_thread(ThreadCreate(name="orphan", user_id=str(uuid.uuid4())))
+
+
+class TestPromptHashLookup:
+    """find_message_by_prompt_hash finds stored prompt vectors without embedding."""
+
+    async def test_lookup_covers_stored_and_buffered_writes(self, local_db):
+        stored_vector = [0.4] * local_db.config.VECTOR_SIZE
+        saved = await local_db.save_message({
+            "content": "hello",
+            "vector": stored_vector,
+            "metadata": {"prompt_hash": "h1", "embedded_content_type": "user_prompt"},
+        })
+        match = await local_db.find_message_by_prompt_hash("h1")
+        assert match["id"] == saved["id"]
+        # Cosine collections store the normalized vector
+        assert match["vector"] == pytest.approx([1 / len(stored_vector) ** 0.5] * len(stored_vector))
+
+        queued = await local_db.store_vector(
+            "again", stored_vector, {"prompt_hash": "h2", "embedded_content_type": "user_prompt"}
+        )
+        assert (await local_db.find_message_by_prompt_hash("h2"))["id"] == queued["id"]
+
+    async def test_other_content_types_and_unknown_hashes_miss(self, local_db):
+        await local_db.save_message({
+            "content": "long prompt",
+            "vector": [0.4] * local_db.config.VECTOR_SIZE,
+            "metadata": {"prompt_hash": "h3", "embedded_content_type": "action_response"},
+        })
+        assert await local_db.find_message_by_prompt_hash("h3") is None
+        assert await local_db.find_message_by_prompt_hash("missing") is None
+
+    def test_prompt_hash_is_indexed(self, db):
+        indexes = db.payload_indexes()[db.config.MESSAGES_COLLECTION]
+        assert indexes["metadata.prompt_hash"] == models.PayloadSchemaType.KEYWORD
@@ -0,0 +1,49 @@
+"""
+Tests for MMR re-ranking and its use in DatabaseClient.search_similar.
+"""
+import pytest
+
+from app.config import Config
+from app.database import DatabaseClient
+from app.rerank import mmr_select
+
+
+class TestMMRSelect:
+    def test_lambda_one_ranks_by_relevance(self):
+        candidates = [[0.0, 1.0], [1.0, 0.1], [1.0, 0.0]]
+        assert mmr_select([1.0, 0.0], candidates, k=3, lambda_mult=1.0) == [2, 1, 0]
+
+    def test_near_duplicates_give_way_to_a_different_hit(self):
+        candidates = [[1.0, 0.0], [1.0, 0.01], [0.6, 0.8]]
+        assert mmr_select([1.0, 0.2], candidates, k=2, lambda_mult=0.5) == [1, 2]
+
+    def test_k_is_capped_and_empty_input_is_fine(self):
+        assert sorted(mmr_select([1.0, 0.0], [[1.0, 0.0], [0.0, 1.0]], k=5)) == [0, 1]
+        assert mmr_select([1.0, 0.0], [], k=3) == []
+
+
+@pytest.fixture
+async def local_db(monkeypatch):
+    monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+    monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", ":memory:")
+    client = DatabaseClient(Config())
+    await client.ensure_collections()
+    yield client
+    await client.close()
+
+
+async def test_search_drops_near_duplicate_messages(local_db):
+    size = local_db.config.VECTOR_SIZE
+    query = [1.0] + [0.0] * (size - 1)
+    duplicates = []
+    for i in range(4):
+        vector = [1.0, 0.01 * i] + [0.0] * (size - 2)
+        duplicates.append((await local_db.save_message({"content": f"same question {i}", "vector": vector}))["id"])
+    distinct = await local_db.save_message({"content": "different angle", "vector": [0.7, 0.0, 0.7] + [0.0] * (size - 3)})
+
+    plain = await local_db.search_vectors(query, limit=2)
+    diverse = await local_db.search_vectors(query, limit=2, mmr_lambda=0.3)
+    assert all(hit["id"] in duplicates for hit in plain)
+    assert [hit["id"] for hit in diverse][1] == distinct["id"]
+    # The most relevant hit is always kept, so max similarity (novelty) is unchanged
+    assert diverse[0]["similarity"] == pytest.approx(plain[0]["similarity"])
@@ -0,0 +1,231 @@
+"""
+Tests for dependency bulkheads, circuit breakers and deadlines.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from app import resilience
+from app.config import Config
+from app.database import DatabaseClient, is_qdrant_failure
+from app.resilience import Dependency, DependencyUnavailable
+
+
+async def _fail():
+    raise ConnectionError("refused")
+
+
+async def _ok():
+    return "ok"
+
+
+class TestCircuitBreaker:
+    async def test_opens_after_threshold_and_rejects_without_calling(self):
+        dependency = Dependency("test", max_concurrency=4, deadline=1, failure_threshold=2, reset_timeout=60)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await dependency.call(_fail)
+        calls = []
+
+        async def record():
+            calls.append(1)
+
+        with pytest.raises(DependencyUnavailable):
+            await dependency.call(record)
+        assert calls == []
+        assert dependency.state()["state"] == resilience.OPEN
+
+    async def test_half_open_probe_closes_or_reopens(self):
+        dependency = Dependency("test", max_concurrency=4, deadline=1, failure_threshold=1, reset_timeout=0.05)
+        with pytest.raises(ConnectionError):
+            await dependency.call(_fail)
+        await asyncio.sleep(0.06)
+        with pytest.raises(ConnectionError):
+            await dependency.call(_fail)
+        assert dependency.state()["state"] == resilience.OPEN
+
+        await asyncio.sleep(0.06)
+        assert await dependency.call(_ok) == "ok"
+        assert dependency.state()["state"] == resilience.CLOSED
+
+    async def test_only_one_probe_runs_while_half_open(self):
+        dependency = Dependency("test", max_concurrency=4, deadline=1, failure_threshold=1, reset_timeout=0.01)
+        with pytest.raises(ConnectionError):
+            await dependency.call(_fail)
+        await asyncio.sleep(0.02)
+        results = await asyncio.gather(dependency.call(asyncio.sleep, 0.05), dependency.call(_ok), return_exceptions=True)
+        assert results[0] is None
+        assert isinstance(results[1], DependencyUnavailable)
+
+    async def test_ignored_errors_do_not_count(self):
+        dependency = Dependency(
+            "test", max_concurrency=4, deadline=1, failure_threshold=1,
+            is_failure=lambda e: not isinstance(e, ValueError)
+        )
+
+        async def bad_request():
+            raise ValueError("bad input")
+
+        with pytest.raises(ValueError):
+            await dependency.call(bad_request)
+        assert dependency.state()["state"] == resilience.CLOSED
+
+
+class TestDeadlinesAndBulkheads:
+    async def test_deadline_miss_counts_as_failure(self):
+        dependency = Dependency("test", max_concurrency=4, deadline=0.01, failure_threshold=1)
+        with pytest.raises(DependencyUnavailable):
+            await dependency.call(asyncio.sleep, 1)
+        assert dependency.state()["state"] == resilience.OPEN
+
+    async def test_full_bulkhead_sheds_load_without_opening(self):
+        dependency = Dependency("test", max_concurrency=1, deadline=1, failure_threshold=1, max_wait=0.02)
+        results = await asyncio.gather(dependency.call(asyncio.sleep, 0.1), dependency.call(_ok), return_exceptions=True)
+        assert isinstance(results[1], DependencyUnavailable) and results[1].reason == "bulkhead_full"
+        assert dependency.state()["state"] == resilience.CLOSED
+
+    async def test_sync_calls_run_off_the_event_loop(self):
+        dependency = Dependency("test", max_concurrency=2, deadline=0.05, failure_threshold=5)
+        start = time.monotonic()
+        with pytest.raises(DependencyUnavailable):
+            await dependency.run_sync(time.sleep, 0.3)
+        assert time.monotonic() - start < 0.2
+
+    async def test_abandoned_sync_call_keeps_its_slot_until_the_thread_returns(self):
+        dependency = Dependency("test", max_concurrency=1, deadline=0.02, failure_threshold=5, max_wait=0.02)
+        with pytest.raises(DependencyUnavailable):
+            await dependency.run_sync(time.sleep, 0.2)
+        with pytest.raises(DependencyUnavailable) as rejected:
+            await dependency.run_sync(time.sleep, 0)
+        assert rejected.value.reason == "bulkhead_full"
+        assert dependency.state()["in_flight"] == 1
+
+        await asyncio.sleep(0.25)
+        assert dependency.state()["in_flight"] == 0
+        assert await dependency.run_sync(lambda: "done") == "done"
+
+    async def test_dependency_without_deadline_runs_to_completion(self):
+        dependency = Dependency("test", max_concurrency=1, deadline=None)
+        assert await dependency.run_sync(lambda: time.sleep(0.05) or "minted") == "minted"
+
+    async def test_mints_queue_one_at_a_time(self):
+        mints = resilience.get_dependency("sui_mint", Config())
+        assert mints.deadline is None
+        running, overlapped = [], []
+
+        def mint(i):
+            overlapped.append(bool(running))
+            running.append(i)
+            time.sleep(0.02)
+            running.remove(i)
+            return i
+
+        assert await asyncio.gather(*(mints.run_sync(mint, i) for i in range(3))) == [0, 1, 2]
+        assert not any(overlapped)
+
+
+class TestQdrantGuard:
+    def test_client_errors_do_not_trip_the_breaker(self):
+        assert not is_qdrant_failure(UnexpectedResponse(404, "Not Found", b"", {}))
+        assert is_qdrant_failure(UnexpectedResponse(503, "Unavailable", b"", {}))
+        assert is_qdrant_failure(ConnectionError())
+
+    async def test_database_calls_fail_fast_once_open(self, monkeypatch):
+        monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+        monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", ":memory:")
+        db = DatabaseClient(Config())
+        try:
+            await db.ensure_collections()
+            assert await db.get_user("00000000-0000-0000-0000-000000000000") is None
+            for _ in range(db.config.BREAKER_FAILURE_THRESHOLD):
+                resilience.get_dependency("qdrant").breaker.record_failure()
+            with pytest.raises(DependencyUnavailable):
+                await db.client.count(db.config.MESSAGES_COLLECTION)
+            assert resilience.snapshot()["qdrant"]["state"] == resilience.OPEN
+        finally:
+            await db.close()
+
+    async def test_admin_calls_use_their_own_breaker_without_a_deadline(self, monkeypatch):
+        monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+        monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", ":memory:")
+        db = DatabaseClient(Config())
+        try:
+            await db.ensure_collections()
+            for _ in range(db.config.BREAKER_FAILURE_THRESHOLD):
+                resilience.get_dependency("qdrant").breaker.record_failure()
+            assert (await db.admin_client.count(db.config.MESSAGES_COLLECTION)).count == 0
+            assert resilience.snapshot()["qdrant_admin"]["deadline"] is None
+            assert resilience.snapshot()["qdrant_admin"]["state"] == resilience.CLOSED
+        finally:
+            await db.close()
+
+
+def test_health_reports_open_breakers():
+    from main import app
+
+    resilience.get_dependency("brave_search").breaker.state = resilience.OPEN
+    resilience.get_dependency("brave_search").breaker.opened_at = time.monotonic()
+    response = TestClient(app).get("/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "degraded"
+    assert response.json()["dependencies"]["brave_search"]["state"] == "open"
+
+
+class TestDegradedPhases:
+    async def test_experience_vectors_skips_save_and_reward_when_qdrant_is_down(self, monkeypatch):
+        from types import SimpleNamespace
+
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        from app.langchain_utils import ModelConfig
+        from app.postchain import langchain_workflow
+
+        monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+        monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", ":memory:")
+        db = DatabaseClient(Config())
+        await db.ensure_collections()
+        calls = {"saved": 0, "rewarded": 0}
+
+        async def embed_query(text):
+            return [1.0] + [0.0] * (db.config.VECTOR_SIZE - 1)
+
+        async def store_vector(**kwargs):
+            calls["saved"] += 1
+            return {"id": "x"}
+
+        async def issue_novelty_reward(wallet_address, max_similarity):
+            calls["rewarded"] += 1
+            return {"success": True, "reward_amount": 10}
+
+        async def post_llm(model_config, messages, tools=None):
+            return AIMessage(content="answered without retrieval")
+
+        monkeypatch.setattr(db, "store_vector", store_vector)
+        services = SimpleNamespace(
+            db=db,
+            embeddings=SimpleNamespace(embed_query=embed_query),
+            rewards_service=SimpleNamespace(issue_novelty_reward=issue_novelty_reward)
+        )
+        monkeypatch.setattr(langchain_workflow, "get_services", lambda: services)
+        monkeypatch.setattr(langchain_workflow, "post_llm", post_llm)
+        try:
+            qdrant = resilience.get_dependency("qdrant")
+            for _ in range(qdrant.breaker.failure_threshold):
+                qdrant.breaker.record_failure()
+
+            output = await langchain_workflow.run_experience_vectors_phase(
+                messages=[HumanMessage(content="what is new?")],
+                model_config=ModelConfig(provider="openai", model_name="gpt-4o-mini"),
+                thread_id="thread",
+                wallet_address="0x1"
+            )
+        finally:
+            await db.close()
+
+        assert output.error is None
+        assert output.experience_vectors_response.content == "answered without retrieval"
+        assert output.max_similarity is None and output.novelty_reward is None
+        assert calls == {"saved": 0, "rewarded": 0}
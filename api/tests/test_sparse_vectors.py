@@ -0,0 +1,104 @@
+"""
+Tests for BM25 sparse vectors, hybrid search and the sparse backfill.
+
+Hybrid search and the backfill run against qdrant-client's in-process local mode.
+"""
+import pytest
+from qdrant_client import models
+
+from app.config import Config
+from app.database import DatabaseClient
+from app.sparse_vectors import (
+    SPARSE_VECTOR_NAME,
+    backfill_sparse_vectors,
+    encode_document,
+    encode_query,
+    tokenize,
+)
+
+
+class TestEncoding:
+    def test_tokens_keep_ids_and_drop_stopwords(self):
+        assert tokenize("The invoice for ACME-4471 is late") == ["invoice", "acme", "4471", "late"]
+
+    def test_repeated_terms_saturate(self):
+        once = encode_document("qdrant")
+        many = encode_document("qdrant " * 50)
+        assert once.indices == many.indices
+        assert once.values[0] < many.values[0] < once.values[0] * 2.2
+
+    def test_query_weights_are_unit_and_empty_text_has_no_vector(self):
+        query = encode_query("Rust rust tokio")
+        assert len(query.indices) == 2 and set(query.values) == {1.0}
+        assert encode_query("the of and") is None
+
+
+def _direction(size: int, axis: int) -> list:
+    vector = [0.0] * size
+    vector[axis] = 1.0
+    return vector
+
+
+@pytest.fixture
+async def local_db(monkeypatch):
+    monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+    monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", ":memory:")
+    client = DatabaseClient(Config())
+    await client.ensure_collections()
+    yield client
+    await client.close()
+
+
+class TestHybridSearch:
+    async def test_keyword_match_reaches_top_k_that_dense_search_misses(self, local_db):
+        size = local_db.config.VECTOR_SIZE
+        query = _direction(size, 0)
+        keyword = await local_db.save_message({"content": "Invoice ACME-4471 was paid", "vector": _direction(size, 1)})
+        for i in range(8):
+            near = _direction(size, 0)
+            near[2 + i] = 0.1 * (i + 1)
+            await local_db.save_message({"content": f"general note {i}", "vector": near})
+
+        assert local_db.hybrid
+        dense = await local_db.search_vectors(query, limit=3)
+        hybrid = await local_db.search_vectors(query, limit=3, query_text="status of ACME-4471")
+        assert keyword["id"] not in [hit["id"] for hit in dense]
+        assert keyword["id"] in [hit["id"] for hit in hybrid]
+        # Hits keep their dense cosine score
+        assert max(hit["similarity"] for hit in hybrid) == pytest.approx(max(hit["similarity"] for hit in dense))
+
+    async def test_disabled_hybrid_search_stays_dense(self, local_db, monkeypatch):
+        monkeypatch.setattr(local_db.config, "HYBRID_SEARCH", False)
+        size = local_db.config.VECTOR_SIZE
+        keyword = await local_db.save_message({"content": "ACME-4471", "vector": _direction(size, 1)})
+        await local_db.save_message({"content": "other", "vector": _direction(size, 0)})
+        hits = await local_db.search_vectors(_direction(size, 0), limit=1, query_text="ACME-4471")
+        assert [hit["id"] for hit in hits] != [keyword["id"]]
+
+
+class TestBackfill:
+    async def test_points_without_sparse_vectors_are_backfilled(self, local_db):
+        collection = local_db.config.MESSAGES_COLLECTION
+        await local_db.client.upsert(collection_name=collection, points=[
+            models.PointStruct(id=1, vector={"": _direction(local_db.config.VECTOR_SIZE, 0)}, payload={"content": "kept"})
+        ])
+        await local_db.save_message({"content": "new", "vector": _direction(local_db.config.VECTOR_SIZE, 1)})
+
+        summary = await backfill_sparse_vectors(local_db, batch_size=1)
+        assert (summary["scanned"], summary["updated"]) == (2, 1)
+        points = await local_db.client.retrieve(collection, ids=[1], with_vectors=[SPARSE_VECTOR_NAME])
+        assert points[0].vector[SPARSE_VECTOR_NAME].indices == encode_document("kept").indices
+
+    async def test_collections_without_sparse_config_are_rejected(self, monkeypatch):
+        monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+        monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", ":memory:")
+        db = DatabaseClient(Config())
+        try:
+            await db.client.create_collection(
+                collection_name=db.config.MESSAGES_COLLECTION,
+                vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE)
+            )
+            with pytest.raises(ValueError):
+                await backfill_sparse_vectors(db)
+        finally:
+            await db.close()
@@ -38,7 +38,7 @@ async def test_mint_choir_invalid_address(sui_service):
 async def test_get_balance_success(sui_service):
     # Use the specified test address
     test_address = "0x0688dd8b5acd4ed64696876676cae1d1cc8ab8cef926074a7e7ccc3956c670f9"
-    result = sui_service.get_balance(test_address)
+    result = await sui_service.get_balance(test_address)
 
     # Log the result for debugging
     logging.info(f"Balance result: {result}")
@@ -47,7 +47,7 @@ async def test_get_balance_success(sui_service):
 
 @pytest.mark.asyncio
 async def test_get_balance_invalid_address(sui_service):
-    result = sui_service.get_balance("invalid_address")
+    result = await sui_service.get_balance("invalid_address")
     assert "error" in result
 
 @pytest.mark.asyncio
@@ -0,0 +1,121 @@
+"""
+Tests for the write-behind vector buffer and DatabaseClient's read-your-writes.
+"""
+import asyncio
+
+import pytest
+from qdrant_client import models
+
+from app import metrics
+from app.config import Config
+from app.database import DatabaseClient
+from app.write_buffer import WriteBehindBuffer
+
+
+class FlakyUpsert:
+    """Records upserted batches; fails the first ``failures`` calls."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.batches = []
+
+    async def __call__(self, collection, points):
+        await asyncio.sleep(0)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("qdrant unavailable")
+        self.batches.append((collection, [p.id for p in points]))
+
+
+def _point(i: int) -> models.PointStruct:
+    return models.PointStruct(id=i, vector=[1.0, 0.0], payload={"n": i})
+
+
+class TestWriteBehindBuffer:
+    async def test_full_batch_is_sent_without_waiting_for_the_timer(self):
+        upsert = FlakyUpsert()
+        buffer = WriteBehindBuffer(upsert, max_batch_size=3, max_wait=60)
+        for i in range(3):
+            buffer.add("c", _point(i))
+        await asyncio.sleep(0.01)
+        assert upsert.batches == [("c", [0, 1, 2])]
+
+    async def test_timer_flushes_a_partial_batch(self):
+        upsert = FlakyUpsert()
+        buffer = WriteBehindBuffer(upsert, max_batch_size=100, max_wait=0.01)
+        buffer.add("c", _point(1))
+        assert buffer.depth() == 1
+        await asyncio.sleep(0.05)
+        assert upsert.batches == [("c", [1])]
+        assert buffer.depth() == 0
+
+    async def test_failed_batches_are_retried_then_dropped(self):
+        metrics.reset()
+        upsert = FlakyUpsert(failures=1)
+        buffer = WriteBehindBuffer(upsert, max_retries=2, retry_backoff=0.001)
+        buffer.add("c", _point(1))
+        await buffer.drain()
+        assert upsert.batches == [("c", [1])]
+        assert metrics.snapshot()["vector_write_retries{collection=c}"] == 1
+
+        failing = WriteBehindBuffer(FlakyUpsert(failures=10), max_retries=1, retry_backoff=0.001)
+        failing.add("c", _point(2))
+        await failing.drain()
+        assert failing.stats()["dropped"] == 1
+        assert failing.visible_points("c") == []
+
+    async def test_points_stay_visible_until_settled(self):
+        buffer = WriteBehindBuffer(FlakyUpsert(), settle_time=0.02)
+        buffer.add("c", _point(1))
+        assert [p.id for p in buffer.visible_points("c")] == [1]
+        await buffer.drain()
+        assert buffer.get("c", "1") is not None
+        await asyncio.sleep(0.03)
+        assert buffer.visible_points("c") == []
+
+
+@pytest.fixture
+async def local_db(monkeypatch):
+    monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+    monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", ":memory:")
+    monkeypatch.setattr(Config, "VECTOR_WRITE_MAX_WAIT_MS", 60_000)
+    client = DatabaseClient(Config())
+    await client.ensure_collections()
+    yield client
+    await client.close()
+
+
+class TestStoreVector:
+    async def test_searches_see_queued_writes(self, local_db):
+        vector = [0.3] * local_db.config.VECTOR_SIZE
+        stored = await local_db.store_vector("queued", vector, {"thread_id": "t1"})
+        assert (await local_db.client.count(local_db.config.MESSAGES_COLLECTION)).count == 0
+
+        hits = await local_db.search_vectors(vector, limit=5, filter={"metadata.thread_id": "t1"})
+        assert [h["id"] for h in hits] == [stored["id"]]
+        assert await local_db.search_vectors(vector, filter={"metadata.thread_id": "t2"}) == []
+        assert (await local_db.get_vector_by_id(stored["id"]))["content"] == "queued"
+
+        await local_db.flush()
+        assert (await local_db.client.count(local_db.config.MESSAGES_COLLECTION)).count == 1
+        # Once both copies exist, the hit is not duplicated
+        assert len(await local_db.search_vectors(vector, limit=5)) == 1
+
+    async def test_wrong_vector_size_is_rejected_up_front(self, local_db):
+        with pytest.raises(ValueError):
+            await local_db.store_vector("short", [0.1, 0.2])
+
+    async def test_close_drains_the_buffer(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(Config, "QDRANT_MODE", "local")
+        monkeypatch.setattr(Config, "QDRANT_LOCAL_PATH", str(tmp_path))
+        monkeypatch.setattr(Config, "VECTOR_WRITE_MAX_WAIT_MS", 60_000)
+        db = DatabaseClient(Config())
+        await db.ensure_collections()
+        await db.store_vector("kept", [0.2] * db.config.VECTOR_SIZE)
+        await db.close()
+
+        reopened = DatabaseClient(Config())
+        try:
+            assert (await reopened.client.count(reopened.config.MESSAGES_COLLECTION)).count == 1
+        finally:
+            await reopened.close()
@@ -3,10 +3,25 @@ Test the Brave Search tool.
 """
 import json
 import pytest
-from unittest.mock import MagicMock, patch
+import httpx
 
 from app.config import Config
 from app.tools.base import BaseTool
+from app.tools.http_client import retry_after_seconds
+
+
+def mock_http(*responses):
+    """HTTP client answering successive requests with the given responses."""
+    queue = list(responses)
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return queue.pop(0) if len(queue) > 1 else queue[0]
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client.requests = requests
+    return client
 
 
 class TestBraveSearchTool:
@@ -32,15 +47,12 @@ class TestBraveSearchTool:
             pytest.fail("Could not import BraveSearchTool")
 
     @pytest.mark.asyncio
-    @patch("app.tools.brave_search.requests.get")
-    async def test_basic_search(self, mock_get):
+    async def test_basic_search(self):
         """Test that the search returns properly formatted results."""
         from app.tools.brave_search import BraveSearchTool
 
         # Mock search results
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        http = mock_http(httpx.Response(200, json={
             "web": {
                 "results": [
                     {
@@ -56,11 +68,10 @@ class TestBraveSearchTool:
                 ],
                 "totalCount": 2
             }
-        }
-        mock_get.return_value = mock_response
+        }))
 
         # Create tool and run search
-        search_tool = BraveSearchTool(config=Config(), api_key="test_key")
+        search_tool = BraveSearchTool(config=Config(), api_key="test_key", http_client=http)
         result = await search_tool.run("test query")
 
         # Verify result structure
@@ -81,24 +92,20 @@ class TestBraveSearchTool:
         assert first_result["content"] == "This is the first test result"
 
     @pytest.mark.asyncio
-    @patch("app.tools.brave_search.requests.get")
-    async def test_empty_results(self, mock_get):
+    async def test_empty_results(self):
         """Test handling of empty results."""
         from app.tools.brave_search import BraveSearchTool
 
         # Mock empty results
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        http = mock_http(httpx.Response(200, json={
             "web": {
                 "results": [],
                 "totalCount": 0
             }
-        }
-        mock_get.return_value = mock_response
+        }))
 
         # Create tool and run search
-        search_tool = BraveSearchTool(config=Config(), api_key="test_key")
+        search_tool = BraveSearchTool(config=Config(), api_key="test_key", http_client=http)
         result = await search_tool.run("query with no results")
 
         # Verify result indicates no results found
@@ -110,19 +117,15 @@ class TestBraveSearchTool:
         assert "no results found" in data["message"].lower()
 
     @pytest.mark.asyncio
-    @patch("app.tools.brave_search.requests.get")
-    async def test_api_error(self, mock_get):
+    async def test_api_error(self):
         """Test handling of API errors."""
         from app.tools.brave_search import BraveSearchTool
 
         # Mock API error
-        mock_response = MagicMock()
-        mock_response.status_code = 401
-        mock_response.text = "Unauthorized"
-        mock_get.return_value = mock_response
+        http = mock_http(httpx.Response(401, text="Unauthorized"))
 
         # Create tool and run search
-        search_tool = BraveSearchTool(config=Config(), api_key="invalid_key")
+        search_tool = BraveSearchTool(config=Config(), api_key="invalid_key", http_client=http)
         result = await search_tool.run("error query")
 
         # Verify error handling
@@ -131,8 +134,7 @@ class TestBraveSearchTool:
         assert "401" in data["error"]
 
     @pytest.mark.asyncio
-    @patch("app.tools.brave_search.requests.get")
-    async def test_result_limit(self, mock_get):
+    async def test_result_limit(self):
         """Test that results are limited to the specified number."""
         from app.tools.brave_search import BraveSearchTool
 
@@ -147,18 +149,15 @@ class TestBraveSearchTool:
         ]
 
         # Mock response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        http = mock_http(httpx.Response(200, json={
             "web": {
                 "results": mock_results,
                 "totalCount": len(mock_results)
             }
-        }
-        mock_get.return_value = mock_response
+        }))
 
         # Create tool with limit of 5 results
-        search_tool = BraveSearchTool(config=Config(), api_key="test_key", max_results=5)
+        search_tool = BraveSearchTool(config=Config(), api_key="test_key", max_results=5, http_client=http)
         result = await search_tool.run("test query")
 
         # Verify limited results
@@ -166,6 +165,47 @@ class TestBraveSearchTool:
         assert len(data["results"]) == 5
         assert data["results"][4]["title"] == "Test Result 4"
 
+    @pytest.mark.asyncio
+    async def test_rate_limit_is_retried_after_retry_after(self):
+        """Test that a 429 is retried on the same client after the advertised pause."""
+        from app.tools.brave_search import BraveSearchTool
+
+        http = mock_http(
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(200, json={"web": {"results": [{"title": "T", "url": "u", "description": "d"}]}})
+        )
+        search_tool = BraveSearchTool(config=Config(), api_key="test_key", http_client=http)
+        data = json.loads(await search_tool.run("busy query"))
+
+        assert len(http.requests) == 2
+        assert data["results"][0]["title"] == "T"
+
+    @pytest.mark.asyncio
+    async def test_unavailable_is_retried_only_with_retry_after(self):
+        """Test that a 503 is retried when it says when to come back, and not otherwise."""
+        from app.tools.brave_search import BraveSearchTool
+
+        http = mock_http(
+            httpx.Response(503, headers={"Retry-After": "0"}),
+            httpx.Response(200, json={"web": {"results": [{"title": "T", "url": "u", "description": "d"}]}})
+        )
+        search_tool = BraveSearchTool(config=Config(), api_key="test_key", http_client=http)
+        data = json.loads(await search_tool.run("busy query"))
+        assert len(http.requests) == 2
+        assert data["results"][0]["title"] == "T"
+
+        http = mock_http(httpx.Response(503), httpx.Response(200, json={"web": {"results": []}}))
+        search_tool = BraveSearchTool(config=Config(), api_key="test_key", http_client=http)
+        data = json.loads(await search_tool.run("down query"))
+        assert len(http.requests) == 1
+        assert "error" in data
+
+    def test_retry_after_accepts_seconds_and_dates(self):
+        """Test parsing both Retry-After forms."""
+        assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "7"})) == 7
+        assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0
+        assert retry_after_seconds(httpx.Response(429)) is None
+
 
 if __name__ == "__main__":
     pytest.main(["-xvs", __file__])